@@ -1,16 +1,79 @@
-from typing import Optional, Dict, Any
+import asyncio
+import json
+import time
+from typing import Optional, Dict, Any, Tuple, Union
 import httpx
 from config import settings
+from services.metrics import LatencyHistogram
+
+ENDPOINTS = (
+    "/api/verify-credential",
+    "/api/verify-presentation",
+    "/api/issue-credential",
+    "/api/update-credential",
+    "/api/request-presentation",
+)
+
+
+class _TransportMetrics:
+    """
+    Per-endpoint latency / pool-wait histograms and in-flight counters.
+    Pool wait comes from httpcore trace events: time until request headers
+    start going out, minus any time spent opening a new connection.
+    """
+
+    def __init__(self) -> None:
+        self.latency = {endpoint: LatencyHistogram() for endpoint in ENDPOINTS}
+        self.pool_wait = LatencyHistogram()
+        self.in_flight = {endpoint: 0 for endpoint in ENDPOINTS}
+        self.errors = {endpoint: 0 for endpoint in ENDPOINTS}
+        self.new_connections = 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "endpoints": {
+                endpoint: {
+                    "in_flight": self.in_flight[endpoint],
+                    "errors": self.errors[endpoint],
+                    "latency": self.latency[endpoint].snapshot(),
+                }
+                for endpoint in ENDPOINTS
+            },
+            "in_flight_total": sum(self.in_flight.values()),
+            "pool_wait": self.pool_wait.snapshot(),
+            "new_connections": self.new_connections,
+        }
+
 
 class DensoDIDClient:
     """
     Adapter for communicating with the Denso DID Gateway.
     """
     
-    def __init__(self, base_url: str, api_key: Optional[str] = None, timeout: float = 10.0):
+    def __init__(self, base_url: str, api_key: Optional[str] = None, timeout: Optional[Union[float, httpx.Timeout]] = None):
         self.base_url = base_url
         self.api_key = api_key
-        self.client = httpx.AsyncClient(base_url=base_url, timeout=timeout)
+        self.client = httpx.AsyncClient(
+            base_url=base_url,
+            timeout=timeout
+            or httpx.Timeout(
+                connect=settings.denso_connect_timeout_s,
+                read=settings.denso_read_timeout_s,
+                write=settings.denso_write_timeout_s,
+                pool=settings.denso_pool_timeout_s,
+            ),
+            limits=httpx.Limits(
+                max_connections=settings.denso_max_connections,
+                max_keepalive_connections=settings.denso_max_keepalive_connections,
+                keepalive_expiry=settings.denso_keepalive_expiry_s,
+            ),
+            http2=settings.denso_http2,
+        )
+        # Built once; every request shares the same header mapping
+        self._static_headers = self._headers()
+        # id(document) -> (document, encoded body); the document is held so its id stays unique
+        self._preserialized: Dict[int, Tuple[Any, bytes]] = {}
+        self.metrics = _TransportMetrics()
 
     def _headers(self) -> Dict[str, str]:
         headers = {"Content-Type": "application/json"}
@@ -21,6 +84,60 @@ class DensoDIDClient:
     async def close(self):
         await self.client.aclose()
 
+    def preserialize(self, *documents: Any) -> None:
+        """
+        Encodes static request bodies (e.g. the sample credentials) once so
+        repeated calls skip JSON serialization. Documents must not be mutated afterwards.
+        """
+        for document in documents:
+            self._preserialized[id(document)] = (document, self._encode(document))
+
+    @staticmethod
+    def _encode(body: Any) -> bytes:
+        return json.dumps(body, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+    def _body(self, body: Any) -> bytes:
+        cached = self._preserialized.get(id(body))
+        if cached is not None and cached[0] is body:
+            return cached[1]
+        return self._encode(body)
+
+    async def _post(self, endpoint: str, body: Any, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        metrics = self.metrics
+        started = time.perf_counter()
+        marks: Dict[str, float] = {"connect": 0.0}
+
+        async def trace(event_name: str, info: Dict[str, Any]) -> None:
+            now = time.perf_counter()
+            if event_name.startswith("connection.") and event_name.endswith(".started"):
+                marks["connect_started"] = now
+            elif event_name.startswith("connection.") and event_name.endswith(".complete"):
+                marks["connect"] += now - marks.pop("connect_started", now)
+                if event_name.startswith("connection.connect_"):
+                    metrics.new_connections += 1
+            elif event_name.endswith("send_request_headers.started") and "headers" not in marks:
+                marks["headers"] = now
+                metrics.pool_wait.observe(max(now - started - marks["connect"], 0.0) * 1000.0)
+
+        metrics.in_flight[endpoint] += 1
+        try:
+            resp = await self.client.post(
+                endpoint,
+                params=params,
+                content=self._body(body),
+                headers=self._static_headers,
+                extensions={"trace": trace},
+            )
+        except httpx.HTTPError:
+            metrics.errors[endpoint] += 1
+            raise
+        finally:
+            metrics.in_flight[endpoint] -= 1
+            metrics.latency[endpoint].observe((time.perf_counter() - started) * 1000.0)
+        if resp.status_code != 200:
+            metrics.errors[endpoint] += 1
+        return self._handle_response(resp)
+
     # -------------------------
     # Public API wrappers
     # -------------------------
@@ -29,36 +146,22 @@ class DensoDIDClient:
         """
         Wraps POST /api/verify-credential
         """
-        resp = await self.client.post(
-            "/api/verify-credential",
-            json=credential,
-            headers=self._headers(),
-        )
-        return self._handle_response(resp)
+        return await self._post("/api/verify-credential", credential)
 
     async def verify_presentation(self, presentation: Dict[str, Any]) -> Dict[str, Any]:
         """
         Wraps POST /api/verify-presentation
         """
-        resp = await self.client.post(
-            "/api/verify-presentation",
-            json=presentation,
-            headers=self._headers(),
-        )
-        return self._handle_response(resp)
+        return await self._post("/api/verify-presentation", presentation)
 
     async def issue_credential(self, credential_subject: Dict[str, Any], credential_type: str) -> Dict[str, Any]:
         """
         Wraps POST /api/issue-credential
         """
         payload = {"credentialSubject": credential_subject}
-        resp = await self.client.post(
-            "/api/issue-credential",
-            params={"credential_type": credential_type},
-            json=payload,
-            headers=self._headers(),
+        return await self._post(
+            "/api/issue-credential", payload, params={"credential_type": credential_type}
         )
-        return self._handle_response(resp)
 
     async def update_credential(self, vc_uuid: str, credential_subject: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -66,25 +169,14 @@ class DensoDIDClient:
         Revokes the previous VC identified by vc_uuid and issues a new one with the supplied subject.
         """
         payload = {"credentialSubject": credential_subject}
-        resp = await self.client.post(
-            "/api/update-credential",
-            params={"vc_uuid": vc_uuid},
-            json=payload,
-            headers=self._headers(),
-        )
-        return self._handle_response(resp)
+        return await self._post("/api/update-credential", payload, params={"vc_uuid": vc_uuid})
 
     async def request_presentation(self, credentials: Any) -> Dict[str, Any]:
         """
         Wraps POST /api/request-presentation.
         Builds a verifiable presentation from an array of credentials payloads.
         """
-        resp = await self.client.post(
-            "/api/request-presentation",
-            json=credentials,
-            headers=self._headers(),
-        )
-        return self._handle_response(resp)
+        return await self._post("/api/request-presentation", credentials)
 
     # -------------------------
     # Internal helpers
@@ -93,16 +185,21 @@ class DensoDIDClient:
     def _handle_response(self, resp: httpx.Response) -> Dict[str, Any]:
         """
         Unified error handling for all Denso DID Gateway responses.
+        Only JSON error bodies are decoded; anything else is passed through as text.
         """
-        try:
-            data = resp.json()
-        except Exception:
-            data = {"message": resp.text}
-
-        if resp.status_code != 200:
-            raise DensoDIDError(resp.status_code, data)
+        if resp.status_code == 200:
+            try:
+                return resp.json()
+            except ValueError:
+                return {"message": resp.text}
 
-        return data
+        data: Any = {"message": resp.text}
+        if resp.headers.get("content-type", "").startswith("application/json"):
+            try:
+                data = resp.json()
+            except ValueError:
+                pass
+        raise DensoDIDError(resp.status_code, data)
 
 
 class DensoDIDError(Exception):
@@ -113,4 +210,14 @@ class DensoDIDError(Exception):
     def __init__(self, status_code: int, detail: Any):
         super().__init__(f"Denso DID Gateway error {status_code}: {detail}")
         self.status_code = status_code
-        self.detail = detail
\ No newline at end of file
+        self.detail = detail
+
+
+def is_transient_error(exc: BaseException) -> bool:
+    """
+    Gateway failures that say nothing about the request itself (overload,
+    outages, network trouble); safe to retry and to count against a breaker.
+    """
+    if isinstance(exc, DensoDIDError):
+        return exc.status_code >= 500 or exc.status_code == 429
+    return isinstance(exc, (httpx.TransportError, asyncio.TimeoutError))
@@ -1,37 +1,32 @@
+import glob
 import json
 from dotenv import load_dotenv
 import os
-import hashlib
 from datetime import datetime, timezone
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Tuple
 
-from solana.rpc.api import Client
+from solana.rpc.async_api import AsyncClient
 from solana.rpc.core import RPCException
 
+from solders.hash import Hash
 from solders.keypair import Keypair
 from solders.pubkey import Pubkey
 from solders.instruction import Instruction
+from solders.signature import Signature
 from solders.transaction import Transaction
+from solders.transaction_status import TransactionConfirmationStatus
 
-from data.solana_anchor_models import AnchorRecord
+from services.plan_hashing import plan_digest_cache
 
 load_dotenv()
-# -------------------------
-# In-memory store
-# -------------------------
-ANCHOR_STORE: Dict[str, AnchorRecord] = {}
-
-
 # -------------------------
 # Hashing helper
 # -------------------------
 def compute_plan_hash(plan: Dict[str, Any]) -> str:
     """
-    Deterministic hash of a plan JSON.
-    sort_keys=True ensures same hash for same content.
+    Deterministic hash of a plan JSON (canonical form: see services.plan_hashing).
     """
-    plan_str = json.dumps(plan, sort_keys=True, separators=(",", ":"))
-    return hashlib.sha256(plan_str.encode("utf-8")).hexdigest()
+    return plan_digest_cache.plan_hash(plan)
 
 
 # -------------------------
@@ -50,6 +45,31 @@ def _load_fee_payer_from_file(path: str) -> Keypair:
     return Keypair.from_bytes(secret_key_bytes)
 
 
+def _load_fee_payers(primary: Keypair) -> List[Keypair]:
+    """
+    The primary fee payer plus every keypair file in SOLANA_FEE_PAYER_DIR.
+    """
+    payers = [primary]
+    payer_dir = os.getenv("SOLANA_FEE_PAYER_DIR")
+    if payer_dir:
+        seen = {primary.pubkey()}
+        for path in sorted(glob.glob(os.path.join(payer_dir, "*.json"))):
+            keypair = _load_fee_payer_from_file(path)
+            if keypair.pubkey() not in seen:
+                seen.add(keypair.pubkey())
+                payers.append(keypair)
+    return payers
+
+
+# Memo program public key
+MEMO_PROGRAM_ID = Pubkey.from_string("MemoSq4gqABAXKb96qnH8TysNcWxMyWCqXgDLGmfcHr")
+
+FEE_PAYER: Optional[Keypair] = None
+FEE_PAYERS: List[Keypair] = []
+# Used by the anchoring queue workers, so RPC round-trips never block the event loop
+ASYNC_SOLANA_CLIENT: Optional[AsyncClient] = None
+
+
 def _init_solana_client_and_keypair():
     rpc_url = os.getenv("SOLANA_RPC_URL", "https://api.devnet.solana.com")
     keypair_path = os.getenv("SOLANA_KEYPAIR_PATH")
@@ -60,84 +80,136 @@ def _init_solana_client_and_keypair():
             "Set it to the path of a solana-keygen JSON keypair file."
         )
 
-    client = Client(rpc_url)
+    client = AsyncClient(rpc_url)
     fee_payer = _load_fee_payer_from_file(keypair_path)
 
     return client, fee_payer
 
 
-# Initialize once at import time
-try:
-    SOLANA_CLIENT, FEE_PAYER = _init_solana_client_and_keypair()
+def init() -> None:
+    """
+    Loads the fee payers and creates the RPC client. Called by the anchoring
+    service on first use rather than at import, so importing this module
+    never needs a keypair or a reachable node.
+    """
+    global ASYNC_SOLANA_CLIENT, FEE_PAYER, FEE_PAYERS
+    if ASYNC_SOLANA_CLIENT is not None:
+        return
+    try:
+        client, fee_payer = _init_solana_client_and_keypair()
+        FEE_PAYERS = _load_fee_payers(fee_payer)
+    except Exception as e:
+        raise RuntimeError(f"Failed to initialize Solana client or keypair: {e}") from e
+    FEE_PAYER = fee_payer
+    ASYNC_SOLANA_CLIENT = client
     print("✅ Solana fee payer pubkey:", FEE_PAYER.pubkey())
-    # Memo program public key
-    MEMO_PROGRAM_ID = Pubkey.from_string("MemoSq4gqABAXKb96qnH8TysNcWxMyWCqXgDLGmfcHr")
-except Exception as e:
-    raise RuntimeError(f"Failed to initialize Solana client or keypair: {e}") from e
 
 
 # -------------------------
-# Real Solana anchoring
+# Async anchoring (queue workers)
 # -------------------------
 
-def anchor_plan_on_solana(session_id: str, plan_record: Dict[str, Any]) -> AnchorRecord:
-    plan_hash = compute_plan_hash(plan_record)
+# solders enums are not hashable, hence pairs rather than a dict
+_CONFIRMATION_STATUS = (
+    (TransactionConfirmationStatus.Processed, "processed"),
+    (TransactionConfirmationStatus.Confirmed, "confirmed"),
+    (TransactionConfirmationStatus.Finalized, "finalized"),
+)
 
-    # Optionally keep the balance check if you added it:
-    # _check_fee_payer_balance()
 
-    # 1. Build memo instruction with plan_hash as UTF-8 bytes
-    memo_data = plan_hash.encode("utf-8")
-    instruction = Instruction(
-        program_id=MEMO_PROGRAM_ID,
-        accounts=[],
-        data=memo_data,
-    )
+def _confirmation_status(status: Optional[TransactionConfirmationStatus]) -> str:
+    for value, name in _CONFIRMATION_STATUS:
+        if status == value:
+            return name
+    return "processed"
 
-    # 2. Get a recent blockhash
+
+class BlockhashExpired(RuntimeError):
+    """The node rejected the transaction because its blockhash is unknown / too old."""
+
+
+async def fetch_latest_blockhash() -> Tuple[Hash, int]:
+    """
+    (blockhash, last valid block height) from getLatestBlockhash.
+    """
     try:
-        latest_blockhash_resp: GetLatestBlockhashResp = SOLANA_CLIENT.get_latest_blockhash()
+        resp = await ASYNC_SOLANA_CLIENT.get_latest_blockhash()
     except Exception as ex:
         raise RuntimeError(f"Failed to fetch latest blockhash from Solana: {ex}") from ex
+    return resp.value.blockhash, resp.value.last_valid_block_height
 
-    latest_blockhash = latest_blockhash_resp.value.blockhash
 
-    # 3. Build and sign transaction
+async def send_memo_async(memo_data: bytes, blockhash: Hash, payer: Optional[Keypair] = None) -> str:
+    """
+    Signs and sends one memo transaction on the given blockhash without
+    waiting for confirmation; returns the tx signature.
+    """
+    payer = payer or FEE_PAYER
+    instruction = Instruction(program_id=MEMO_PROGRAM_ID, accounts=[], data=memo_data)
     tx = Transaction.new_signed_with_payer(
         [instruction],
-        FEE_PAYER.pubkey(),
-        [FEE_PAYER],
-        latest_blockhash,
+        payer.pubkey(),
+        [payer],
+        blockhash,
     )
-
-    # 4. Send transaction
     try:
-        send_resp: SendTransactionResp = SOLANA_CLIENT.send_transaction(tx)
+        send_resp = await ASYNC_SOLANA_CLIENT.send_transaction(tx)
     except RPCException as rpc_err:
+        if "blockhash not found" in str(rpc_err).lower() or "BlockhashNotFound" in str(rpc_err):
+            raise BlockhashExpired(f"Blockhash {blockhash} rejected: {rpc_err}") from rpc_err
         raise RuntimeError(f"Solana RPCException while sending transaction: {rpc_err}") from rpc_err
     except Exception as ex:
         raise RuntimeError(f"Unexpected error while sending Solana transaction: {ex}") from ex
+    return str(send_resp.value)
 
-    # 5. Extract tx signature (Signature -> str)
-    tx_sig_obj = send_resp.value  # this is a Signature object
-    tx_sig = str(tx_sig_obj)      # convert to base58 string
-
-    record = AnchorRecord(
-        session_id=session_id,
-        plan_hash=plan_hash,
-        solana_tx=tx_sig,
-        anchored_at=datetime.now(timezone.utc),
-    )
-    ANCHOR_STORE[session_id] = record
-    return record
 
+async def get_signature_statuses(signatures: List[str]) -> List[Optional[Dict[str, Any]]]:
+    """
+    Status per signature: None when the node has not seen it, otherwise
+    {"confirmation_status": "processed" | "confirmed" | "finalized", "err": str | None}.
+    """
+    results: List[Optional[Dict[str, Any]]] = []
+    # getSignatureStatuses accepts at most 256 signatures per call
+    for start in range(0, len(signatures), 256):
+        chunk = [Signature.from_string(sig) for sig in signatures[start:start + 256]]
+        try:
+            resp = await ASYNC_SOLANA_CLIENT.get_signature_statuses(chunk)
+        except Exception as ex:
+            raise RuntimeError(f"Failed to fetch signature statuses from Solana: {ex}") from ex
+        for status in resp.value:
+            if status is None:
+                results.append(None)
+                continue
+            results.append(
+                {
+                    "confirmation_status": _confirmation_status(status.confirmation_status),
+                    "err": str(status.err) if status.err is not None else None,
+                }
+            )
+    return results
 
 
-def get_anchor(session_id: str) -> Optional[AnchorRecord]:
+async def get_balances(pubkeys: List[Pubkey]) -> List[int]:
     """
-    Retrieve an existing anchor record by session_id.
+    Lamports per account (0 for accounts that do not exist yet).
     """
-    return ANCHOR_STORE.get(session_id)
+    balances: List[int] = []
+    # getMultipleAccounts accepts at most 100 accounts per call
+    for start in range(0, len(pubkeys), 100):
+        try:
+            resp = await ASYNC_SOLANA_CLIENT.get_multiple_accounts(pubkeys[start:start + 100])
+        except Exception as ex:
+            raise RuntimeError(f"Failed to fetch fee payer balances from Solana: {ex}") from ex
+        balances.extend(account.lamports if account is not None else 0 for account in resp.value)
+    return balances
+
+
+async def get_block_height() -> int:
+    try:
+        resp = await ASYNC_SOLANA_CLIENT.get_block_height()
+    except Exception as ex:
+        raise RuntimeError(f"Failed to fetch block height from Solana: {ex}") from ex
+    return resp.value
 
 
 def make_hardcoded_plan(session_id: str = "session-123") -> Dict[str, Any]:
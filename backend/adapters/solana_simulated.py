@@ -0,0 +1,201 @@
+"""
+Simulated Solana anchoring: same interface as `adapters.solana`, but signed
+transactions are handed to an in-process `SimulatedChain` instead of an RPC
+node. Transactions, signatures and fee payers are real, so signing cost and
+the queue / blockhash / fee-payer machinery behave as in production; only the
+network and the cluster are modelled.
+
+`SimulatedChain` is also the ledger behind `standins.solana_rpc`.
+"""
+
+import hashlib
+import os
+import random
+import time
+from threading import Lock
+from typing import Any, Dict, List, Optional, Tuple
+
+from solders.hash import Hash
+from solders.instruction import Instruction
+from solders.keypair import Keypair
+from solders.pubkey import Pubkey
+from solders.transaction import Transaction
+
+from adapters.solana import (
+    MEMO_PROGRAM_ID,
+    BlockhashExpired,
+    _load_fee_payer_from_file,
+    _load_fee_payers,
+    make_hardcoded_plan,
+)
+
+BLOCKHASH_VALIDITY_BLOCKS = 150
+SIGNATURE_FEE_LAMPORTS = 5_000
+# Starting balance of every account the simulated chain has not seen yet
+DEFAULT_BALANCE_LAMPORTS = 10 * 1_000_000_000
+
+
+class SimulatedChain:
+    """
+    Block height advances with wall time; a blockhash is accepted until
+    BLOCKHASH_VALIDITY_BLOCKS after the block that produced it. Accepted
+    transactions are processed immediately, confirmed after `confirm_after_s`
+    and finalized after `finalize_after_s`; a `drop_rate` fraction is
+    acknowledged but never lands, like a transaction lost by the leader.
+    """
+
+    def __init__(
+        self,
+        slot_time_s: float = 0.4,
+        confirm_after_s: float = 1.0,
+        finalize_after_s: float = 13.0,
+        drop_rate: float = 0.0,
+        seed: Optional[int] = None,
+    ) -> None:
+        self.slot_time_s = slot_time_s
+        self.confirm_after_s = confirm_after_s
+        self.finalize_after_s = finalize_after_s
+        self.drop_rate = drop_rate
+        self._rng = random.Random(seed)
+        self._genesis = time.monotonic()
+        self._lock = Lock()
+        self._blockhashes: Dict[Hash, int] = {}  # blockhash -> last valid block height
+        self._landed: Dict[str, Tuple[float, int]] = {}  # signature -> (landed at, block height)
+        self._balances: Dict[Pubkey, int] = {}
+        self.accepted = 0
+        self.dropped = 0
+        self.rejected_blockhash = 0
+        self.rejected_signature = 0
+
+    def block_height(self) -> int:
+        return int((time.monotonic() - self._genesis) / self.slot_time_s)
+
+    def latest_blockhash(self) -> Tuple[Hash, int]:
+        height = self.block_height()
+        blockhash = Hash(hashlib.sha256(b"simulated-block:" + height.to_bytes(8, "little")).digest())
+        last_valid_block_height = height + BLOCKHASH_VALIDITY_BLOCKS
+        with self._lock:
+            if blockhash not in self._blockhashes:
+                self._blockhashes = {
+                    known: last_valid
+                    for known, last_valid in self._blockhashes.items()
+                    if last_valid >= height
+                }
+                self._blockhashes[blockhash] = last_valid_block_height
+        return blockhash, last_valid_block_height
+
+    def submit(self, tx: Transaction) -> str:
+        """
+        Accepts a signed transaction; returns its signature like sendTransaction.
+        """
+        height = self.block_height()
+        with self._lock:
+            last_valid = self._blockhashes.get(tx.message.recent_blockhash)
+            if last_valid is None or height > last_valid:
+                self.rejected_blockhash += 1
+                raise BlockhashExpired(f"Blockhash not found: {tx.message.recent_blockhash}")
+        try:
+            tx.verify()
+        except Exception as exc:  # pylint: disable=broad-except
+            with self._lock:
+                self.rejected_signature += 1
+            raise RuntimeError(f"Transaction signature verification failure: {exc}") from exc
+        signature = str(tx.signatures[0])
+        payer = tx.message.account_keys[0]
+        with self._lock:
+            if signature not in self._landed:
+                self.accepted += 1
+                if self._rng.random() < self.drop_rate:
+                    self.dropped += 1
+                else:
+                    self._landed[signature] = (time.monotonic(), height)
+                    self._balances[payer] = self.balance(payer) - SIGNATURE_FEE_LAMPORTS
+        return signature
+
+    def status(self, signature: str) -> Optional[Dict[str, Any]]:
+        landed = self._landed.get(signature)
+        if landed is None:
+            return None
+        landed_at, slot = landed
+        age = time.monotonic() - landed_at
+        if age >= self.finalize_after_s:
+            confirmation_status = "finalized"
+        elif age >= self.confirm_after_s:
+            confirmation_status = "confirmed"
+        else:
+            confirmation_status = "processed"
+        return {
+            "slot": slot,
+            "confirmations": None if confirmation_status == "finalized" else max(self.block_height() - slot, 0),
+            "confirmation_status": confirmation_status,
+            "err": None,
+        }
+
+    def balance(self, pubkey: Pubkey) -> int:
+        return self._balances.get(pubkey, DEFAULT_BALANCE_LAMPORTS)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "block_height": self.block_height(),
+            "accepted": self.accepted,
+            "dropped": self.dropped,
+            "landed": len(self._landed),
+            "rejected_blockhash": self.rejected_blockhash,
+            "rejected_signature": self.rejected_signature,
+        }
+
+
+CHAIN: Optional[SimulatedChain] = None
+FEE_PAYER: Optional[Keypair] = None
+FEE_PAYERS: List[Keypair] = []
+
+
+def init(confirm_after_s: float = 1.0, finalize_after_s: float = 13.0, drop_rate: float = 0.0) -> None:
+    """
+    Uses SOLANA_KEYPAIR_PATH / SOLANA_FEE_PAYER_DIR when set, otherwise a
+    throwaway keypair: nothing is ever broadcast, so no funded key is needed.
+    """
+    global CHAIN, FEE_PAYER, FEE_PAYERS
+    if CHAIN is not None:
+        return
+    keypair_path = os.getenv("SOLANA_KEYPAIR_PATH")
+    FEE_PAYER = _load_fee_payer_from_file(keypair_path) if keypair_path else Keypair()
+    FEE_PAYERS = _load_fee_payers(FEE_PAYER)
+    CHAIN = SimulatedChain(
+        confirm_after_s=confirm_after_s,
+        finalize_after_s=finalize_after_s,
+        drop_rate=drop_rate,
+    )
+    print("🧪 Simulated Solana anchoring, fee payer pubkey:", FEE_PAYER.pubkey())
+
+
+def _signed_memo(memo_data: bytes, blockhash: Hash, payer: Keypair) -> Transaction:
+    instruction = Instruction(program_id=MEMO_PROGRAM_ID, accounts=[], data=memo_data)
+    return Transaction.new_signed_with_payer([instruction], payer.pubkey(), [payer], blockhash)
+
+
+async def fetch_latest_blockhash() -> Tuple[Hash, int]:
+    return CHAIN.latest_blockhash()
+
+
+async def send_memo_async(memo_data: bytes, blockhash: Hash, payer: Optional[Keypair] = None) -> str:
+    return CHAIN.submit(_signed_memo(memo_data, blockhash, payer or FEE_PAYER))
+
+
+async def get_signature_statuses(signatures: List[str]) -> List[Optional[Dict[str, Any]]]:
+    results: List[Optional[Dict[str, Any]]] = []
+    for signature in signatures:
+        status = CHAIN.status(signature)
+        results.append(
+            {"confirmation_status": status["confirmation_status"], "err": status["err"]} if status else None
+        )
+    return results
+
+
+async def get_balances(pubkeys: List[Pubkey]) -> List[int]:
+    return [CHAIN.balance(pubkey) for pubkey in pubkeys]
+
+
+async def get_block_height() -> int:
+    return CHAIN.block_height()
+
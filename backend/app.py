@@ -5,22 +5,46 @@ from fastapi.middleware.cors import CORSMiddleware
 
 from adapters.denso_did import DensoDIDClient
 from config import settings
+from data.sample_credentials import CHARGING_SESSION_VC
+from routers.batteries import router as batteries_router
 from routers.charging_sessions import router as charging_sessions_router
 from routers.negotiator import router as negotiator_router
 from routers.session_auth import router as session_auth_router
 from routers.stations import router as stations_router
+from routers.telemetry import router as telemetry_router
 from routers.trust_anchor import router as trust_anchor_router
 from routers.users import router as users_router
 from routers.vehicles import router as vehicles_router
+from services.anchor_batcher import anchor_batcher
+from services.anchor_queue import anchor_queue
+from services.anchor_store import anchor_store
+from services.charging_curves import charging_curves
+from services.did_denso_verification import tri_party_presentation
+from services.did_local_verifier import did_document_cache
+from services.revocation_mirror import revocation_mirror
+from services.solana_anchor import solana_anchor_service
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     global denso
     denso = DensoDIDClient(base_url=settings.denso_base_url)
+    denso.preserialize(CHARGING_SESSION_VC, tri_party_presentation())
     app.state.denso_client = denso
+    did_document_cache.start_refresh(settings.did_document_refresh_interval_s)
+    revocation_mirror.start_refresh(settings.did_revocation_refresh_interval_s)
+    solana_anchor_service.start_background_refresh()
+    anchor_queue.start()
+    charging_curves.start_refresh(settings.charging_curve_refresh_s)
     try:
         yield
     finally:
+        await charging_curves.stop_refresh()
+        anchor_batcher.flush()
+        await anchor_queue.stop()
+        await solana_anchor_service.stop_background_refresh()
+        anchor_store.close()
+        await revocation_mirror.stop_refresh()
+        await did_document_cache.stop_refresh()
         if denso:
             await denso.close()
 
@@ -38,4 +62,6 @@ app.include_router(trust_anchor_router)
 app.include_router(negotiator_router)
 app.include_router(users_router)
 app.include_router(vehicles_router)
-app.include_router(charging_sessions_router)
\ No newline at end of file
+app.include_router(charging_sessions_router)
+app.include_router(batteries_router)
+app.include_router(telemetry_router)
\ No newline at end of file
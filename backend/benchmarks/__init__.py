@@ -0,0 +1,3 @@
+"""
+Benchmark harnesses that drive the backend against the local stand-ins.
+"""
@@ -0,0 +1,260 @@
+"""
+End-to-end anchoring benchmark: POST /api/trust-anchor/{session_id} for many
+plans, then wait until every anchor is finalized (or failed).
+
+The backend app is driven in-process (ASGI transport, lifespan included), so
+the anchoring queue, blockhash cache, fee-payer pool and anchor store all run
+as in production. The chain is either simulated in-process (transactions are
+built and signed, never broadcast) or the local RPC stand-in, which adds HTTP
+round-trips, latency and injected failures:
+
+    python -m benchmarks.anchoring --requests 2000 --concurrency 50
+    python -m benchmarks.anchoring --chain standin --latency lognormal:25,0.6 --error-rate 0.01
+    python -m benchmarks.anchoring --anchor-mode batch --drop-rate 0.05
+
+Prints a JSON report with enqueue throughput and p50/p95/p99, time until all
+anchors are final, confirmation latency percentiles and the queue counters.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from contextlib import asynccontextmanager, contextmanager
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, List, Optional
+
+import httpx
+from solders.keypair import Keypair
+
+from benchmarks.authenticate import BACKEND_DIR, _free_port, _percentile
+
+
+@contextmanager
+def run_rpc_standin(args: argparse.Namespace) -> Iterator[str]:
+    """
+    Starts `standins.solana_rpc` under uvicorn and yields its URL once it answers.
+    """
+    port = _free_port()
+    env = {
+        **os.environ,
+        "STANDIN_LATENCY": args.latency,
+        "STANDIN_ERROR_RATE": str(args.error_rate),
+        "STANDIN_ERROR_STATUS": str(args.error_status),
+        "STANDIN_TIMEOUT_RATE": str(args.timeout_rate),
+        "STANDIN_CONFIRM_S": str(args.confirm_s),
+        "STANDIN_FINALIZE_S": str(args.finalize_s),
+        "STANDIN_DROP_RATE": str(args.drop_rate),
+        "STANDIN_SEED": str(args.seed),
+    }
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "standins.solana_rpc:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        env=env,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + 15.0
+        while True:
+            try:
+                httpx.get(f"{base_url}/stats", timeout=0.5).raise_for_status()
+                break
+            except httpx.HTTPError:
+                if proc.poll() is not None or time.monotonic() > deadline:
+                    raise RuntimeError("Solana RPC stand-in did not start")
+                time.sleep(0.1)
+        yield base_url
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+
+
+@asynccontextmanager
+async def _backend_client() -> AsyncIterator[httpx.AsyncClient]:
+    # Imported late: settings are read from the environment prepared by main()
+    from app import app
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=30.0) as client:
+            yield client
+
+
+def _plan(session_id: str) -> Dict[str, Any]:
+    return {
+        "session_id": session_id,
+        "driver_did": "did:itn:bench-driver",
+        "charger_did": "did:itn:charger-001",
+        "plan": {"phases": [{"phase": 1, "power_kw": 11.0}], "expected_soc_at_departure": 0.8},
+    }
+
+
+async def _final_states(client: httpx.AsyncClient) -> Dict[str, Dict[str, Any]]:
+    anchors: Dict[str, Dict[str, Any]] = {}
+    cursor: Optional[str] = None
+    while True:
+        params: Dict[str, Any] = {"limit": 1000}
+        if cursor:
+            params["cursor"] = cursor
+        page = (await client.get("/api/trust-anchor/", params=params)).json()
+        for item in page["items"]:
+            anchors[item["session_id"]] = item
+        cursor = page.get("next_cursor")
+        if not cursor:
+            return anchors
+
+
+async def run_benchmark(
+    client: httpx.AsyncClient,
+    total: int,
+    concurrency: int,
+    drain_timeout_s: float,
+) -> Dict[str, Any]:
+    run_id = f"bench-{int(time.time())}"
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+    submitted_at: Dict[str, float] = {}
+    remaining = iter(range(total))
+
+    async def worker() -> None:
+        for index in remaining:
+            session_id = f"{run_id}-{index}"
+            started = time.perf_counter()
+            submitted_at[session_id] = time.time()
+            try:
+                resp = await client.post(
+                    f"/api/trust-anchor/{session_id}", json={"plan_record": _plan(session_id)}
+                )
+                statuses[str(resp.status_code)] += 1
+            except httpx.HTTPError as exc:
+                statuses[type(exc).__name__] += 1
+            latencies.append((time.perf_counter() - started) * 1000.0)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    enqueue_elapsed = time.perf_counter() - started
+
+    # Wait until every accepted anchor reached a terminal state
+    accepted = statuses.get("200", 0)
+    deadline = time.monotonic() + drain_timeout_s
+    while True:
+        anchors = {
+            session_id: anchor
+            for session_id, anchor in (await _final_states(client)).items()
+            if session_id in submitted_at
+        }
+        final = Counter(anchor["status"] for anchor in anchors.values())
+        if final["finalized"] + final["failed"] >= accepted or time.monotonic() > deadline:
+            break
+        await asyncio.sleep(0.5)
+    drain_elapsed = time.perf_counter() - started
+
+    confirm_latencies = sorted(
+        (datetime.fromisoformat(anchor["anchored_at"]).timestamp() - submitted_at[session_id]) * 1000.0
+        for session_id, anchor in anchors.items()
+        if anchor["status"] == "finalized" and anchor.get("anchored_at")
+    )
+    latencies.sort()
+    return {
+        "requests": total,
+        "concurrency": concurrency,
+        "enqueue_elapsed_s": round(enqueue_elapsed, 3),
+        "enqueue_throughput_rps": round(total / enqueue_elapsed, 2) if enqueue_elapsed else 0.0,
+        "enqueue_latency_ms": {
+            "p50": _percentile(latencies, 50),
+            "p95": _percentile(latencies, 95),
+            "p99": _percentile(latencies, 99),
+            "max": round(latencies[-1], 3) if latencies else 0.0,
+        },
+        "status_counts": dict(statuses),
+        "drain_elapsed_s": round(drain_elapsed, 3),
+        "finalized_throughput_per_s": round(final["finalized"] / drain_elapsed, 2) if drain_elapsed else 0.0,
+        "final_states": dict(final),
+        "confirm_latency_ms": {
+            "p50": _percentile(confirm_latencies, 50),
+            "p95": _percentile(confirm_latencies, 95),
+            "p99": _percentile(confirm_latencies, 99),
+        },
+    }
+
+
+async def _main(args: argparse.Namespace) -> Dict[str, Any]:
+    async with _backend_client() as client:
+        report = await run_benchmark(client, args.requests, args.concurrency, args.drain_timeout)
+        report["chain"] = args.chain
+        report["anchor_mode"] = args.anchor_mode
+        report["queue"] = (await client.get("/api/trust-anchor/queue/stats")).json()
+    return report
+
+
+def main(argv: Optional[Iterable[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.anchoring", description="Anchoring throughput benchmark")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--chain", choices=["simulate", "standin"], default="simulate")
+    parser.add_argument("--rpc-url", help="Use a running RPC stand-in instead of spawning one (implies --chain standin)")
+    parser.add_argument("--anchor-mode", choices=["single", "batch"], default="single")
+    parser.add_argument("--workers", type=int, default=4, help="Anchoring queue workers")
+    parser.add_argument("--fee-payers", type=int, default=1, help="Throwaway fee payer keypairs to pool")
+    parser.add_argument("--poll-s", type=float, default=0.25, help="Signature status polling interval")
+    parser.add_argument("--confirm-s", type=float, default=0.5)
+    parser.add_argument("--finalize-s", type=float, default=2.0)
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="Fraction of sent transactions that never land")
+    parser.add_argument("--drain-timeout", type=float, default=120.0, help="Max wait for all anchors to be final")
+    parser.add_argument("--latency", default="fixed:20", help="Stand-in latency spec, see standins.faults")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--timeout-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(list(argv) if argv is not None else None)
+    if args.rpc_url:
+        args.chain = "standin"
+
+    with tempfile.TemporaryDirectory(prefix="anchoring-bench-") as workdir:
+        # Throwaway keys and anchor store: nothing is funded, nothing persists
+        payer_dir = os.path.join(workdir, "payers")
+        os.makedirs(payer_dir)
+        for index in range(args.fee_payers):
+            with open(os.path.join(payer_dir, f"payer-{index}.json"), "w", encoding="utf-8") as f:
+                json.dump(list(bytes(Keypair())), f)
+        os.environ.update(
+            {
+                "SOLANA_ENABLED": "true",
+                "SOLANA_KEYPAIR_PATH": os.path.join(payer_dir, "payer-0.json"),
+                "SOLANA_FEE_PAYER_DIR": payer_dir,
+                "SOLANA_ANCHOR_DB_PATH": os.path.join(workdir, "anchors.db"),
+                "SOLANA_ANCHOR_MODE": args.anchor_mode,
+                "SOLANA_ANCHOR_WORKERS": str(args.workers),
+                "SOLANA_ANCHOR_MAX_QUEUE": str(max(args.requests, 1000)),
+                "SOLANA_CONFIRM_POLL_S": str(args.poll_s),
+                "SOLANA_SIMULATE": "true" if args.chain == "simulate" else "false",
+                "SOLANA_SIMULATE_CONFIRM_S": str(args.confirm_s),
+                "SOLANA_SIMULATE_FINALIZE_S": str(args.finalize_s),
+                "SOLANA_SIMULATE_DROP_RATE": str(args.drop_rate),
+            }
+        )
+
+        if args.chain == "simulate":
+            report = asyncio.run(_main(args))
+        elif args.rpc_url:
+            os.environ["SOLANA_RPC_URL"] = args.rpc_url
+            report = asyncio.run(_main(args))
+        else:
+            with run_rpc_standin(args) as rpc_url:
+                os.environ["SOLANA_RPC_URL"] = rpc_url
+                report = asyncio.run(_main(args))
+
+    json.dump(report, sys.stdout, indent=2)
+    sys.stdout.write("\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,201 @@
+"""
+Load test for POST /api/sessions/authenticate against the local DID gateway stand-in.
+
+By default the stand-in is started in a subprocess and the backend app is driven
+in-process (ASGI transport, lifespan included), so the numbers cover routing,
+verification, caching and the real httpx client talking to a local gateway:
+
+    python -m benchmarks.authenticate --requests 2000 --concurrency 50 \\
+        --latency lognormal:25,0.6 --error-rate 0.01
+
+    # Compare against a cold verification cache
+    python -m benchmarks.authenticate --no-cache
+
+    # Reuse a running stand-in, or hit a deployed backend instead of the in-process app
+    python -m benchmarks.authenticate --gateway-url http://127.0.0.1:9000
+    python -m benchmarks.authenticate --target-url http://127.0.0.1:8000
+
+Prints a JSON report with throughput, exact p50/p95/p99 and status counts.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from collections import Counter
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, List, Optional
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_PAYLOAD = {
+    "user_id": "bench-user",
+    "vehicle_vin": "W1KAH5EB2PF093797",
+    "battery_id": "BBC-2024-001",
+    "charger_id": "did:itn:charger:espoo-west",
+    # Reservations would exhaust the connectors after a handful of requests
+    "reserve_connector": False,
+}
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextmanager
+def run_gateway_standin(args: argparse.Namespace) -> Iterator[str]:
+    """
+    Starts `standins.did_gateway` under uvicorn and yields its base URL once it answers.
+    """
+    port = _free_port()
+    env = {
+        **os.environ,
+        "STANDIN_LATENCY": args.latency,
+        "STANDIN_ERROR_RATE": str(args.error_rate),
+        "STANDIN_ERROR_STATUS": str(args.error_status),
+        "STANDIN_TIMEOUT_RATE": str(args.timeout_rate),
+        "STANDIN_SEED": str(args.seed),
+    }
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "standins.did_gateway:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        env=env,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + 15.0
+        while True:
+            try:
+                httpx.get(f"{base_url}/stats", timeout=0.5).raise_for_status()
+                break
+            except httpx.HTTPError:
+                if proc.poll() is not None or time.monotonic() > deadline:
+                    raise RuntimeError("DID gateway stand-in did not start")
+                time.sleep(0.1)
+        yield base_url
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+
+
+@asynccontextmanager
+async def _backend_client(target_url: Optional[str]) -> AsyncIterator[httpx.AsyncClient]:
+    if target_url:
+        async with httpx.AsyncClient(base_url=target_url, timeout=30.0) as client:
+            yield client
+        return
+
+    # Imported late: settings are read from the environment prepared by main()
+    from app import app
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=30.0) as client:
+            yield client
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    rank = min(len(sorted_values) - 1, max(0, int(round(q / 100.0 * len(sorted_values))) - 1))
+    return round(sorted_values[rank], 3)
+
+
+async def run_benchmark(
+    client: httpx.AsyncClient,
+    total: int,
+    concurrency: int,
+    warmup: int,
+    payload: Dict[str, Any],
+) -> Dict[str, Any]:
+    for _ in range(warmup):
+        await client.post("/api/sessions/authenticate", json=payload)
+
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+    remaining = iter(range(total))
+
+    async def worker() -> None:
+        for _ in remaining:
+            started = time.perf_counter()
+            try:
+                resp = await client.post("/api/sessions/authenticate", json=payload)
+                statuses[str(resp.status_code)] += 1
+            except httpx.HTTPError as exc:
+                statuses[type(exc).__name__] += 1
+            latencies.append((time.perf_counter() - started) * 1000.0)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": total,
+        "concurrency": concurrency,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(total / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "p50": _percentile(latencies, 50),
+            "p95": _percentile(latencies, 95),
+            "p99": _percentile(latencies, 99),
+            "max": round(latencies[-1], 3) if latencies else 0.0,
+        },
+        "status_counts": dict(statuses),
+        "errors": total - statuses.get("200", 0),
+    }
+
+
+async def _main(args: argparse.Namespace) -> Dict[str, Any]:
+    async with _backend_client(args.target_url) as client:
+        report = await run_benchmark(client, args.requests, args.concurrency, args.warmup, DEFAULT_PAYLOAD)
+        if args.target_url is None:
+            metrics = await client.get("/api/sessions/verification-metrics")
+            report["verification_metrics"] = metrics.json()
+    return report
+
+
+def main(argv: Optional[Iterable[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.authenticate", description="Authenticate endpoint benchmark")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--gateway-url", help="Use a running gateway (stand-in or real) instead of spawning one")
+    parser.add_argument("--target-url", help="Benchmark a running backend instead of the in-process app")
+    parser.add_argument("--no-cache", action="store_true", help="Disable the verification result cache")
+    parser.add_argument("--latency", default="fixed:20", help="Stand-in latency spec, see standins.faults")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--timeout-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(list(argv) if argv is not None else None)
+
+    if args.no_cache:
+        os.environ["DID_VERIFICATION_CACHE_SIZE"] = "0"
+
+    if args.gateway_url or args.target_url:
+        if args.gateway_url:
+            os.environ["DENSO_BASE_URL"] = args.gateway_url
+        report = asyncio.run(_main(args))
+    else:
+        with run_gateway_standin(args) as gateway_url:
+            os.environ["DENSO_BASE_URL"] = gateway_url
+            report = asyncio.run(_main(args))
+
+    json.dump(report, sys.stdout, indent=2)
+    sys.stdout.write("\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,168 @@
+"""
+Telemetry ingestion benchmark: push NDJSON frames of VSS samples through
+POST /api/telemetry/ingest or the /api/telemetry/ws WebSocket.
+
+By default the backend app is driven in-process (ASGI transport for HTTP,
+Starlette's test client for WebSocket), so the numbers cover routing, NDJSON
+parsing and the ring-buffer/latest-value writes, not the network:
+
+    python -m benchmarks.telemetry --samples 500000 --vehicles 1000 --lines-per-frame 1000
+    python -m benchmarks.telemetry --transport ws --shape series
+    python -m benchmarks.telemetry --target-url http://127.0.0.1:8000 --concurrency 8
+
+Line shapes: `snapshot` (one line per vehicle and tick with every path),
+`single` (one line per sample) and `series` (one line per vehicle and path
+with many samples). Prints a JSON report with samples/s and frame latency
+percentiles.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from benchmarks.authenticate import _backend_client, _percentile
+
+SOC_PATH = "Vehicle.Powertrain.BatteryManagement.Battery.SOC"
+EXTRA_PATHS = (
+    "Vehicle.Speed",
+    "Vehicle.Powertrain.TractionBattery.Temperature.Average",
+    "Vehicle.Powertrain.TractionBattery.CurrentVoltage",
+    "Vehicle.Powertrain.TractionBattery.CurrentCurrent",
+)
+START_MS = 1_759_300_000_000
+TICK_MS = 5_000
+
+
+def _lines(shape: str, vehicles: int, paths: int, samples: int) -> Iterator[str]:
+    vins = [f"BENCH{i:012d}" for i in range(vehicles)]
+    names = (SOC_PATH,) + EXTRA_PATHS[: paths - 1]
+    ticks = max(samples // (vehicles * len(names)), 1)
+    if shape == "series":
+        for vin in vins:
+            for path in names:
+                series = [[START_MS + t * TICK_MS, 20.0 + t * 0.01] for t in range(ticks)]
+                yield json.dumps({"vin": vin, "path": path, "samples": series})
+        return
+    for t in range(ticks):
+        ts = START_MS + t * TICK_MS
+        for vin in vins:
+            if shape == "snapshot":
+                yield json.dumps({"vin": vin, "ts": ts, "values": {path: 20.0 + t * 0.01 for path in names}})
+            else:
+                for path in names:
+                    yield json.dumps({"vin": vin, "path": path, "ts": ts, "value": 20.0 + t * 0.01})
+
+
+def build_frames(args: argparse.Namespace) -> List[str]:
+    lines = list(_lines(args.shape, args.vehicles, args.paths, args.samples))
+    size = args.lines_per_frame
+    return ["\n".join(lines[i : i + size]) for i in range(0, len(lines), size)]
+
+
+def _report(frames: List[str], latencies: List[float], accepted: int, rejected: int, elapsed: float) -> Dict[str, Any]:
+    latencies.sort()
+    return {
+        "frames": len(frames),
+        "payload_mb": round(sum(len(frame) for frame in frames) / 1e6, 2),
+        "accepted": accepted,
+        "rejected": rejected,
+        "elapsed_s": round(elapsed, 3),
+        "samples_per_s": round(accepted / elapsed) if elapsed else 0,
+        "frame_latency_ms": {
+            "p50": _percentile(latencies, 50),
+            "p95": _percentile(latencies, 95),
+            "p99": _percentile(latencies, 99),
+        },
+    }
+
+
+async def run_http(args: argparse.Namespace, frames: List[str]) -> Dict[str, Any]:
+    latencies: List[float] = []
+    totals = {"accepted": 0, "rejected": 0}
+    remaining = iter(frames)
+
+    async with _backend_client(args.target_url) as client:
+
+        async def worker() -> None:
+            for frame in remaining:
+                started = time.perf_counter()
+                resp = await client.post(
+                    "/api/telemetry/ingest", content=frame, headers={"content-type": "application/x-ndjson"}
+                )
+                latencies.append((time.perf_counter() - started) * 1000.0)
+                body = resp.json()
+                totals["accepted"] += body.get("accepted", 0)
+                totals["rejected"] += body.get("rejected", 0)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+        report = _report(frames, latencies, totals["accepted"], totals["rejected"], elapsed)
+        report["server_stats"] = (await client.get("/api/telemetry/stats")).json()
+    return report
+
+
+def run_ws(args: argparse.Namespace, frames: List[str]) -> Dict[str, Any]:
+    latencies: List[float] = []
+    accepted = rejected = 0
+    if args.target_url:
+        from websockets.sync.client import connect
+
+        url = args.target_url.replace("http", "ws", 1).rstrip("/") + "/api/telemetry/ws"
+        session = connect(url, max_size=None)
+        send, receive, close = session.send, lambda: json.loads(session.recv()), session.close
+    else:
+        # Imported late, like the HTTP path: settings are read from the environment
+        from fastapi.testclient import TestClient
+
+        from app import app
+
+        client = TestClient(app)
+        session = client.websocket_connect("/api/telemetry/ws").__enter__()
+        send, receive, close = session.send_text, session.receive_json, lambda: session.__exit__(None, None, None)
+
+    started = time.perf_counter()
+    try:
+        for frame in frames:
+            sent = time.perf_counter()
+            send(frame)
+            ack = receive()
+            latencies.append((time.perf_counter() - sent) * 1000.0)
+            accepted += ack["accepted"]
+            rejected += ack["rejected"]
+    finally:
+        close()
+    return _report(frames, latencies, accepted, rejected, time.perf_counter() - started)
+
+
+def main(argv: Optional[Iterable[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.telemetry", description="Telemetry ingestion benchmark")
+    parser.add_argument("--samples", type=int, default=200_000)
+    parser.add_argument("--vehicles", type=int, default=1000)
+    parser.add_argument("--paths", type=int, default=3, choices=range(1, len(EXTRA_PATHS) + 2))
+    parser.add_argument("--shape", choices=("snapshot", "single", "series"), default="snapshot")
+    parser.add_argument("--lines-per-frame", type=int, default=1000)
+    parser.add_argument("--transport", choices=("http", "ws"), default="http")
+    parser.add_argument("--concurrency", type=int, default=4, help="Concurrent HTTP senders")
+    parser.add_argument("--target-url", help="Benchmark a running backend instead of the in-process app")
+    args = parser.parse_args(list(argv) if argv is not None else None)
+
+    frames = build_frames(args)
+    if args.transport == "http":
+        report = asyncio.run(run_http(args, frames))
+    else:
+        report = run_ws(args, frames)
+    report.update({"shape": args.shape, "transport": args.transport, "vehicles": args.vehicles, "paths": args.paths})
+
+    json.dump(report, sys.stdout, indent=2)
+    sys.stdout.write("\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,23 +1,212 @@
+from pathlib import Path
+from typing import Literal
+
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
+DATA_DIR = Path(__file__).resolve().parent / "data"
+
 
 class Settings(BaseSettings):
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8")
     denso_base_url: str = "https://hackathon1.didgateway.eu/federal"
+    denso_connect_timeout_s: float = Field(default=3.0, description="TCP/TLS connect timeout")
+    denso_read_timeout_s: float = Field(default=10.0, description="Per-read timeout on gateway responses")
+    denso_write_timeout_s: float = Field(default=10.0, description="Per-write timeout for request bodies")
+    denso_pool_timeout_s: float = Field(
+        default=5.0, description="Longest wait for a free pooled connection"
+    )
+    denso_max_connections: int = Field(default=100, description="Connection pool size")
+    denso_max_keepalive_connections: int = Field(
+        default=20, description="Idle connections kept open for reuse"
+    )
+    denso_keepalive_expiry_s: float = Field(default=30.0, description="Idle keep-alive lifetime")
+    denso_http2: bool = Field(default=False, description="Negotiate HTTP/2 with the gateway")
+    denso_verify_deadline_s: float = Field(
+        default=3.0, description="Overall budget for one session's DID verification"
+    )
+    denso_verify_call_timeout_s: float = Field(
+        default=1.5, description="Timeout for a single verify call to the gateway"
+    )
+    denso_verify_attempts: int = Field(
+        default=3, description="Tries per verify call (verifies are idempotent)"
+    )
+    denso_retry_base_delay_s: float = Field(
+        default=0.1, description="Base delay for jittered exponential backoff between retries"
+    )
+    denso_breaker_failure_threshold: int = Field(
+        default=5, description="Consecutive gateway failures before the circuit opens"
+    )
+    denso_breaker_reset_s: float = Field(
+        default=30.0, description="How long the circuit stays open before a probe call"
+    )
+    did_verification_cache_size: int = Field(
+        default=4096, description="Max verification results kept in the LRU cache"
+    )
+    did_revocation_check_interval_s: float = Field(
+        default=300.0, description="Longest a positive verification is trusted before re-checking revocation"
+    )
+    did_negative_cache_ttl_s: float = Field(
+        default=30.0, description="How long a failed verification is remembered"
+    )
+    did_local_verification: Literal["off", "prefer", "only"] = Field(
+        default="off",
+        description="off: gateway only; prefer: local Ed25519 check, gateway on miss/mismatch; only: never call the gateway",
+    )
+    did_document_seed_path: str | None = Field(
+        default=None, description="JSON file with DID documents preloaded into the local cache"
+    )
+    did_resolver_url: str | None = Field(
+        default=None, description="DID resolver base URL used to fill and refresh the DID document cache"
+    )
+    did_document_cache_size: int = Field(default=1024, description="Max DID documents kept in memory")
+    did_document_ttl_s: float = Field(default=3600.0, description="Lifetime of resolved DID documents")
+    did_document_refresh_interval_s: float = Field(
+        default=300.0, description="How often the background task resolves misses and expiring documents"
+    )
+    did_revocation_snapshot_dir: str | None = Field(
+        default=None, description="Directory of SmtRevocationList2023 snapshot/update JSON files"
+    )
+    did_revocation_endpoint: str | None = Field(
+        default=None, description="Endpoint serving status-list snapshots and incremental updates"
+    )
+    did_revocation_refresh_interval_s: float = Field(
+        default=60.0, description="How often the revocation mirror polls its endpoint"
+    )
+    did_revocation_max_staleness_s: float = Field(
+        default=900.0, description="Older status lists are treated as unknown"
+    )
+    did_holder_key_path: str | None = Field(
+        default=None,
+        description="solana-keygen JSON keypair of the presentation holder; enables local presentation building",
+    )
+    did_holder_did: str | None = Field(
+        default=None,
+        description="Holder DID placed in locally built presentations (defaults to the did:key of the holder key)",
+    )
+    did_presentation_cache_size: int = Field(
+        default=256, description="Max assembled presentations kept per (credential ids, challenge)"
+    )
 
     solana_enabled: bool = Field(default=True, description="Feature flag for Solana anchoring")
     solana_rpc_url: str = Field(
         default="https://api.devnet.solana.com", description="Solana RPC endpoint"
     )
+    solana_simulate: bool = Field(
+        default=False,
+        description="Sign anchoring transactions but never broadcast them (in-process simulated chain)",
+    )
+    solana_simulate_confirm_s: float = Field(
+        default=1.0, description="Simulated chain: seconds until a sent transaction is confirmed"
+    )
+    solana_simulate_finalize_s: float = Field(
+        default=13.0, description="Simulated chain: seconds until a sent transaction is finalized"
+    )
+    solana_simulate_drop_rate: float = Field(
+        default=0.0, description="Simulated chain: fraction of sent transactions that never land"
+    )
     solana_keypair_path: str | None = Field(
         default=None,
         description="Path to the solana-keygen JSON keypair used as the fee payer",
     )
+    solana_fee_payer_dir: str | None = Field(
+        default=None, description="Directory of extra solana-keygen JSON keypairs pooled as fee payers"
+    )
+    solana_fee_payer_strategy: Literal["round_robin", "lru"] = Field(
+        default="lru", description="How anchoring sends are spread over the fee payers"
+    )
+    solana_fee_payer_low_balance_sol: float = Field(
+        default=0.05, description="Balance below which a fee payer raises an alarm and is skipped"
+    )
+    solana_balance_refresh_s: float = Field(default=60.0, description="Fee payer balance refresh interval")
+    solana_anchor_db_path: str | None = Field(
+        default=str(DATA_DIR / "anchors.db"),
+        description="SQLite (WAL) anchor store shared by all workers; empty keeps anchors in memory",
+    )
+    solana_anchor_mode: Literal["single", "batch"] = Field(
+        default="single",
+        description="single: one memo per plan; batch: one memo per Merkle root of many plans",
+    )
+    solana_batch_max_size: int = Field(default=256, description="Plans per Merkle batch before it is flushed")
+    solana_batch_max_wait_s: float = Field(
+        default=2.0, description="Max time the first plan of a batch waits before the root is anchored"
+    )
+    solana_anchor_workers: int = Field(default=4, description="Async workers broadcasting anchoring jobs")
+    solana_anchor_max_queue: int = Field(
+        default=1000, description="Queued anchoring jobs before new requests are rejected with 503"
+    )
+    solana_send_attempts: int = Field(default=3, description="Tries per broadcast on RPC send errors")
+    solana_max_broadcasts: int = Field(
+        default=3, description="Broadcasts per job (rebroadcast when its blockhash expires unconfirmed)"
+    )
+    solana_confirm_poll_s: float = Field(default=1.0, description="Signature status polling interval")
+    solana_blockhash_refresh_s: float = Field(
+        default=10.0, description="Background refresh interval of the cached recent blockhash"
+    )
+    solana_blockhash_max_age_s: float = Field(
+        default=30.0, description="Cached blockhashes older than this are refetched before use"
+    )
+    solana_blockhash_safety_blocks: int = Field(
+        default=30, description="Refetch when the estimated height is this close to lastValidBlockHeight"
+    )
     openai_api_key: str | None = Field(
         default=None,
         description="API key for negotiator LLM integrations",
     )
+    negotiator_ranker: Literal["llm", "learned", "deterministic"] = Field(
+        default="llm",
+        description="Which ranker picks the negotiated station/connector",
+    )
+    negotiator_ranker_model_path: str | None = Field(
+        default=None,
+        description="Path to a learned ranker .npz trained with `python -m models.ranker train`",
+    )
+    negotiator_decision_log_path: str | None = Field(
+        default=None,
+        description="NDJSON file where negotiator decisions are appended for offline training",
+    )
+    negotiator_llm_max_concurrency: int = Field(
+        default=8, description="Concurrent LLM-backed negotiations before requests queue"
+    )
+    negotiator_llm_max_queue: int = Field(
+        default=32, description="Requests allowed to wait for an LLM slot before shedding"
+    )
+    negotiator_llm_queue_timeout_s: float = Field(
+        default=2.0, description="Longest wait for an LLM slot before degrading to the local ranker"
+    )
+    negotiator_client_rate_per_s: float = Field(
+        default=1.0, description="Sustained LLM negotiations per client per second"
+    )
+    negotiator_client_burst: float = Field(
+        default=5.0, description="LLM negotiations a client may burst above its sustained rate"
+    )
+    telemetry_ring_size: int = Field(
+        default=2048, description="Newest samples kept per vehicle and VSS path by the ingestion ring buffers"
+    )
+    telemetry_max_paths_per_vehicle: int = Field(
+        default=64, description="Distinct VSS paths accepted per vehicle before further paths are rejected"
+    )
+    telemetry_max_body_bytes: int = Field(
+        default=8 * 1024 * 1024, description="Largest NDJSON ingestion body or WebSocket frame accepted"
+    )
+    charging_curve_path: str | None = Field(
+        default=None, description="Accumulators saved by `python -m services.charging_curves` to start from"
+    )
+    charging_curve_refresh_s: float = Field(
+        default=60.0, description="How often charging curves learn from new SoC samples (0 disables)"
+    )
+    battery_context_cache_size: int = Field(
+        default=4096, description="Resolved battery contexts kept for negotiations (0 disables the cache)"
+    )
+    soh_derate_threshold: float = Field(
+        default=85.0, description="SoH percent below which fast charging power is derated"
+    )
+    soh_forecast_horizon_days: float = Field(
+        default=365.0, description="How far ahead battery summaries forecast SoH and capacity"
+    )
+    soh_forecast_derate_days: float = Field(
+        default=90.0, description="Derate batteries already predicted to cross the SoH threshold within this many days"
+    )
 
 
 settings = Settings()
\ No newline at end of file
@@ -0,0 +1,22 @@
+VEHICLE_BATTERY_BINDINGS = [
+    # Mercedes EQS SUV: pack from the battery birth certificate, original fit
+    {
+        "vin": "W1KAH5EB2PF093797",
+        "packSerialNumber": "urn:uuid:8c99fee2-2bca-4d76-866b-4f465980be70",
+        "batteryId": "did:itn:NiHW21TcdTkW8zk6ruhpfv",
+        "validFrom": "2024-05-02T00:00:00Z",
+    },
+    # Hyundai Ioniq 6: degraded pack swapped under warranty in July 2025
+    {
+        "vin": "TMAH081A1RJ012825",
+        "packSerialNumber": "urn:uuid:08a8b6df-0cb5-47b6-b593-996ce312453d",
+        "batteryId": "did:itn:c2e8da3cf5db40a59c2652",
+        "validFrom": "2024-01-20T00:00:00Z",
+    },
+    {
+        "vin": "TMAH081A1RJ012825",
+        "packSerialNumber": "urn:uuid:c700084e-1ec7-40eb-ad17-6bcda45d9287",
+        "batteryId": "did:itn:6a9b03233ddb4b699e3246",
+        "validFrom": "2025-07-15T09:00:00Z",
+    },
+]
@@ -1,5 +1,3 @@
-from typing import Any, Dict, Optional
-
 BATTERY_SOH_RECORDS = [
     {
         "credentialSubject": {
@@ -323,38 +321,3 @@ BATTERY_SOH_RECORDS = [
     },
 ]
 
-
-def _build_index() -> Dict[str, Dict[str, Any]]:
-    index: Dict[str, Dict[str, Any]] = {}
-    for record in BATTERY_SOH_RECORDS:
-        subject = record.get("credentialSubject", {})
-        battery_id = subject.get("batteryId")
-        if battery_id:
-            index[battery_id] = subject
-    return index
-
-
-BATTERY_SOH_INDEX = _build_index()
-
-
-def get_latest_battery_soh(battery_id: str) -> Optional[Dict[str, Any]]:
-    """
-    Returns the newest BatterySOH credential for the given battery ID, if available.
-    """
-    subject = BATTERY_SOH_INDEX.get(battery_id)
-    return dict(subject) if subject else None
-
-
-def get_soh_capacity_kwh(battery_id: str) -> Optional[float]:
-    """
-    Extracts the maxCapacity (in kWh) from the SOH data when present.
-    """
-    subject = BATTERY_SOH_INDEX.get(battery_id)
-    if not subject:
-        return None
-
-    try:
-        return float(subject.get("maxCapacity"))
-    except (TypeError, ValueError):
-        return None
-
@@ -1,6 +1,6 @@
 from datetime import datetime  
 from pydantic import BaseModel, Field
-from typing import Any, Dict
+from typing import Any, Dict, List, Literal, Optional
 
 class AnchorRequest(BaseModel):
     """
@@ -12,11 +12,34 @@ class AnchorRequest(BaseModel):
         ..., description="Plain JSON of the negotiated charging plan"
     )
  
+AnchorStatus = Literal["pending", "confirmed", "finalized", "failed"]
+
+
+class MerkleProofStep(BaseModel):
+    side: Literal["left", "right"]
+    hash: str
+
+
 class AnchorRecord(BaseModel):
     """
     Representation of what we store as a 'trust anchor'
     """
     session_id: str 
     plan_hash: str 
-    solana_tx: str  
-    anchored_at: datetime
\ No newline at end of file
+    solana_tx: Optional[str] = Field(
+        default=None, description="Latest broadcast signature; may change if the job is rebroadcast"
+    )
+    anchored_at: Optional[datetime] = Field(
+        default=None, description="When the anchoring transaction was first seen confirmed"
+    )
+    status: AnchorStatus = "pending"
+    job_id: Optional[str] = Field(default=None, description="Anchoring job that carries this plan")
+    error: Optional[str] = None
+    merkle_root: Optional[str] = Field(
+        default=None, description="Root anchored on-chain when the plan was batched"
+    )
+    merkle_proof: Optional[List[MerkleProofStep]] = Field(
+        default=None, description="Sibling hashes from the plan's leaf up to merkle_root"
+    )
+    leaf_index: Optional[int] = None
+    batch_size: Optional[int] = None
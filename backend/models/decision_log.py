@@ -0,0 +1,75 @@
+import json
+from threading import Lock
+from typing import Any, Dict, Iterator, List, Optional
+
+# Only the fields the rankers look at are persisted; full pricing breakdowns
+# would blow up the log without adding signal.
+LOGGED_CANDIDATE_FIELDS = (
+    "station_id",
+    "connector_id",
+    "total_cost_eur",
+    "session_duration_h",
+    "distance_km",
+    "can_meet_ready_by",
+    "effective_power_kw",
+)
+
+
+def compact_candidate(candidate: Dict[str, Any]) -> Dict[str, Any]:
+    return {field: candidate.get(field) for field in LOGGED_CANDIDATE_FIELDS}
+
+
+class DecisionLog:
+    """
+    Append-only NDJSON log of negotiator decisions.
+    Each line is one `(battery_summary, candidates, chosen)` tuple plus the
+    strategy, the path that produced the choice and how long it took.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = Lock()
+
+    def record(
+        self,
+        strategy: str,
+        battery_info: Dict[str, Any],
+        candidates: List[Dict[str, Any]],
+        chosen: Dict[str, Any],
+        source: str,
+        latency_ms: float,
+    ) -> None:
+        entry = {
+            "strategy": strategy,
+            "source": source,
+            "latency_ms": round(latency_ms, 3),
+            "battery_summary": battery_info,
+            "candidates": [compact_candidate(c) for c in candidates],
+            "chosen": {
+                "station_id": chosen["station_id"],
+                "connector_id": chosen["connector_id"],
+            },
+        }
+        line = json.dumps(entry, default=str, separators=(",", ":"))
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+
+def iter_decisions(path: str, source: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Streams logged decisions, optionally only those produced by `source` (e.g. "llm").
+    Malformed lines are skipped so a partially written tail does not break training.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if source and entry.get("source") != source:
+                continue
+            yield entry
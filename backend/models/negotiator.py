@@ -1,26 +1,43 @@
+import logging
 import os
+import time
 from datetime import datetime, timedelta, timezone
 from typing import Dict, Any, List, Optional, Literal
 
-from data.battery_birth_certificate import BATTERY_BIRTH_CERTIFICATE
-from data.battery_soh import BATTERY_SOH_RECORDS
-from data.vehicle_sessions import VEHICLE_SOC_HISTORY
 from data.vehicles import VEHICLE_BATTERY_STATUS
+from data.vehicle_specs import get_vehicle_capacity_kwh
 from data.charging_stations import (
     get_station_snapshot,
     find_nearest_station,
     CHARGING_STATIONS,
 )
+from models.decision_log import DecisionLog
+from models.ranker import DeterministicRanker, load_learned_ranker
 from services.pricing import pricing_engine  # <-- NEW: cost estimation
+from services.battery_context import battery_contexts, data_versions
+from services.battery_registry import battery_bindings
+from services.soh_forecast import soh_forecaster
+from services.soc_series import SOC_PATH
+from services.soh_store import SohRecord, soh_store
+from services.telemetry_ingest import vehicle_telemetry
 from config import settings
 
 from openai import OpenAI
 
+logger = logging.getLogger(__name__)
+
 client = OpenAI(
     base_url="https://api.featherless.ai/v1",
     api_key=settings.openai_api_key or os.getenv("OPENAI_API_KEY"),
 )
 
+# Every decision is logged here (when configured) so the learned ranker can be trained offline
+DECISION_LOG = (
+    DecisionLog(settings.negotiator_decision_log_path)
+    if settings.negotiator_decision_log_path
+    else None
+)
+
 
 # ---------------------------------------------------------
 # Battery Data Agent (still deterministic, but now exposes battery_id)
@@ -31,20 +48,20 @@ class BatteryDataAgent:
         self.vin = vin
         self.target_soc = target_soc  # e.g. 0.8 for 80%
 
-        # NEW: simple assumption that this BBC corresponds to the active battery
-        self.battery_id = BATTERY_BIRTH_CERTIFICATE["credentialSubject"]["batteryId"]
+        # Battery currently fitted to this VIN (None for unknown vehicles)
+        binding = battery_bindings.current(vin)
+        self.battery_id = binding.battery_id if binding else None
+        self.pack_serial_number = binding.pack_serial if binding else None
 
-    def _get_latest_soh_record(self) -> Dict[str, Any]:
-        # In a real system you'd match batteryId to VIN.
-        # Here we just pick the last record as a demo.
-        latest_record = BATTERY_SOH_RECORDS[-1]["credentialSubject"]
-        return latest_record
+    def _get_latest_soh_record(self) -> Optional[SohRecord]:
+        return soh_store.latest(self.battery_id) if self.battery_id else None
 
     def _get_current_soc(self) -> float:
-        history = VEHICLE_SOC_HISTORY.get(self.vin, {}).get("values", [])
-        if history:
-            last_value = history[-1]["value"]
-            if 0.0 < last_value < 100.0:
+        # Streamed telemetry (seeded from the stored SoC series)
+        latest = vehicle_telemetry.latest(self.vin, SOC_PATH)
+        if latest is not None:
+            _, last_value = latest
+            if isinstance(last_value, (int, float)) and 0.0 < last_value < 100.0:
                 return last_value / 100.0
 
         status_value = VEHICLE_BATTERY_STATUS.get("currentSoC")
@@ -59,42 +76,94 @@ class BatteryDataAgent:
         - current SoC
         - target SoC
         - energy needed
-        - max safe power (SoH + impedance based)
+        - max safe power (SoH + impedance based, and the SoH forecast)
         """
         soh_rec = self._get_latest_soh_record()
         soc_now = self._get_current_soc()
 
-        soh = float(soh_rec["newSOHVal"])
-        max_capacity = float(soh_rec["maxCapacity"])  # kWh
-        effective_capacity = max_capacity * soh / 100.0
+        forecast = None
+        if soh_rec is None or soh_rec.max_capacity_kwh is None:
+            # No SoH credential for this battery yet: plan on the nominal capacity
+            soh = None
+            impedance = None
+            max_capacity = get_vehicle_capacity_kwh(self.vin)
+            effective_capacity = max_capacity
+            max_safe_power_kw = 150
+            health_notes = ["No SoH record for this battery; using nominal capacity"]
+        else:
+            soh = soh_rec.soh
+            max_capacity = soh_rec.max_capacity_kwh  # kWh
+            effective_capacity = soh_rec.effective_capacity_kwh
+
+            # Look ahead: SoH drifts between credentials, plan on today's forecast
+            forecast = soh_forecaster.forecast().battery(
+                self.battery_id,
+                threshold=settings.soh_derate_threshold,
+                horizon_days=settings.soh_forecast_horizon_days,
+            )
+            if forecast and forecast["effective_capacity_today_kwh"] is not None:
+                effective_capacity = forecast["effective_capacity_today_kwh"]
+            days_to_threshold = forecast["days_until_threshold"] if forecast else None
+
+            # Simple health-based power limit: derate if SoH < 85 or impedance high
+            impedance = soh_rec.impedance
+            if soh < settings.soh_derate_threshold or (impedance or 0.0) > 8.0:
+                max_safe_power_kw = 80  # lower
+                health_notes = ["Battery aging; reduce fast charging power"]
+            elif days_to_threshold is not None and days_to_threshold <= settings.soh_forecast_derate_days:
+                max_safe_power_kw = 80
+                health_notes = [
+                    f"SoH forecast to fall below {settings.soh_derate_threshold:g}% "
+                    f"in {days_to_threshold:.0f} days; reduce fast charging power"
+                ]
+            else:
+                max_safe_power_kw = 150
+                health_notes = ["Battery in good condition"]
 
         # Energy needed to go from current SoC to target SoC, on *effective* capacity
         energy_needed = max(self.target_soc - soc_now, 0.0) * effective_capacity
 
-        # Simple health-based power limit: derate if SoH < 85 or impedance high
-        impedance = float(soh_rec["impedance"])
-        if soh < 85 or impedance > 8.0:
-            max_safe_power_kw = 80  # lower
-            health_notes = ["Battery aging; reduce fast charging power"]
-        else:
-            max_safe_power_kw = 150
-            health_notes = ["Battery in good condition"]
-
         return {
             "vin": self.vin,
             "battery_id": self.battery_id,
+            "pack_serial_number": self.pack_serial_number,
             "soc_now": soc_now,
             "target_soc": self.target_soc,
             "soh": soh,
-            "impedance_ohm": impedance / 1000.0,  # if stored in mΩ
+            "impedance_ohm": impedance / 1000.0 if impedance is not None else None,  # if stored in mΩ
             "max_capacity_kwh": max_capacity,
             "effective_capacity_kwh": effective_capacity,
             "energy_needed_kwh": energy_needed,
             "max_safe_power_kw": max_safe_power_kw,
             "health_notes": health_notes,
+            "soh_forecast": forecast,
+        }
+
+    def build_battery_context(self) -> Dict[str, Any]:
+        """
+        The battery summary plus the pricing energy estimate for this battery,
+        resolved together so station evaluation does not look them up again.
+        """
+        return {
+            "summary": self.build_battery_summary(),
+            "energy_estimation": pricing_engine.estimate_energy(self.vin, self.battery_id),
         }
 
 
+def resolve_battery_context(vin: str, target_soc: float) -> Dict[str, Any]:
+    """
+    `BatteryDataAgent.build_battery_context`, memoized until new SoH records or
+    SoC telemetry for the vehicle arrive (see services.battery_context).
+    The result is shared: treat it as read-only.
+    """
+    agent = BatteryDataAgent(vin=vin, target_soc=target_soc)
+    return battery_contexts.get_or_build(
+        (vin, agent.battery_id, target_soc),
+        data_versions(vin),
+        agent.build_battery_context,
+    )
+
+
 # ---------------------------------------------------------
 # Charging Station Agent
 # ---------------------------------------------------------
@@ -136,13 +205,18 @@ class ChargingStationAgent:
         self,
         battery_info: Dict[str, Any],
         departure_time: datetime,
+        energy_estimation: Optional[Dict[str, Any]] = None,
     ) -> List[Dict[str, Any]]:
         """
         For each station + available connector:
         - estimate cost using PricingEngine
-        - estimate charge duration using min(battery_max_safe_power, connector_power)
+        - estimate charge duration at min(battery_max_safe_power, connector_power),
+          following the vehicle's learned charging curve
         - check if it's possible to reach target SoC before departure
         Returns a list of candidate options.
+
+        `energy_estimation` comes from `resolve_battery_context`; without it the
+        estimate is resolved once here and shared by every connector.
         """
         candidates: List[Dict[str, Any]] = []
 
@@ -158,6 +232,9 @@ class ChargingStationAgent:
             # Nothing to charge; still return an empty list and let negotiator explain
             return candidates
 
+        if energy_estimation is None:
+            energy_estimation = pricing_engine.estimate_energy(vin, battery_id)
+
         for station in CHARGING_STATIONS.values():
             # Compute distance from user to station
             loc = station["location"]
@@ -202,10 +279,6 @@ class ChargingStationAgent:
                 if effective_power_kw <= 0:
                     continue
 
-                # Time needed to deliver required energy at this effective power
-                duration_h = energy_needed / effective_power_kw
-                can_meet_ready_by = duration_h <= time_window_h
-
                 # Use PricingEngine to estimate total cost for this station/connector
                 cost_ctx = pricing_engine.calculate_session_cost(
                     vehicle_vin=vin,
@@ -213,8 +286,16 @@ class ChargingStationAgent:
                     battery_id=battery_id,
                     reserved_connector=connector,
                     energy_kwh_override=energy_needed,
+                    soc_window=(battery_info["soc_now"], battery_info["target_soc"]),
+                    power_limit_kw=max_safe_power,
+                    energy_estimation=energy_estimation,
                 )
 
+                # Time needed to reach target SoC, following the learned charging curve
+                charging = cost_ctx.get("charging_estimate")
+                duration_h = charging["duration_h"] if charging else energy_needed / effective_power_kw
+                can_meet_ready_by = duration_h <= time_window_h
+
                 candidates.append(
                     {
                         "station_id": station_snapshot["station_id"],
@@ -247,10 +328,12 @@ class NegotiatorAgent:
         user_departure_time: datetime,
         strategy: str = "balanced",
         reasoning_model: str = "meta-llama/Meta-Llama-3.1-8B-Instruct",
+        ranker: Optional[str] = None,
     ):
         self.departure_time = user_departure_time
         self.strategy = strategy  # "cost" | "speed" | "balanced"
         self.reasoning_model = reasoning_model
+        self.ranker = ranker or settings.negotiator_ranker  # "llm" | "learned" | "deterministic"
 
     # -----------------------------------------------------
     # LLM chooses the best station/connector
@@ -316,6 +399,41 @@ class NegotiatorAgent:
 
         raise RuntimeError("LLM returned station not in candidates")
 
+    # -----------------------------------------------------
+    # Pick a candidate via the configured ranker (+ decision logging)
+    # -----------------------------------------------------
+    def _choose_best(self, battery_info, candidates):
+        path = self.ranker
+        if path == "learned" and not settings.negotiator_ranker_model_path:
+            path = "deterministic"
+
+        started = time.perf_counter()
+        if path == "learned":
+            try:
+                ranker = load_learned_ranker(settings.negotiator_ranker_model_path)
+            except (OSError, KeyError, ValueError) as exc:
+                logger.warning("Learned ranker unavailable, using the deterministic ranker: %s", exc)
+                path = "deterministic"
+        if path == "learned":
+            chosen = ranker.choose(battery_info, candidates, self.strategy)
+        elif path == "deterministic":
+            chosen = DeterministicRanker().choose(battery_info, candidates, self.strategy)
+        else:
+            path = "llm"
+            chosen = self._llm_choose_best(battery_info, candidates)
+        latency_ms = (time.perf_counter() - started) * 1000.0
+
+        if DECISION_LOG:
+            DECISION_LOG.record(
+                strategy=self.strategy,
+                battery_info=battery_info,
+                candidates=candidates,
+                chosen=chosen,
+                source=path,
+                latency_ms=latency_ms,
+            )
+        return chosen, path
+
     # -----------------------------------------------------
     # Match score for the frontend UI
     # -----------------------------------------------------
@@ -341,8 +459,8 @@ class NegotiatorAgent:
         if not candidates:
             return {"error": "No stations can meet ready-by constraints"}
 
-        # LLM picks the final candidate
-        chosen = self._llm_choose_best(battery_info, candidates)
+        # LLM (or a local ranker) picks the final candidate
+        chosen, decision_path = self._choose_best(battery_info, candidates)
 
         # compute timing details
         duration_h = chosen["session_duration_h"]
@@ -362,6 +480,7 @@ class NegotiatorAgent:
             "meta": {
                 "strategy_used": self.strategy,
                 "match_score": match_score,
+                "decision_path": decision_path,
             },
             "station": {
                 "station_id": chosen["station_id"],
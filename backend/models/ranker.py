@@ -0,0 +1,361 @@
+"""
+Local (non-LLM) rankers for negotiator candidates.
+
+- DeterministicRanker applies the same decision rules the LLM is prompted with.
+- LearnedRanker is a conditional logistic regression (softmax over the candidate
+  set of one request) trained offline from the NegotiatorAgent decision log.
+
+Both score the whole candidate matrix in one vectorized NumPy pass.
+
+Training / evaluation CLI (run from the backend directory):
+
+    python -m models.ranker train --log decisions.ndjson --out ranker.npz
+    python -m models.ranker evaluate --log decisions.ndjson --model ranker.npz
+"""
+
+import argparse
+import json
+import sys
+import time
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+STRATEGIES = ("cost", "speed", "balanced")
+BASE_FEATURES = ("cost_rel", "duration_rel", "distance_10km", "misses_ready_by", "power_350kw")
+FEATURE_NAMES = tuple(f"{s}:{f}" for s in STRATEGIES for f in BASE_FEATURES)
+
+_EPS = 1e-6
+
+
+# ---------------------------------------------------------
+# Feature extraction
+# ---------------------------------------------------------
+
+def _column(candidates: Sequence[Dict[str, Any]], field: str) -> np.ndarray:
+    return np.fromiter(
+        (float(c.get(field) or 0.0) for c in candidates),
+        dtype=np.float64,
+        count=len(candidates),
+    )
+
+
+def base_feature_matrix(candidates: Sequence[Dict[str, Any]]) -> np.ndarray:
+    """
+    Per-candidate features, relative to the best value in the same request so
+    the model does not depend on absolute price or energy levels.
+    """
+    cost = _column(candidates, "total_cost_eur")
+    duration = _column(candidates, "session_duration_h")
+    distance = _column(candidates, "distance_km")
+    power = _column(candidates, "effective_power_kw")
+    feasible = np.fromiter(
+        (bool(c.get("can_meet_ready_by")) for c in candidates),
+        dtype=np.float64,
+        count=len(candidates),
+    )
+
+    matrix = np.empty((len(candidates), len(BASE_FEATURES)), dtype=np.float64)
+    matrix[:, 0] = cost / max(cost.min(), _EPS) - 1.0
+    matrix[:, 1] = duration / max(duration.min(), _EPS) - 1.0
+    matrix[:, 2] = distance / 10.0
+    matrix[:, 3] = 1.0 - feasible
+    matrix[:, 4] = power / 350.0
+    return matrix
+
+
+def feature_matrix(candidates: Sequence[Dict[str, Any]], strategy: str) -> np.ndarray:
+    """
+    Base features placed in the column block of the active strategy, so a single
+    weight vector learns separate trade-offs for cost / speed / balanced.
+    """
+    base = base_feature_matrix(candidates)
+    width = len(BASE_FEATURES)
+    block = STRATEGIES.index(strategy) if strategy in STRATEGIES else STRATEGIES.index("balanced")
+    matrix = np.zeros((len(candidates), width * len(STRATEGIES)), dtype=np.float64)
+    matrix[:, block * width:(block + 1) * width] = base
+    return matrix
+
+
+# ---------------------------------------------------------
+# Rankers
+# ---------------------------------------------------------
+
+class DeterministicRanker:
+    """
+    Rule-based choice mirroring the LLM system prompt:
+    only candidates meeting ready-by, then lowest cost / shortest duration /
+    best normalized compromise depending on the strategy.
+    """
+
+    name = "deterministic"
+
+    def choose_index(self, candidates: Sequence[Dict[str, Any]], strategy: str) -> int:
+        cost = _column(candidates, "total_cost_eur")
+        duration = _column(candidates, "session_duration_h")
+        feasible = np.fromiter(
+            (bool(c.get("can_meet_ready_by")) for c in candidates),
+            dtype=bool,
+            count=len(candidates),
+        )
+        if not feasible.any():
+            feasible[:] = True
+
+        if strategy == "cost":
+            order = np.lexsort((duration, cost, ~feasible))
+        elif strategy == "speed":
+            order = np.lexsort((cost, duration, ~feasible))
+        else:
+            compromise = 0.5 * cost / max(cost.min(), _EPS) + 0.5 * duration / max(duration.min(), _EPS)
+            order = np.lexsort((compromise, ~feasible))
+        return int(order[0])
+
+    def choose(
+        self, battery_info: Dict[str, Any], candidates: List[Dict[str, Any]], strategy: str
+    ) -> Dict[str, Any]:
+        return candidates[self.choose_index(candidates, strategy)]
+
+
+class LearnedRanker:
+    """
+    Linear scorer over `feature_matrix`; the highest scoring candidate wins.
+    """
+
+    name = "learned"
+
+    def __init__(self, weights: np.ndarray, metadata: Optional[Dict[str, Any]] = None):
+        if weights.shape != (len(FEATURE_NAMES),):
+            raise ValueError(f"Expected {len(FEATURE_NAMES)} weights, got shape {weights.shape}")
+        self.weights = weights.astype(np.float64)
+        self.metadata = metadata or {}
+
+    def scores(self, candidates: Sequence[Dict[str, Any]], strategy: str) -> np.ndarray:
+        return feature_matrix(candidates, strategy) @ self.weights
+
+    def choose_index(self, candidates: Sequence[Dict[str, Any]], strategy: str) -> int:
+        return int(np.argmax(self.scores(candidates, strategy)))
+
+    def choose(
+        self, battery_info: Dict[str, Any], candidates: List[Dict[str, Any]], strategy: str
+    ) -> Dict[str, Any]:
+        return candidates[self.choose_index(candidates, strategy)]
+
+    def save(self, path: str) -> None:
+        with open(path, "wb") as f:
+            np.savez(
+                f,
+                weights=self.weights,
+                feature_names=np.array(FEATURE_NAMES),
+                metadata=np.array(json.dumps(self.metadata)),
+            )
+
+    @classmethod
+    def load(cls, path: str) -> "LearnedRanker":
+        with np.load(path, allow_pickle=False) as data:
+            names = tuple(str(n) for n in data["feature_names"])
+            if names != FEATURE_NAMES:
+                raise ValueError(f"Ranker model {path} was trained on a different feature set")
+            return cls(data["weights"], json.loads(str(data["metadata"])))
+
+
+@lru_cache(maxsize=4)
+def load_learned_ranker(path: str) -> LearnedRanker:
+    return LearnedRanker.load(path)
+
+
+# ---------------------------------------------------------
+# Offline training from the decision log
+# ---------------------------------------------------------
+
+def _chosen_index(entry: Dict[str, Any]) -> Optional[int]:
+    chosen = entry.get("chosen") or {}
+    for idx, c in enumerate(entry.get("candidates") or []):
+        if c.get("station_id") == chosen.get("station_id") and c.get("connector_id") == chosen.get(
+            "connector_id"
+        ):
+            return idx
+    return None
+
+
+def build_training_set(entries: Sequence[Dict[str, Any]]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Stacks every request's candidate matrix into one array.
+    Returns (X, group_starts, chosen_rows) where chosen_rows are absolute row indices.
+    """
+    blocks: List[np.ndarray] = []
+    starts: List[int] = []
+    chosen: List[int] = []
+    offset = 0
+    for entry in entries:
+        candidates = entry.get("candidates") or []
+        idx = _chosen_index(entry)
+        if not candidates or idx is None:
+            continue
+        blocks.append(feature_matrix(candidates, entry.get("strategy", "balanced")))
+        starts.append(offset)
+        chosen.append(offset + idx)
+        offset += len(candidates)
+
+    if not blocks:
+        raise ValueError("No usable decisions in the log")
+    return np.vstack(blocks), np.asarray(starts, dtype=np.intp), np.asarray(chosen, dtype=np.intp)
+
+
+def _group_softmax(scores: np.ndarray, starts: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    sizes = np.diff(np.append(starts, scores.shape[0]))
+    group_max = np.maximum.reduceat(scores, starts)
+    shifted = np.exp(scores - np.repeat(group_max, sizes))
+    denom = np.add.reduceat(shifted, starts)
+    log_norm = np.log(denom) + group_max
+    return shifted / np.repeat(denom, sizes), log_norm
+
+
+def train_conditional_logit(
+    X: np.ndarray,
+    starts: np.ndarray,
+    chosen: np.ndarray,
+    l2: float = 1e-3,
+    learning_rate: float = 0.5,
+    iterations: int = 500,
+) -> Tuple[np.ndarray, float]:
+    """
+    Full-batch gradient descent on the softmax-over-candidates likelihood.
+    Returns (weights, final mean negative log-likelihood).
+    """
+    weights = np.zeros(X.shape[1], dtype=np.float64)
+    n_groups = len(starts)
+    chosen_sum = X[chosen].sum(axis=0)
+    loss = float("nan")
+
+    for _ in range(iterations):
+        scores = X @ weights
+        probs, log_norm = _group_softmax(scores, starts)
+        loss = float((log_norm.sum() - scores[chosen].sum()) / n_groups + 0.5 * l2 * weights @ weights)
+        grad = (probs @ X - chosen_sum) / n_groups + l2 * weights
+        weights -= learning_rate * grad
+
+    return weights, loss
+
+
+def _group_argmax(scores: np.ndarray, starts: np.ndarray) -> np.ndarray:
+    # Per-group argmax as absolute row indices, without a Python loop over rows.
+    sizes = np.diff(np.append(starts, scores.shape[0]))
+    group_ids = np.repeat(np.arange(len(starts)), sizes)
+    order = np.lexsort((-scores, group_ids))
+    return order[np.concatenate(([0], np.cumsum(sizes)[:-1]))]
+
+
+def train_from_log(log_path: str, **kwargs: Any) -> LearnedRanker:
+    from models.decision_log import iter_decisions
+
+    entries = list(iter_decisions(log_path, source="llm"))
+    X, starts, chosen = build_training_set(entries)
+    weights, loss = train_conditional_logit(X, starts, chosen, **kwargs)
+    agreement = float(np.mean(_group_argmax(X @ weights, starts) == chosen))
+    return LearnedRanker(
+        weights,
+        {
+            "trained_at": datetime.now(timezone.utc).isoformat(),
+            "training_log": log_path,
+            "requests": int(len(starts)),
+            "candidates": int(X.shape[0]),
+            "train_nll": round(loss, 6),
+            "train_agreement": round(agreement, 4),
+        },
+    )
+
+
+def _percentiles_ms(samples: Sequence[float]) -> Dict[str, Optional[float]]:
+    if not samples:
+        return {"p50": None, "p95": None, "p99": None}
+    arr = np.asarray(samples, dtype=np.float64)
+    return {
+        "p50": round(float(np.percentile(arr, 50)), 4),
+        "p95": round(float(np.percentile(arr, 95)), 4),
+        "p99": round(float(np.percentile(arr, 99)), 4),
+    }
+
+
+def evaluate(log_path: str, ranker: LearnedRanker) -> Dict[str, Any]:
+    """
+    Compares learned and deterministic choices against the logged LLM choices
+    and measures per-request ranking latency (feature extraction included).
+    """
+    from models.decision_log import iter_decisions
+
+    deterministic = DeterministicRanker()
+    totals = {"requests": 0, "learned_agree": 0, "deterministic_agree": 0}
+    learned_ms: List[float] = []
+    deterministic_ms: List[float] = []
+    llm_ms: List[float] = []
+
+    for entry in iter_decisions(log_path, source="llm"):
+        candidates = entry.get("candidates") or []
+        expected = _chosen_index(entry)
+        if not candidates or expected is None:
+            continue
+        strategy = entry.get("strategy", "balanced")
+
+        t0 = time.perf_counter()
+        learned_idx = ranker.choose_index(candidates, strategy)
+        t1 = time.perf_counter()
+        deterministic_idx = deterministic.choose_index(candidates, strategy)
+        t2 = time.perf_counter()
+
+        totals["requests"] += 1
+        totals["learned_agree"] += int(learned_idx == expected)
+        totals["deterministic_agree"] += int(deterministic_idx == expected)
+        learned_ms.append((t1 - t0) * 1000.0)
+        deterministic_ms.append((t2 - t1) * 1000.0)
+        if entry.get("latency_ms") is not None:
+            llm_ms.append(float(entry["latency_ms"]))
+
+    n = totals["requests"]
+    return {
+        "requests": n,
+        "agreement_with_llm": {
+            "learned": round(totals["learned_agree"] / n, 4) if n else None,
+            "deterministic": round(totals["deterministic_agree"] / n, 4) if n else None,
+        },
+        "latency_ms": {
+            "learned": _percentiles_ms(learned_ms),
+            "deterministic": _percentiles_ms(deterministic_ms),
+            "llm_logged": _percentiles_ms(llm_ms),
+        },
+        "model": ranker.metadata,
+    }
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m models.ranker", description=__doc__.split("\n\n")[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    train_cmd = sub.add_parser("train", help="Fit a learned ranker from a decision log")
+    train_cmd.add_argument("--log", required=True, help="NDJSON decision log written by NegotiatorAgent")
+    train_cmd.add_argument("--out", required=True, help="Where to write the .npz model")
+    train_cmd.add_argument("--l2", type=float, default=1e-3)
+    train_cmd.add_argument("--learning-rate", type=float, default=0.5)
+    train_cmd.add_argument("--iterations", type=int, default=500)
+
+    eval_cmd = sub.add_parser("evaluate", help="Report agreement with the LLM and ranking latency")
+    eval_cmd.add_argument("--log", required=True)
+    eval_cmd.add_argument("--model", required=True)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "train":
+        ranker = train_from_log(
+            args.log, l2=args.l2, learning_rate=args.learning_rate, iterations=args.iterations
+        )
+        ranker.save(args.out)
+        json.dump(ranker.metadata, sys.stdout, indent=2)
+    else:
+        json.dump(evaluate(args.log, LearnedRanker.load(args.model)), sys.stdout, indent=2)
+    sys.stdout.write("\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
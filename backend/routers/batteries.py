@@ -0,0 +1,75 @@
+from typing import Any, Dict, List, Optional
+
+from fastapi import APIRouter, HTTPException, Query
+from pydantic import BaseModel
+
+from config import settings
+from services.battery_registry import battery_bindings
+from services.soh_forecast import soh_forecaster
+
+
+class BatteryForecastModel(BaseModel):
+    battery_id: str
+    vin: Optional[str] = None
+    soh_today: float
+    soh_in_horizon: float
+    horizon_days: float
+    degradation_per_year: float
+    below_threshold: bool
+    days_until_threshold: Optional[float] = None
+    effective_capacity_today_kwh: Optional[float] = None
+    effective_capacity_in_horizon_kwh: Optional[float] = None
+
+
+class FleetForecastResponse(BaseModel):
+    threshold: float
+    within_days: float
+    soh_version: int
+    fit: Dict[str, Any]
+    batteries: List[BatteryForecastModel]
+
+
+router = APIRouter(prefix="/api/batteries", tags=["batteries"])
+
+
+def _with_vin(row: Dict[str, Any]) -> Dict[str, Any]:
+    binding = battery_bindings.vehicle_for_battery(row["battery_id"])
+    return {**row, "vin": binding.vin if binding else None}
+
+
+@router.get("/forecast", response_model=FleetForecastResponse)
+async def fleet_forecast(
+    within_days: float = Query(default=365.0, gt=0, le=3650, description="Forecast window in days"),
+    threshold: Optional[float] = Query(
+        default=None, gt=0, le=100, description="SoH percent; defaults to SOH_DERATE_THRESHOLD"
+    ),
+    limit: int = Query(default=500, ge=1, le=10_000),
+) -> FleetForecastResponse:
+    """
+    Batteries predicted to be below the SoH threshold within the window, soonest first.
+    """
+    threshold = settings.soh_derate_threshold if threshold is None else threshold
+    forecast = soh_forecaster.forecast()
+    rows = forecast.crossing(threshold, within_days)[:limit]
+    return FleetForecastResponse(
+        threshold=threshold,
+        within_days=within_days,
+        soh_version=forecast.version,
+        fit=soh_forecaster.stats(),
+        batteries=[_with_vin(row) for row in rows],
+    )
+
+
+@router.get("/{battery_id}/forecast", response_model=BatteryForecastModel)
+async def battery_forecast(
+    battery_id: str,
+    horizon_days: Optional[float] = Query(default=None, gt=0, le=3650),
+) -> BatteryForecastModel:
+    horizon = settings.soh_forecast_horizon_days if horizon_days is None else horizon_days
+    row = soh_forecaster.forecast().battery(battery_id, settings.soh_derate_threshold, horizon)
+    if row is None:
+        raise HTTPException(
+            status_code=404,
+            detail={"code": "battery_not_found", "message": "No SoH records for this battery"},
+        )
+    return BatteryForecastModel(**_with_vin(row))
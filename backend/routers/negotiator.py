@@ -1,10 +1,15 @@
 from datetime import datetime, timedelta, timezone
-from typing import Any, Dict, List, Literal, Optional
+from typing import Any, Dict, Hashable, List, Literal, Optional
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel, Field
 
-from models.negotiator import BatteryDataAgent, ChargingStationAgent, NegotiatorAgent
+from config import settings
+from models.negotiator import ChargingStationAgent, NegotiatorAgent, resolve_battery_context
+from services.admission import AdmissionController
+from services.battery_context import battery_contexts
+from services.single_flight import SingleFlight
 
 
 class NegotiationRequest(BaseModel):
@@ -33,13 +38,92 @@ class NegotiationResponse(BaseModel):
     candidate_count: int
     candidates: List[Dict[str, Any]]
     plan: Dict[str, Any]
+    decision_path: Optional[Literal["llm", "learned", "deterministic"]] = Field(
+        default=None, description="Which ranker produced the plan; null when there was no candidate to rank"
+    )
+    degraded_reason: Optional[Literal["rate_limited", "queue_full", "queue_timeout"]] = Field(
+        default=None, description="Why the LLM path was skipped under load, if it was"
+    )
 
 
 router = APIRouter(prefix="/api/negotiator", tags=["negotiator"])
 
+# Identical plan requests arriving together (e.g. depot shift start) share one evaluation + LLM call
+negotiation_flights = SingleFlight()
+
+# Bounds LLM-bound work; saturated requests degrade to the deterministic ranker instead of failing
+llm_admission = AdmissionController(
+    max_concurrent=settings.negotiator_llm_max_concurrency,
+    max_queue=settings.negotiator_llm_max_queue,
+    queue_timeout_s=settings.negotiator_llm_queue_timeout_s,
+    client_rate_per_s=settings.negotiator_client_rate_per_s,
+    client_burst=settings.negotiator_client_burst,
+)
+
+
+def _client_id(request: Request) -> str:
+    header_id = request.headers.get("x-client-id")
+    if header_id:
+        return header_id
+    return request.client.host if request.client else "anonymous"
+
+
+def _coalescing_key(payload: NegotiationRequest, departure_ts: datetime) -> Hashable:
+    """
+    Canonical negotiation inputs: ~100 m site precision and minute-level departure,
+    so requests that would produce the same plan land on the same key.
+    """
+    return (
+        payload.vehicle_vin,
+        payload.strategy,
+        round(payload.target_soc_percent, 1),
+        round(payload.user_lat, 3),
+        round(payload.user_lng, 3),
+        departure_ts.replace(second=0, microsecond=0),
+    )
+
+
+def _negotiate(payload: NegotiationRequest, departure_ts: datetime, ranker: str) -> Dict[str, Any]:
+    battery_context = resolve_battery_context(payload.vehicle_vin, payload.target_soc_percent / 100.0)
+    battery_summary = battery_context["summary"]
+
+    station_agent = ChargingStationAgent(user_lat=payload.user_lat, user_lon=payload.user_lng)
+    candidates = station_agent.evaluate_stations(
+        battery_summary, departure_ts, energy_estimation=battery_context["energy_estimation"]
+    )
+
+    negotiator = NegotiatorAgent(
+        user_departure_time=departure_ts,
+        strategy=payload.strategy,
+        ranker=ranker,
+    )
+    plan = negotiator.propose_plan(battery_summary, candidates)
+
+    # The path the agent actually took (a learned model that fails to load falls back)
+    decision_path = plan.get("meta", {}).get("decision_path")
+    return {"battery": battery_summary, "candidates": candidates, "plan": plan, "decision_path": decision_path}
+
+
+async def _negotiate_admitted(
+    payload: NegotiationRequest, departure_ts: datetime, ranker: str, degraded_reason: Optional[str]
+) -> Dict[str, Any]:
+    """
+    Runs one negotiation; only the LLM path has to win a concurrency slot.
+    Coalesced followers wait on this coroutine without holding a slot themselves.
+    """
+    if ranker == "llm":
+        async with llm_admission.slot() as admission:
+            if admission.granted:
+                result = await run_in_threadpool(_negotiate, payload, departure_ts, "llm")
+                return {**result, "degraded_reason": None}
+            ranker, degraded_reason = "deterministic", admission.reason
+
+    result = await run_in_threadpool(_negotiate, payload, departure_ts, ranker)
+    return {**result, "degraded_reason": degraded_reason}
+
 
 @router.post("/plan", response_model=NegotiationResponse)
-async def negotiate_plan(payload: NegotiationRequest) -> NegotiationResponse:
+async def negotiate_plan(payload: NegotiationRequest, request: Request) -> NegotiationResponse:
     now = datetime.utcnow().replace(tzinfo=timezone.utc)
     if payload.departure_time:
         departure_ts = payload.departure_time
@@ -58,25 +142,32 @@ async def negotiate_plan(payload: NegotiationRequest) -> NegotiationResponse:
     if departure_ts > max_departure:
         raise HTTPException(status_code=400, detail="Departure time must be within the next 12 hours")
 
-    battery_agent = BatteryDataAgent(
-        vin=payload.vehicle_vin,
-        target_soc=payload.target_soc_percent / 100.0,
-    )
-    battery_summary = battery_agent.build_battery_summary()
-
-    station_agent = ChargingStationAgent(user_lat=payload.user_lat, user_lon=payload.user_lng)
-    candidates = station_agent.evaluate_stations(battery_summary, departure_ts)
+    ranker = settings.negotiator_ranker
+    degraded_reason = None
+    if ranker == "llm" and not llm_admission.allow_client(_client_id(request)):
+        ranker, degraded_reason = "deterministic", "rate_limited"
 
-    negotiator = NegotiatorAgent(
-        user_departure_time=departure_ts,
-        strategy=payload.strategy,
+    # The LLM client is synchronous, so the work runs in the threadpool instead of blocking the loop
+    result = await negotiation_flights.do(
+        (*_coalescing_key(payload, departure_ts), ranker),
+        lambda: _negotiate_admitted(payload, departure_ts, ranker, degraded_reason),
     )
-    plan = negotiator.propose_plan(battery_summary, candidates)
 
     return NegotiationResponse(
-        battery=battery_summary,
-        candidate_count=len(candidates),
-        candidates=candidates,
-        plan=plan,
+        battery=result["battery"],
+        candidate_count=len(result["candidates"]),
+        candidates=result["candidates"],
+        plan=result["plan"],
+        decision_path=result["decision_path"],
+        degraded_reason=result["degraded_reason"],
     )
 
+
+@router.get("/metrics")
+async def negotiator_metrics() -> Dict[str, Any]:
+    return {
+        "single_flight": negotiation_flights.stats(),
+        "llm_admission": llm_admission.stats(),
+        "battery_context": battery_contexts.stats(),
+    }
+
@@ -1,10 +1,19 @@
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 
+import httpx
 from fastapi import APIRouter, Depends, HTTPException, Request, status
 from pydantic import BaseModel
 
+from adapters.denso_did import DensoDIDError
 from data.charging_stations import get_station_snapshot, occupy_connector
-from services.did_denso_verification import DensoDIDVerificationService
+from services.did_denso_verification import (
+    DensoDIDVerificationService,
+    gateway_breaker,
+    verification_cache,
+)
+from services.did_local_verifier import did_document_cache
+from services.presentation_builder import assemble_presentation, presentation_builder
+from services.revocation_mirror import revocation_mirror
 from services.pricing import pricing_engine
 
 router = APIRouter(prefix="/api/sessions", tags=["session-auth"])
@@ -25,6 +34,11 @@ class SessionAuthRequest(BaseModel):
     reserve_connector: bool = True
 
 
+class PresentationRequest(BaseModel):
+    credentials: List[Dict[str, Any]]
+    challenge: Optional[str] = None
+
+
 class SessionAuthResponse(BaseModel):
     status: str
     user_id: str
@@ -89,3 +103,33 @@ async def authenticate_session(
         pricing=pricing,
     )
 
+
+@router.post("/presentation")
+async def build_presentation(payload: PresentationRequest, request: Request) -> Dict[str, Any]:
+    """
+    Wraps credentials in a holder-signed VerifiablePresentation; local when a
+    holder key is configured, otherwise via the DID gateway.
+    """
+    client = getattr(request.app.state, "denso_client", None)
+    if presentation_builder is None and client is None:
+        raise HTTPException(status_code=503, detail="Denso DID client not ready")
+    try:
+        return await assemble_presentation(client, payload.credentials, payload.challenge)
+    except DensoDIDError as exc:
+        error = {"status_code": exc.status_code, "detail": exc.detail}
+    except httpx.TransportError as exc:
+        error = {"status_code": 502, "detail": f"DID gateway unreachable: {exc}"}
+    raise HTTPException(status_code=502, detail={"message": "Presentation request failed", "error": error})
+
+
+@router.get("/verification-metrics")
+async def verification_metrics(request: Request) -> Dict[str, Any]:
+    client = getattr(request.app.state, "denso_client", None)
+    return {
+        "transport": client.metrics.snapshot() if client else None,
+        "cache": verification_cache.stats(),
+        "did_documents": did_document_cache.stats(),
+        "revocation": revocation_mirror.stats(),
+        "gateway_breaker": gateway_breaker.stats(),
+        "presentations": presentation_builder.stats() if presentation_builder else None,
+    }
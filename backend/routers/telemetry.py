@@ -0,0 +1,113 @@
+from typing import Any, Dict, List, Tuple
+
+from fastapi import APIRouter, HTTPException, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel
+
+from config import settings
+from services.telemetry_ingest import vehicle_telemetry
+
+
+class IngestResponse(BaseModel):
+    accepted: int
+    rejected: int
+    errors: List[str]
+
+
+class RecentSamplesModel(BaseModel):
+    vin: str
+    path: str
+    samples: List[Tuple[int, float]]  # (epoch ms, value), oldest first
+
+
+router = APIRouter(prefix="/api/telemetry", tags=["telemetry"])
+
+
+def _body_too_large() -> HTTPException:
+    return HTTPException(
+        status_code=413,
+        detail={"code": "body_too_large", "message": f"Limit is {settings.telemetry_max_body_bytes} bytes"},
+    )
+
+
+async def _read_capped(request: Request) -> bytes:
+    """
+    The request body, refused as soon as it is known to exceed the limit:
+    from Content-Length up front, otherwise while streaming.
+    """
+    limit = settings.telemetry_max_body_bytes
+    declared = request.headers.get("content-length")
+    if declared is not None and declared.isdigit() and int(declared) > limit:
+        raise _body_too_large()
+    body = bytearray()
+    async for chunk in request.stream():
+        body += chunk
+        if len(body) > limit:
+            raise _body_too_large()
+    return bytes(body)
+
+
+@router.post("/ingest", response_model=IngestResponse)
+async def ingest(request: Request) -> Dict[str, Any]:
+    """
+    NDJSON body of VSS samples (see services.telemetry_ingest for the line shapes).
+    """
+    body = await _read_capped(request)
+    # Parsing a multi-megabyte batch would stall the event loop
+    result = await run_in_threadpool(vehicle_telemetry.ingest_ndjson, body)
+    return result.to_dict()
+
+
+@router.websocket("/ws")
+async def ingest_stream(websocket: WebSocket) -> None:
+    """
+    Each text or binary frame is an NDJSON batch; every frame is acknowledged
+    with the same counts as POST /ingest.
+    """
+    await websocket.accept()
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            frame = message.get("bytes") or message.get("text") or ""
+            if len(frame) > settings.telemetry_max_body_bytes:
+                await websocket.close(code=1009, reason="Frame too large")
+                break
+            result = await run_in_threadpool(vehicle_telemetry.ingest_ndjson, frame)
+            await websocket.send_json(result.to_dict())
+    except WebSocketDisconnect:
+        pass
+
+
+@router.get("/stats")
+async def telemetry_stats() -> Dict[str, Any]:
+    return vehicle_telemetry.stats()
+
+
+@router.get("/{vin}/latest")
+async def latest_values(vin: str) -> Dict[str, Any]:
+    latest = vehicle_telemetry.latest(vin)
+    if not latest:
+        raise HTTPException(
+            status_code=404,
+            detail={"code": "vehicle_not_found", "message": "No telemetry for this vehicle"},
+        )
+    return {
+        "vin": vin,
+        "values": {path: {"ts": ts, "value": value} for path, (ts, value) in latest.items()},
+    }
+
+
+@router.get("/{vin}/recent", response_model=RecentSamplesModel)
+async def recent_samples(
+    vin: str,
+    path: str = Query(..., description="VSS path, e.g. Vehicle.Powertrain.BatteryManagement.Battery.SOC"),
+    limit: int = Query(default=500, ge=1, le=100_000),
+) -> RecentSamplesModel:
+    timestamps, values = vehicle_telemetry.recent(vin, path)
+    return RecentSamplesModel(
+        vin=vin,
+        path=path,
+        samples=list(zip(timestamps[-limit:].tolist(), values[-limit:].tolist())),
+    )
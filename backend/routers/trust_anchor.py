@@ -1,12 +1,16 @@
+from datetime import datetime, timezone
 from typing import Any, Dict, List, Literal, Optional
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
 from pydantic import BaseModel, Field
 
+from config import settings
 from data.solana_anchor_models import AnchorRecord
+from services.anchor_batcher import anchor_batcher
+from services.anchor_queue import anchor_queue
+from services.anchor_store import MAX_PAGE_SIZE
 from services.solana_anchor import (
     SolanaAnchorError,
-    SolanaAnchorExecutionError,
     SolanaAnchorUnavailable,
     solana_anchor_service,
 )
@@ -21,10 +25,33 @@ class AnchorPlanRequest(BaseModel):
 
 
 class AnchorResponse(BaseModel):
-    status: Literal["anchored", "already_anchored"]
+    status: Literal["pending", "already_anchored"]
+    job_id: Optional[str] = None
     anchor: AnchorRecord
 
 
+class VerifyAnchorRequest(BaseModel):
+    plan_record: Optional[Dict[str, Any]] = Field(
+        default=None, description="Plan to re-hash and compare with the stored plan_hash"
+    )
+
+
+class AnchorVerification(BaseModel):
+    session_id: str
+    plan_hash: str
+    merkle_root: Optional[str] = None
+    solana_tx: Optional[str] = None
+    status: str
+    plan_hash_matches: Optional[bool] = None
+    proof_valid: Optional[bool] = None
+    verified: bool
+
+
+class AnchorPage(BaseModel):
+    items: List[AnchorRecord]
+    next_cursor: Optional[str] = None
+
+
 class AnchorErrorDetail(BaseModel):
     code: str
     message: str
@@ -39,28 +66,88 @@ def _raise_http_error(status_code: int, exc: SolanaAnchorError):
     raise HTTPException(status_code=status_code, detail=detail.model_dump()) from exc
 
 
-@router.get("/", response_model=List[AnchorRecord])
-async def list_anchors() -> List[AnchorRecord]:
-    return solana_anchor_service.list_anchors()
+def _as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def _enqueue_anchor(session_id: str, plan_record: Dict[str, Any]) -> AnchorResponse:
+    """
+    Stores a pending anchor and leaves the RPC work to the anchoring queue.
+    """
+    if settings.solana_anchor_mode == "batch":
+        anchor = anchor_batcher.submit(session_id, plan_record)
+    else:
+        anchor = anchor_queue.enqueue_plan(session_id, plan_record)
+    return AnchorResponse(status="pending", job_id=anchor.job_id, anchor=anchor)
+
+
+@router.get("/queue/stats")
+async def queue_stats() -> Dict[str, Any]:
+    return {
+        "mode": settings.solana_anchor_mode,
+        "queue": anchor_queue.stats(),
+        "batching": anchor_batcher.stats(),
+        "blockhash": solana_anchor_service.blockhash_stats(),
+        "fee_payers": solana_anchor_service.fee_payer_stats(),
+        "simulated_chain": solana_anchor_service.simulated_chain_stats(),
+    }
+
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str) -> Dict[str, Any]:
+    job = anchor_queue.get_job(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=404,
+            detail={"code": "job_not_found", "message": "Unknown or expired anchoring job"},
+        )
+    return job.summary()
+
+
+@router.get("/", response_model=AnchorPage)
+async def list_anchors(
+    limit: int = Query(default=100, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(default=None, description="next_cursor of the previous page"),
+    anchored_after: Optional[datetime] = Query(default=None, description="Inclusive lower bound on anchored_at"),
+    anchored_before: Optional[datetime] = Query(default=None, description="Exclusive upper bound on anchored_at"),
+) -> AnchorPage:
+    if cursor is not None and not cursor.isdigit():
+        raise HTTPException(status_code=400, detail={"code": "invalid_cursor", "message": "Malformed cursor"})
+    items, next_cursor = solana_anchor_service.list_anchors(
+        limit=limit,
+        cursor=cursor,
+        anchored_after=_as_utc(anchored_after),
+        anchored_before=_as_utc(anchored_before),
+    )
+    return AnchorPage(items=items, next_cursor=next_cursor)
+
+
+@router.get("/lookup", response_model=List[AnchorRecord])
+async def lookup_anchors(
+    plan_hash: Optional[str] = None,
+    solana_tx: Optional[str] = None,
+) -> List[AnchorRecord]:
+    if not plan_hash and not solana_tx:
+        raise HTTPException(
+            status_code=400,
+            detail={"code": "missing_filter", "message": "Pass plan_hash or solana_tx"},
+        )
+    return solana_anchor_service.find_anchors(plan_hash=plan_hash, solana_tx=solana_tx)
 
 
 @router.post("/{session_id}", response_model=AnchorResponse)
 async def anchor_plan(session_id: str, payload: AnchorPlanRequest) -> AnchorResponse:
     existing = solana_anchor_service.get_anchor(session_id)
-    if existing and not payload.force_reanchor:
-        return AnchorResponse(status="already_anchored", anchor=existing)
+    # A failed anchor never reached the chain: anchoring it again needs no force flag
+    if existing and existing.status != "failed" and not payload.force_reanchor:
+        return AnchorResponse(status="already_anchored", job_id=existing.job_id, anchor=existing)
 
     try:
-        anchor = solana_anchor_service.anchor_plan(
-            session_id=session_id,
-            plan_record=payload.plan_record,
-        )
+        return _enqueue_anchor(session_id, payload.plan_record)
     except SolanaAnchorUnavailable as exc:
         _raise_http_error(503, exc)
-    except SolanaAnchorExecutionError as exc:
-        _raise_http_error(502, exc)
-
-    return AnchorResponse(status="anchored", anchor=anchor)
 
 
 @router.get("/{session_id}", response_model=AnchorRecord)
@@ -74,18 +161,31 @@ async def get_anchor(session_id: str) -> AnchorRecord:
     return record
 
 
+@router.post("/{session_id}/verify", response_model=AnchorVerification)
+async def verify_anchor(session_id: str, payload: Optional[VerifyAnchorRequest] = None) -> AnchorVerification:
+    """
+    Recomputes the plan hash and the Merkle inclusion proof locally (no RPC).
+    """
+    try:
+        result = solana_anchor_service.verify_anchor(
+            session_id, payload.plan_record if payload else None
+        )
+    except SolanaAnchorUnavailable as exc:
+        _raise_http_error(503, exc)
+    if result is None:
+        raise HTTPException(
+            status_code=404,
+            detail={"code": "anchor_not_found", "message": "No anchor stored for this session"},
+        )
+    return AnchorVerification(**result)
+
+
 @router.post("/demo/hardcoded", response_model=AnchorResponse)
 async def anchor_demo_plan() -> AnchorResponse:
     try:
         plan = solana_anchor_service.make_hardcoded_plan()
-        anchor = solana_anchor_service.anchor_plan(
-            session_id=plan["session_id"],
-            plan_record=plan,
-        )
-        return AnchorResponse(status="anchored", anchor=anchor)
+        return _enqueue_anchor(plan["session_id"], plan)
     except SolanaAnchorUnavailable as exc:
         _raise_http_error(503, exc)
-    except SolanaAnchorExecutionError as exc:
-        _raise_http_error(502, exc)
 
 
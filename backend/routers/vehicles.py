@@ -1,4 +1,7 @@
-from fastapi import APIRouter
+from datetime import datetime
+from typing import Any, Dict, List, Literal, Optional, Tuple
+
+from fastapi import APIRouter, HTTPException, Query
 from pydantic import BaseModel
 
 from data.vehicles import (
@@ -6,6 +9,9 @@ from data.vehicles import (
     get_vehicle_charging_history,
     get_vehicle_info,
 )
+from data.vehicle_specs import get_vehicle_capacity_kwh
+from services.charging_curves import charging_curves
+from services.soc_series import downsample, iso_from_ms, soc_store
 
 
 class VehicleInfoModel(BaseModel):
@@ -34,6 +40,17 @@ class ChargingHistoryModel(BaseModel):
     averagePerMonth: int
 
 
+class SocSeriesModel(BaseModel):
+    vin: str
+    path: str
+    unit: str
+    method: str
+    total_samples: int
+    start: Optional[str] = None
+    end: Optional[str] = None
+    points: List[Tuple[int, float]]  # (epoch ms, value)
+
+
 router = APIRouter(prefix="/api/vehicles", tags=["vehicles"])
 
 
@@ -52,3 +69,48 @@ async def charging_history() -> dict:
     return get_vehicle_charging_history()
 
 
+@router.get("/{vin}/soc", response_model=SocSeriesModel)
+async def soc_series(
+    vin: str,
+    start: Optional[datetime] = Query(default=None, description="Inclusive lower bound"),
+    end: Optional[datetime] = Query(default=None, description="Exclusive upper bound"),
+    points: int = Query(default=500, ge=3, le=10_000, description="Maximum points returned"),
+    method: Literal["lttb", "minmax"] = Query(default="lttb"),
+) -> SocSeriesModel:
+    """
+    SoC samples in [start, end), downsampled for charting.
+    """
+    series = soc_store.series(vin)
+    if series is None:
+        raise HTTPException(
+            status_code=404,
+            detail={"code": "vehicle_not_found", "message": "No SoC telemetry for this vehicle"},
+        )
+    timestamps, values = soc_store.range(vin, start, end)
+    total = len(timestamps)
+    timestamps, values = downsample(timestamps, values, points, method)
+    return SocSeriesModel(
+        vin=vin,
+        path=series.path,
+        unit=series.unit,
+        method=method,
+        total_samples=total,
+        start=iso_from_ms(int(timestamps[0])) if len(timestamps) else None,
+        end=iso_from_ms(int(timestamps[-1])) if len(timestamps) else None,
+        points=list(zip(timestamps.tolist(), values.tolist())),
+    )
+
+
+@router.get("/{vin}/charging-curve")
+async def charging_curve(vin: str) -> Dict[str, Any]:
+    """
+    Learned charging-rate-vs-SoC curve of the vehicle (or the fleet curve as
+    fallback), with power shown for the vehicle's nominal capacity.
+    """
+    curve = charging_curves.table.curve(vin, get_vehicle_capacity_kwh(vin))
+    if curve is None:
+        raise HTTPException(
+            status_code=404,
+            detail={"code": "curve_not_found", "message": "No charging curve learned yet"},
+        )
+    return {"vin": vin, **curve}
@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from threading import Lock
+from typing import Any, AsyncIterator, Dict, Optional
+
+
+class TokenBucket:
+    """
+    Classic token bucket: `rate` tokens per second, at most `capacity` banked.
+    """
+
+    __slots__ = ("rate", "capacity", "tokens", "updated", "_lock")
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = Lock()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        with self._lock:
+            self._refill(time.monotonic())
+            if self.tokens >= tokens:
+                self.tokens -= tokens
+                return True
+            return False
+
+    def wait_time(self, tokens: float = 1.0) -> float:
+        """
+        Seconds until `tokens` would be available (0 when available now).
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            missing = tokens - self.tokens
+            return max(missing / self.rate, 0.0) if self.rate > 0 else float("inf")
+
+    async def acquire(self, tokens: float = 1.0) -> None:
+        """
+        Blocks until `tokens` are available, for pacing callers rather than shedding them.
+        """
+        while not self.try_acquire(tokens):
+            await asyncio.sleep(self.wait_time(tokens))
+
+
+@dataclass
+class Admission:
+    granted: bool
+    reason: Optional[str] = None  # "rate_limited" | "queue_full" | "queue_timeout"
+    queued_ms: float = 0.0
+
+
+class AdmissionController:
+    """
+    Guards a scarce backend (the negotiator LLM) with:
+    - per-client token buckets,
+    - a fixed number of concurrent slots,
+    - a bounded wait queue with a timeout.
+
+    It never rejects: callers that are not granted a slot are expected to take
+    a cheaper path (load shedding by degradation).
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int,
+        max_queue: int,
+        queue_timeout_s: float,
+        client_rate_per_s: float,
+        client_burst: float,
+        max_clients: int = 10_000,
+    ) -> None:
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout_s = queue_timeout_s
+        self.client_rate_per_s = client_rate_per_s
+        self.client_burst = client_burst
+        self.max_clients = max_clients
+
+        self._slots = asyncio.Semaphore(max_concurrent)
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        self._in_flight = 0
+        self._waiting = 0
+        self._counters: Dict[str, int] = {
+            "granted": 0,
+            "rate_limited": 0,
+            "queue_full": 0,
+            "queue_timeout": 0,
+        }
+
+    def allow_client(self, client_id: str) -> bool:
+        bucket = self._buckets.get(client_id)
+        if bucket is None:
+            bucket = TokenBucket(self.client_rate_per_s, self.client_burst)
+            self._buckets[client_id] = bucket
+            if len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(client_id)
+
+        allowed = bucket.try_acquire()
+        if not allowed:
+            self._counters["rate_limited"] += 1
+        return allowed
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[Admission]:
+        """
+        Yields an Admission; when `granted` the caller holds one concurrency slot
+        for the duration of the block.
+        """
+        started = time.perf_counter()
+        acquired = True
+        if not self._slots.locked():
+            # Free slot: acquire() completes without suspending, so nobody can race us to it
+            await self._slots.acquire()
+        elif self._waiting >= self.max_queue:
+            self._counters["queue_full"] += 1
+            yield Admission(granted=False, reason="queue_full")
+            return
+        else:
+            self._waiting += 1
+            try:
+                await asyncio.wait_for(self._slots.acquire(), timeout=self.queue_timeout_s)
+            except asyncio.TimeoutError:
+                acquired = False
+            finally:
+                self._waiting -= 1
+        queued_ms = (time.perf_counter() - started) * 1000.0
+
+        if not acquired:
+            self._counters["queue_timeout"] += 1
+            yield Admission(granted=False, reason="queue_timeout", queued_ms=queued_ms)
+            return
+
+        self._in_flight += 1
+        self._counters["granted"] += 1
+        try:
+            yield Admission(granted=True, queued_ms=queued_ms)
+        finally:
+            self._in_flight -= 1
+            self._slots.release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self._counters,
+            "in_flight": self._in_flight,
+            "waiting": self._waiting,
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "tracked_clients": len(self._buckets),
+        }
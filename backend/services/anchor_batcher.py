@@ -0,0 +1,105 @@
+"""
+Merkle-batched anchoring: plan hashes are collected for up to
+`solana_batch_max_wait_s` or `solana_batch_max_size` plans, only the tree root
+is sent to Solana (one blockhash fetch, signature and send per batch), and each
+session's AnchorRecord stores its inclusion proof.
+
+Every plan in a batch gets a `pending` record immediately, carrying the batch's
+job id; the proof is filled in when the batch is flushed to the anchoring queue.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Dict, List, Optional
+
+from config import settings
+from data.solana_anchor_models import AnchorRecord, MerkleProofStep
+from services.anchor_queue import MERKLE_MEMO_PREFIX, AnchorJob, AnchorQueue, anchor_queue, new_job_id
+from services.merkle import build_levels, inclusion_proof
+from services.solana_anchor import SolanaAnchorService, solana_anchor_service
+
+
+class AnchorBatcher:
+    def __init__(
+        self,
+        service: SolanaAnchorService,
+        queue: AnchorQueue,
+        max_batch_size: int,
+        max_wait_s: float,
+    ) -> None:
+        self.service = service
+        self.queue = queue
+        self.max_batch_size = max_batch_size
+        self.max_wait_s = max_wait_s
+        self._pending: List[AnchorRecord] = []
+        self._batch_id: Optional[str] = None
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self.batches = 0
+        self.batched_plans = 0
+        self.largest_batch = 0
+
+    def submit(self, session_id: str, plan_record: Dict[str, Any]) -> AnchorRecord:
+        """
+        Adds the plan to the current batch and returns its pending record.
+        """
+        self.service.ensure_available()
+        self.queue.ensure_capacity()
+        plan_hash = self.service.plan_hash(plan_record)
+        if not self._pending:
+            self._batch_id = new_job_id()
+            self._timer = asyncio.get_running_loop().call_later(self.max_wait_s, self.flush)
+        record = AnchorRecord(session_id=session_id, plan_hash=plan_hash, job_id=self._batch_id)
+        self.service.store_anchor(record)
+        self._pending.append(record)
+        if len(self._pending) >= self.max_batch_size:
+            self.flush()
+        return record
+
+    def flush(self) -> None:
+        """
+        Builds the tree for the current batch, stores the proofs and queues the root.
+        """
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+
+        levels = build_levels([record.plan_hash for record in batch])
+        root = levels[-1][0].hex()
+        for index, record in enumerate(batch):
+            record.merkle_root = root
+            record.merkle_proof = [MerkleProofStep(**step) for step in inclusion_proof(levels, index)]
+            record.leaf_index = index
+            record.batch_size = len(batch)
+        self.service.store_anchors(batch)
+
+        self.queue.enqueue(
+            AnchorJob(
+                job_id=self._batch_id,
+                memo=f"{MERKLE_MEMO_PREFIX}{root}".encode("utf-8"),
+                records=batch,
+            )
+        )
+        self.batches += 1
+        self.batched_plans += len(batch)
+        self.largest_batch = max(self.largest_batch, len(batch))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending": len(self._pending),
+            "batches": self.batches,
+            "batched_plans": self.batched_plans,
+            "largest_batch": self.largest_batch,
+            "avg_batch_size": round(self.batched_plans / self.batches, 2) if self.batches else 0.0,
+        }
+
+
+anchor_batcher = AnchorBatcher(
+    solana_anchor_service,
+    anchor_queue,
+    max_batch_size=settings.solana_batch_max_size,
+    max_wait_s=settings.solana_batch_max_wait_s,
+)
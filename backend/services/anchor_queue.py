@@ -0,0 +1,331 @@
+"""
+Asynchronous anchoring: the API stores a `pending` AnchorRecord and returns a
+job id right away; background workers broadcast the memo transaction and a
+single tracker polls all outstanding signatures (one getSignatureStatuses call
+per 256 signatures) until they are confirmed and finalized.
+
+A job whose blockhash expires (block height past its last valid height) without
+the transaction being seen is rebroadcast with a fresh blockhash, up to
+`solana_max_broadcasts` times.
+
+Jobs live in memory, so `start()` recovers the ones a previous process left
+unfinished from the anchor store: records already broadcast are tracked again
+by their stored signature, the others are queued for broadcast.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import uuid
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from config import settings
+from data.solana_anchor_models import AnchorRecord, AnchorStatus
+from services.blockhash_provider import BLOCKHASH_VALIDITY_BLOCKS
+from services.resilience import retry_async
+from services.solana_anchor import (
+    SolanaAnchorExecutionError,
+    SolanaAnchorService,
+    SolanaAnchorUnavailable,
+    solana_anchor_service,
+)
+
+logger = logging.getLogger(__name__)
+
+_MAX_FINISHED_JOBS = 10_000
+MERKLE_MEMO_PREFIX = "merkle-root:"
+
+
+@dataclass
+class AnchorJob:
+    job_id: str
+    memo: bytes
+    records: List[AnchorRecord]  # one per session; a Merkle batch carries many
+    status: AnchorStatus = "pending"
+    solana_tx: Optional[str] = None
+    last_valid_block_height: Optional[int] = None
+    broadcasts: int = 0
+    error: Optional[str] = None
+    created_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "solana_tx": self.solana_tx,
+            "broadcasts": self.broadcasts,
+            "sessions": [record.session_id for record in self.records],
+            "error": self.error,
+            "created_at": self.created_at.isoformat(),
+        }
+
+
+def new_job_id() -> str:
+    return uuid.uuid4().hex
+
+
+class AnchorQueue:
+    def __init__(
+        self,
+        service: SolanaAnchorService,
+        workers: int,
+        max_queue: int,
+        send_attempts: int,
+        max_broadcasts: int,
+        poll_interval_s: float,
+    ) -> None:
+        self.service = service
+        self.workers = workers
+        self.max_queue = max_queue
+        self.send_attempts = send_attempts
+        self.max_broadcasts = max_broadcasts
+        self.poll_interval_s = poll_interval_s
+        # Unbounded on purpose: max_queue is enforced on new requests only,
+        # so rebroadcasts and already-accepted batches are never dropped.
+        self._queue: "asyncio.Queue[AnchorJob]" = asyncio.Queue()
+        self._jobs: "OrderedDict[str, AnchorJob]" = OrderedDict()
+        self._outstanding: Dict[str, AnchorJob] = {}  # signature -> job awaiting finality
+        self._tasks: List[asyncio.Task] = []
+        self.counts = {"submitted": 0, "rebroadcasts": 0, "confirmed": 0, "finalized": 0, "failed": 0}
+
+    # -------------------------
+    # Producer side
+    # -------------------------
+
+    def ensure_capacity(self) -> None:
+        if self._queue.qsize() >= self.max_queue:
+            raise SolanaAnchorUnavailable(
+                code="anchor_queue_full",
+                message="Anchoring queue is full, retry later",
+                detail=f"{self._queue.qsize()} jobs waiting",
+            )
+
+    def enqueue_plan(self, session_id: str, plan_record: Dict[str, Any]) -> AnchorRecord:
+        """
+        Stores a pending anchor for the plan and queues its memo transaction.
+        """
+        self.service.ensure_available()
+        self.ensure_capacity()
+        plan_hash = self.service.plan_hash(plan_record)
+        record = AnchorRecord(session_id=session_id, plan_hash=plan_hash, job_id=new_job_id())
+        self.service.store_anchor(record)
+        self.enqueue(AnchorJob(job_id=record.job_id, memo=plan_hash.encode("utf-8"), records=[record]))
+        return record
+
+    def enqueue(self, job: AnchorJob) -> None:
+        self._jobs[job.job_id] = job
+        self._trim_finished()
+        self._queue.put_nowait(job)
+
+    def get_job(self, job_id: str) -> Optional[AnchorJob]:
+        return self._jobs.get(job_id)
+
+    def _trim_finished(self) -> None:
+        while len(self._jobs) > _MAX_FINISHED_JOBS:
+            oldest_id, oldest = next(iter(self._jobs.items()))
+            if oldest.status not in ("finalized", "failed"):
+                break
+            del self._jobs[oldest_id]
+
+    # -------------------------
+    # Workers
+    # -------------------------
+
+    def _update_records(self, job: AnchorJob, **changes: Any) -> None:
+        for record in job.records:
+            for key, value in changes.items():
+                setattr(record, key, value)
+        self.service.store_anchors(job.records)
+
+    def _fail(self, job: AnchorJob, error: str) -> None:
+        job.status = "failed"
+        job.error = error
+        self.counts["failed"] += 1
+        self._update_records(job, status="failed", error=error)
+
+    async def _broadcast(self, job: AnchorJob) -> None:
+        if job.broadcasts >= self.max_broadcasts:
+            self._fail(job, f"Not confirmed after {job.broadcasts} broadcasts")
+            return
+        # A send that errors may still have landed; a retry then anchors the same
+        # memo twice, which costs a fee but never produces a wrong anchor.
+        try:
+            signature, last_valid_block_height = await retry_async(
+                lambda: self.service.send_memo_async(job.memo),
+                attempts=self.send_attempts,
+                base_delay_s=0.25,
+                retry_on=lambda exc: isinstance(exc, SolanaAnchorExecutionError),
+            )
+        except (SolanaAnchorExecutionError, SolanaAnchorUnavailable) as exc:
+            self._fail(job, exc.detail or exc.message)
+            return
+
+        if job.broadcasts:
+            self.counts["rebroadcasts"] += 1
+        job.broadcasts += 1
+        job.solana_tx = signature
+        job.last_valid_block_height = last_valid_block_height
+        self.counts["submitted"] += 1
+        self._update_records(job, solana_tx=signature)
+        self._outstanding[signature] = job
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._broadcast(job)
+            except Exception as exc:  # pylint: disable=broad-except
+                logger.exception("Anchoring job %s crashed", job.job_id)
+                self._fail(job, str(exc))
+            finally:
+                self._queue.task_done()
+
+    # -------------------------
+    # Confirmation tracking
+    # -------------------------
+
+    async def _poll_outstanding(self) -> None:
+        signatures = list(self._outstanding)
+        statuses = await self.service.signature_statuses(signatures)
+        block_height: Optional[int] = None
+        for signature, status in zip(signatures, statuses):
+            job = self._outstanding[signature]
+            if status is None:
+                if job.status != "pending":
+                    continue  # confirmed earlier; status can lag on load-balanced RPC nodes
+                if block_height is None:
+                    block_height = await self.service.block_height()
+                if job.last_valid_block_height is None:
+                    # Recovered after a restart: its blockhash was at most this old when sent
+                    job.last_valid_block_height = block_height + BLOCKHASH_VALIDITY_BLOCKS
+                elif block_height > job.last_valid_block_height:
+                    # Blockhash expired and the tx never landed: it can no longer be included
+                    del self._outstanding[signature]
+                    self._queue.put_nowait(job)
+                continue
+
+            del_job = False
+            if status["err"]:
+                self._fail(job, f"Transaction failed: {status['err']}")
+                del_job = True
+            elif status["confirmation_status"] == "finalized":
+                if job.status == "pending":
+                    self.counts["confirmed"] += 1
+                job.status = "finalized"
+                self.counts["finalized"] += 1
+                self._update_records(
+                    job, status="finalized", anchored_at=self._anchored_at(job)
+                )
+                del_job = True
+            elif status["confirmation_status"] == "confirmed" and job.status == "pending":
+                job.status = "confirmed"
+                self.counts["confirmed"] += 1
+                self._update_records(job, status="confirmed", anchored_at=datetime.now(timezone.utc))
+            if del_job:
+                del self._outstanding[signature]
+
+    @staticmethod
+    def _anchored_at(job: AnchorJob) -> datetime:
+        return job.records[0].anchored_at or datetime.now(timezone.utc)
+
+    async def _tracker(self) -> None:
+        while True:
+            await asyncio.sleep(self.poll_interval_s)
+            if not self._outstanding:
+                continue
+            try:
+                await self._poll_outstanding()
+            except Exception as exc:  # pylint: disable=broad-except
+                logger.warning("Anchor confirmation polling failed: %s", exc)
+
+    # -------------------------
+    # Lifecycle
+    # -------------------------
+
+    def recover(self) -> int:
+        """
+        Re-tracks or re-queues stored anchors left unfinished by a previous
+        process; returns how many jobs were resumed.
+        """
+        jobs: Dict[Optional[str], List[AnchorRecord]] = defaultdict(list)
+        for record in self.service.unfinished_anchors():
+            jobs[record.job_id].append(record)
+
+        resumed = 0
+        for job_id, records in jobs.items():
+            root = records[0].merkle_root
+            if job_id is None or (root is None and len(records) > 1):
+                # A batch that was never flushed has no root: anchor its plans one by one
+                groups = [[record] for record in records]
+            else:
+                groups = [records]
+            for group in groups:
+                first = group[0]
+                memo = f"{MERKLE_MEMO_PREFIX}{root}" if first.merkle_root else first.plan_hash
+                job = AnchorJob(
+                    job_id=first.job_id if len(groups) == 1 and first.job_id else new_job_id(),
+                    memo=memo.encode("utf-8"),
+                    records=group,
+                    status="confirmed" if all(r.status == "confirmed" for r in group) else "pending",
+                    solana_tx=first.solana_tx,
+                )
+                if job.job_id != first.job_id:
+                    self._update_records(job, job_id=job.job_id)
+                self._jobs[job.job_id] = job
+                if job.solana_tx:
+                    job.broadcasts = 1
+                    self._outstanding[job.solana_tx] = job
+                else:
+                    self._queue.put_nowait(job)
+                resumed += 1
+        if resumed:
+            logger.info("Resumed %d unfinished anchoring jobs", resumed)
+        return resumed
+
+    def start(self) -> None:
+        if self._tasks:
+            return
+        # At least one worker per fee payer, so every payer can have a send in flight
+        workers = max(self.workers, self.service.fee_payer_count())
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(workers)]
+        self._tasks.append(asyncio.create_task(self._tracker()))
+        try:
+            self.recover()
+        except Exception as exc:  # pylint: disable=broad-except
+            logger.warning("Could not recover unfinished anchors: %s", exc)
+
+    async def stop(self, drain_timeout_s: float = 5.0) -> None:
+        """
+        Gives queued jobs a chance to be broadcast, then stops workers and tracker.
+        """
+        if self._tasks and not self._queue.empty():
+            try:
+                await asyncio.wait_for(self._queue.join(), timeout=drain_timeout_s)
+            except asyncio.TimeoutError:
+                logger.warning("Stopping with %d anchoring jobs still queued", self._queue.qsize())
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.counts,
+            "queued": self._queue.qsize(),
+            "awaiting_confirmation": len(self._outstanding),
+            "workers": max(len(self._tasks) - 1, 0),
+        }
+
+
+anchor_queue = AnchorQueue(
+    solana_anchor_service,
+    workers=settings.solana_anchor_workers,
+    max_queue=settings.solana_anchor_max_queue,
+    send_attempts=settings.solana_send_attempts,
+    max_broadcasts=settings.solana_max_broadcasts,
+    poll_interval_s=settings.solana_confirm_poll_s,
+)
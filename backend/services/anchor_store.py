@@ -0,0 +1,254 @@
+"""
+Anchor persistence.
+
+`SQLiteAnchorStore` keeps one row per session in a WAL-mode database shared by
+all workers on the host, with indexes on session_id, plan_hash, solana_tx and
+anchored_at. The connection is opened on first use and nothing is preloaded:
+lookups and listings read only the rows they return. Listing is keyset-paginated
+on the row id (the cursor), optionally restricted to an anchored_at range.
+
+`MemoryAnchorStore` is the previous per-process dict, used when no database
+path is configured.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from config import settings
+from data.solana_anchor_models import AnchorRecord
+
+MAX_PAGE_SIZE = 1000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS anchors (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT NOT NULL UNIQUE,
+    plan_hash TEXT NOT NULL,
+    solana_tx TEXT,
+    status TEXT NOT NULL,
+    anchored_at REAL,
+    record TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_anchors_plan_hash ON anchors (plan_hash);
+CREATE INDEX IF NOT EXISTS ix_anchors_solana_tx ON anchors (solana_tx);
+CREATE INDEX IF NOT EXISTS ix_anchors_anchored_at ON anchors (anchored_at);
+CREATE INDEX IF NOT EXISTS ix_anchors_status ON anchors (status);
+"""
+
+# Anchors whose job has not reached a final state
+UNFINISHED_STATUSES = ("pending", "confirmed")
+
+_UPSERT = """
+INSERT INTO anchors (session_id, plan_hash, solana_tx, status, anchored_at, record)
+VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT (session_id) DO UPDATE SET
+    plan_hash = excluded.plan_hash,
+    solana_tx = excluded.solana_tx,
+    status = excluded.status,
+    anchored_at = excluded.anchored_at,
+    record = excluded.record
+"""
+
+
+def _timestamp(value: Optional[datetime]) -> Optional[float]:
+    return value.timestamp() if value is not None else None
+
+
+class SQLiteAnchorStore:
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            with self._lock:
+                if self._conn is None:
+                    conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+                    conn.execute("PRAGMA journal_mode=WAL")
+                    conn.execute("PRAGMA synchronous=NORMAL")
+                    conn.execute("PRAGMA busy_timeout=5000")
+                    conn.executescript(_SCHEMA)
+                    self._conn = conn
+        return self._conn
+
+    @staticmethod
+    def _row(record: AnchorRecord) -> Tuple:
+        return (
+            record.session_id,
+            record.plan_hash,
+            record.solana_tx,
+            record.status,
+            _timestamp(record.anchored_at),
+            record.model_dump_json(),
+        )
+
+    def put_many(self, records: Iterable[AnchorRecord]) -> None:
+        rows = [self._row(record) for record in records]
+        conn = self._connection()
+        with self._lock:
+            conn.execute("BEGIN")
+            try:
+                conn.executemany(_UPSERT, rows)
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def put(self, record: AnchorRecord) -> None:
+        self.put_many([record])
+
+    def _select(self, where: str, params: Tuple) -> List[Tuple[int, AnchorRecord]]:
+        conn = self._connection()
+        with self._lock:
+            rows = conn.execute(f"SELECT id, record FROM anchors WHERE {where}", params).fetchall()
+        return [(row_id, AnchorRecord.model_validate_json(raw)) for row_id, raw in rows]
+
+    def get(self, session_id: str) -> Optional[AnchorRecord]:
+        rows = self._select("session_id = ?", (session_id,))
+        return rows[0][1] if rows else None
+
+    def plan_hashes(self, session_ids: List[str]) -> Dict[str, str]:
+        """
+        session_id -> stored plan_hash, reading only the indexed columns.
+        """
+        conn = self._connection()
+        found: Dict[str, str] = {}
+        # Stay below SQLite's default bound-parameter limit
+        for start in range(0, len(session_ids), 900):
+            chunk = session_ids[start:start + 900]
+            placeholders = ",".join("?" * len(chunk))
+            with self._lock:
+                rows = conn.execute(
+                    f"SELECT session_id, plan_hash FROM anchors WHERE session_id IN ({placeholders})", chunk
+                ).fetchall()
+            found.update(rows)
+        return found
+
+    def find(self, plan_hash: Optional[str] = None, solana_tx: Optional[str] = None) -> List[AnchorRecord]:
+        if plan_hash is not None:
+            return [record for _, record in self._select("plan_hash = ? ORDER BY id", (plan_hash,))]
+        if solana_tx is not None:
+            return [record for _, record in self._select("solana_tx = ? ORDER BY id", (solana_tx,))]
+        return []
+
+    def list(
+        self,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        anchored_after: Optional[datetime] = None,
+        anchored_before: Optional[datetime] = None,
+    ) -> Tuple[List[AnchorRecord], Optional[str]]:
+        clauses = ["id > ?"]
+        params: List[object] = [int(cursor) if cursor else 0]
+        if anchored_after is not None:
+            clauses.append("anchored_at >= ?")
+            params.append(anchored_after.timestamp())
+        if anchored_before is not None:
+            clauses.append("anchored_at < ?")
+            params.append(anchored_before.timestamp())
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        params.append(limit + 1)
+        rows = self._select(" AND ".join(clauses) + " ORDER BY id LIMIT ?", tuple(params))
+        next_cursor = str(rows[limit - 1][0]) if len(rows) > limit else None
+        return [record for _, record in rows[:limit]], next_cursor
+
+    def unfinished(self) -> List[AnchorRecord]:
+        placeholders = ",".join("?" * len(UNFINISHED_STATUSES))
+        return [record for _, record in self._select(f"status IN ({placeholders}) ORDER BY id", UNFINISHED_STATUSES)]
+
+    def count(self) -> int:
+        conn = self._connection()
+        with self._lock:
+            return conn.execute("SELECT COUNT(*) FROM anchors").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class MemoryAnchorStore:
+    def __init__(self) -> None:
+        self._records: Dict[str, Tuple[int, AnchorRecord]] = {}
+        self._next_id = 1
+
+    def put(self, record: AnchorRecord) -> None:
+        existing = self._records.get(record.session_id)
+        row_id = existing[0] if existing else self._next_id
+        if not existing:
+            self._next_id += 1
+        self._records[record.session_id] = (row_id, record)
+
+    def put_many(self, records: Iterable[AnchorRecord]) -> None:
+        for record in records:
+            self.put(record)
+
+    def get(self, session_id: str) -> Optional[AnchorRecord]:
+        entry = self._records.get(session_id)
+        return entry[1] if entry else None
+
+    def plan_hashes(self, session_ids: List[str]) -> Dict[str, str]:
+        return {
+            session_id: self._records[session_id][1].plan_hash
+            for session_id in session_ids
+            if session_id in self._records
+        }
+
+    def find(self, plan_hash: Optional[str] = None, solana_tx: Optional[str] = None) -> List[AnchorRecord]:
+        if plan_hash is None and solana_tx is None:
+            return []
+        return [
+            record
+            for _, record in self._records.values()
+            if (plan_hash is None or record.plan_hash == plan_hash)
+            and (solana_tx is None or record.solana_tx == solana_tx)
+        ]
+
+    def list(
+        self,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        anchored_after: Optional[datetime] = None,
+        anchored_before: Optional[datetime] = None,
+    ) -> Tuple[List[AnchorRecord], Optional[str]]:
+        after_id = int(cursor) if cursor else 0
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        page: List[Tuple[int, AnchorRecord]] = []
+        for row_id, record in sorted(self._records.values(), key=lambda entry: entry[0]):
+            if row_id <= after_id:
+                continue
+            if anchored_after is not None and (record.anchored_at is None or record.anchored_at < anchored_after):
+                continue
+            if anchored_before is not None and (record.anchored_at is None or record.anchored_at >= anchored_before):
+                continue
+            page.append((row_id, record))
+            if len(page) > limit:
+                break
+        next_cursor = str(page[limit - 1][0]) if len(page) > limit else None
+        return [record for _, record in page[:limit]], next_cursor
+
+    def unfinished(self) -> List[AnchorRecord]:
+        return [
+            record
+            for _, record in sorted(self._records.values(), key=lambda entry: entry[0])
+            if record.status in UNFINISHED_STATUSES
+        ]
+
+    def count(self) -> int:
+        return len(self._records)
+
+    def close(self) -> None:
+        pass
+
+
+anchor_store = (
+    SQLiteAnchorStore(settings.solana_anchor_db_path)
+    if settings.solana_anchor_db_path
+    else MemoryAnchorStore()
+)
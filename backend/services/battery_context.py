@@ -0,0 +1,113 @@
+"""
+Memoized battery context for negotiations.
+
+Resolving a vehicle's battery context (binding, SoH record, SoH forecast, SoC
+and the pricing energy estimate) touches several stores. The result only
+changes when one of them does, so entries are keyed on the request inputs
+`(vin, battery_id, target_soc)` and stamped with the data versions they were
+built from:
+
+- `soh_store.version`, bumped on every accepted SoH record (the fleet SoH
+  forecast is refit on the same version),
+- the VIN's stored SoC sample count, bumped on every accepted SoC sample,
+- the VIN's latest streamed SoC, which also covers samples that only reach
+  the telemetry latest-value cache,
+- the forecast day: the SoH forecast, the effective capacity and the derate
+  decision are evaluated at the current time and drift even without new data.
+
+A lookup whose versions differ from the stored stamp rebuilds the entry, so
+new telemetry or SoH data invalidates exactly the affected contexts, and an
+idle vehicle's context is still rebuilt every day.
+"""
+
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+from config import settings
+from services.soc_series import SOC_PATH, soc_store
+from services.soh_forecast import SECONDS_PER_DAY
+from services.soh_store import soh_store
+from services.telemetry_ingest import vehicle_telemetry
+
+
+def data_versions(vin: str) -> Tuple[Hashable, ...]:
+    """
+    Versions of every store a battery context for `vin` is derived from.
+    """
+    series = soc_store.series(vin)
+    return (
+        soh_store.version,
+        series.count if series is not None else 0,
+        vehicle_telemetry.latest(vin, SOC_PATH),
+        int(time.time() // SECONDS_PER_DAY),
+    )
+
+
+class BatteryContextCache:
+    """
+    LRU cache of resolved battery contexts, validated against `data_versions`
+    on every lookup instead of expiring on a timer.
+    """
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        # key -> (data versions, context)
+        self._entries: "OrderedDict[Hashable, Tuple[Tuple[Hashable, ...], Dict[str, Any]]]" = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.evictions = 0
+
+    def get_or_build(
+        self, key: Hashable, versions: Tuple[Hashable, ...], build: Callable[[], Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """
+        The cached context for `key` when it was built from `versions`,
+        otherwise `build()`'s result, which replaces it.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] == versions:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self._entries[key]
+                self.invalidations += 1
+            self.misses += 1
+
+        # Built outside the lock: concurrent misses for one key both build, the last one is kept
+        context = build()
+        if self.max_entries <= 0:
+            return context
+        with self._lock:
+            self._entries[key] = (versions, context)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return context
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+        }
+
+
+battery_contexts = BatteryContextCache(max_entries=settings.battery_context_cache_size)
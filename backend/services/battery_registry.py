@@ -0,0 +1,219 @@
+"""
+Which battery is in which vehicle.
+
+`BirthCertificateRegistry` indexes battery birth certificates (BBC) by
+batteryId and by packSerialNumber. `BindingRegistry` maps VIN -> pack ->
+battery DID with effective dates: a pack swap closes the previous binding at
+the swap time, so both the current battery (O(1)) and the battery fitted at
+any past moment (bisection over the VIN's few bindings) can be resolved, and
+the reverse direction (battery or pack -> vehicle) is indexed too.
+
+Sized for ~100k vehicles in memory: bindings are `__slots__` objects holding
+interned strings shared by all indexes, and the time bounds are epoch floats.
+"""
+
+from __future__ import annotations
+
+import sys
+import time
+from bisect import bisect_right, insort
+from datetime import datetime, timezone
+from threading import Lock
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+from data.battery_birth_certificate import BATTERY_BIRTH_CERTIFICATE
+from data.battery_bindings import VEHICLE_BATTERY_BINDINGS
+
+TimeLike = Union[datetime, str, float, None]
+
+
+def _epoch(value: TimeLike) -> float:
+    if value is None:
+        return 0.0
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def _iso(epoch: Optional[float]) -> Optional[str]:
+    if epoch is None:
+        return None
+    return datetime.fromtimestamp(epoch, tz=timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+class BirthCertificateRegistry:
+    def __init__(self) -> None:
+        self._by_battery: Dict[str, Dict[str, Any]] = {}
+        self._by_pack_serial: Dict[str, Dict[str, Any]] = {}
+
+    @classmethod
+    def from_credentials(cls, credentials: Iterable[Dict[str, Any]]) -> "BirthCertificateRegistry":
+        registry = cls()
+        for credential in credentials:
+            registry.add(credential.get("credentialSubject", {}))
+        return registry
+
+    def add(self, subject: Dict[str, Any]) -> None:
+        battery_id = subject.get("batteryId")
+        if not battery_id:
+            raise ValueError("Battery birth certificate without batteryId")
+        self._by_battery[sys.intern(battery_id)] = subject
+        pack_serial = subject.get("packSerialNumber")
+        if pack_serial:
+            self._by_pack_serial[sys.intern(pack_serial)] = subject
+
+    def get(self, battery_id: str) -> Optional[Dict[str, Any]]:
+        return self._by_battery.get(battery_id)
+
+    def by_pack_serial(self, pack_serial: str) -> Optional[Dict[str, Any]]:
+        return self._by_pack_serial.get(pack_serial)
+
+    def __len__(self) -> int:
+        return len(self._by_battery)
+
+
+class BatteryBinding:
+    __slots__ = ("vin", "pack_serial", "battery_id", "valid_from", "valid_to")
+
+    def __init__(self, vin: str, pack_serial: str, battery_id: str, valid_from: float) -> None:
+        self.vin = vin
+        self.pack_serial = pack_serial
+        self.battery_id = battery_id
+        self.valid_from = valid_from  # epoch seconds
+        self.valid_to: Optional[float] = None  # None while the pack is still fitted
+
+    def covers(self, when: float) -> bool:
+        return self.valid_from <= when and (self.valid_to is None or when < self.valid_to)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "vin": self.vin,
+            "pack_serial_number": self.pack_serial,
+            "battery_id": self.battery_id,
+            "valid_from": _iso(self.valid_from),
+            "valid_to": _iso(self.valid_to),
+        }
+
+
+def _valid_from(binding: BatteryBinding) -> float:
+    return binding.valid_from
+
+
+class BindingRegistry:
+    def __init__(self, certificates: BirthCertificateRegistry) -> None:
+        self.certificates = certificates
+        self._by_vin: Dict[str, List[BatteryBinding]] = {}  # sorted by valid_from
+        self._by_battery: Dict[str, BatteryBinding] = {}  # most recent binding per battery
+        self._by_pack: Dict[str, BatteryBinding] = {}  # most recent binding per pack
+        self._lock = Lock()
+        self.version = 0
+
+    @classmethod
+    def from_records(
+        cls, records: Iterable[Dict[str, Any]], certificates: BirthCertificateRegistry
+    ) -> "BindingRegistry":
+        registry = cls(certificates)
+        for record in records:
+            registry.bind(
+                record["vin"],
+                record["packSerialNumber"],
+                battery_id=record.get("batteryId"),
+                valid_from=record.get("validFrom"),
+            )
+        return registry
+
+    def bind(
+        self,
+        vin: str,
+        pack_serial: str,
+        battery_id: Optional[str] = None,
+        valid_from: TimeLike = None,
+    ) -> BatteryBinding:
+        """
+        Records that `pack_serial` is fitted to `vin` from `valid_from` on.
+        The battery DID defaults to the one on the pack's birth certificate.
+        """
+        if battery_id is None:
+            certificate = self.certificates.by_pack_serial(pack_serial)
+            if certificate is None:
+                raise ValueError(f"No battery birth certificate for pack {pack_serial}")
+            battery_id = certificate["batteryId"]
+        binding = BatteryBinding(
+            sys.intern(vin),
+            sys.intern(pack_serial),
+            sys.intern(battery_id),
+            _epoch(valid_from),
+        )
+        with self._lock:
+            # A pack fitted elsewhere leaves its previous vehicle at the swap time
+            previous = self._by_pack.get(binding.pack_serial)
+            if (
+                previous is not None
+                and previous.vin != binding.vin
+                and previous.valid_to is None
+                and previous.valid_from < binding.valid_from
+            ):
+                previous.valid_to = binding.valid_from
+
+            bindings = self._by_vin.setdefault(binding.vin, [])
+            insort(bindings, binding, key=_valid_from)
+            position = bindings.index(binding)
+            if position > 0:
+                bindings[position - 1].valid_to = binding.valid_from
+            if position + 1 < len(bindings):
+                binding.valid_to = bindings[position + 1].valid_from
+
+            for index, key in ((self._by_battery, binding.battery_id), (self._by_pack, binding.pack_serial)):
+                latest = index.get(key)
+                if latest is None or latest.valid_from <= binding.valid_from:
+                    index[key] = binding
+            self.version += 1
+        return binding
+
+    def current(self, vin: str) -> Optional[BatteryBinding]:
+        """
+        The binding in effect now; swaps scheduled for later are not current yet.
+        """
+        return self.at(vin, time.time())
+
+    def at(self, vin: str, when: TimeLike) -> Optional[BatteryBinding]:
+        """
+        The binding in effect for `vin` at `when`.
+        """
+        bindings = self._by_vin.get(vin)
+        if not bindings:
+            return None
+        moment = _epoch(when)
+        position = bisect_right(bindings, moment, key=_valid_from)
+        if not position:
+            return None
+        binding = bindings[position - 1]
+        return binding if binding.covers(moment) else None
+
+    def history(self, vin: str) -> List[BatteryBinding]:
+        return list(self._by_vin.get(vin, ()))
+
+    def vehicle_for_battery(self, battery_id: str) -> Optional[BatteryBinding]:
+        binding = self._by_battery.get(battery_id)
+        return binding if binding is not None and binding.valid_to is None else None
+
+    def vehicle_for_pack(self, pack_serial: str) -> Optional[BatteryBinding]:
+        binding = self._by_pack.get(pack_serial)
+        return binding if binding is not None and binding.valid_to is None else None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "vehicles": len(self._by_vin),
+            "batteries": len(self._by_battery),
+            "packs": len(self._by_pack),
+            "birth_certificates": len(self.certificates),
+            "version": self.version,
+        }
+
+
+birth_certificates = BirthCertificateRegistry.from_credentials([BATTERY_BIRTH_CERTIFICATE])
+battery_bindings = BindingRegistry.from_records(VEHICLE_BATTERY_BINDINGS, birth_certificates)
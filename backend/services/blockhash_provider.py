@@ -0,0 +1,138 @@
+"""
+Recent-blockhash cache for anchoring transactions.
+
+A blockhash stays usable for ~150 blocks (about a minute). Rather than one
+getLatestBlockhash round-trip per transaction, the provider refreshes in the
+background and serves the cached value while it is young enough and far enough
+from its last valid block height. The current height is estimated from the
+time since the last known height (the fetch's, or the latest one the caller
+observed); the blockhash's age always counts from the fetch.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from solders.hash import Hash
+
+logger = logging.getLogger(__name__)
+
+BLOCKHASH_VALIDITY_BLOCKS = 150
+SECONDS_PER_BLOCK = 0.4
+
+
+class BlockhashProvider:
+    def __init__(
+        self,
+        fetch: Callable[[], Awaitable[Tuple[Hash, int]]],
+        refresh_interval_s: float,
+        max_age_s: float,
+        safety_margin_blocks: int,
+    ) -> None:
+        self._fetch = fetch
+        self.refresh_interval_s = refresh_interval_s
+        self.max_age_s = max_age_s
+        self.safety_margin_blocks = safety_margin_blocks
+        self._blockhash: Optional[Hash] = None
+        self._last_valid_block_height = 0
+        self._fetched_at = 0.0  # monotonic
+        self._known_height = 0
+        self._height_observed_at = 0.0  # monotonic
+        self._inflight: Optional[asyncio.Task] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+        self.hits = 0
+        self.refreshes = 0
+        self.forced_refreshes = 0
+        self.refresh_failures = 0
+
+    def _estimated_height(self) -> float:
+        return self._known_height + (time.monotonic() - self._height_observed_at) / SECONDS_PER_BLOCK
+
+    def _usable(self) -> bool:
+        if self._blockhash is None:
+            return False
+        if time.monotonic() - self._fetched_at > self.max_age_s:
+            return False
+        return self._estimated_height() < self._last_valid_block_height - self.safety_margin_blocks
+
+    def peek(self) -> Optional[Tuple[Hash, int]]:
+        """
+        The cached blockhash if still usable, without ever calling the RPC.
+        """
+        if self._usable():
+            self.hits += 1
+            return self._blockhash, self._last_valid_block_height
+        return None
+
+    async def get(self, force_refresh: bool = False) -> Tuple[Hash, int]:
+        if force_refresh:
+            self.forced_refreshes += 1
+        elif self._usable():
+            self.hits += 1
+            return self._blockhash, self._last_valid_block_height
+        await self.refresh()
+        return self._blockhash, self._last_valid_block_height
+
+    async def refresh(self) -> None:
+        # Concurrent callers share one RPC call
+        if self._inflight is None or self._inflight.done():
+            self._inflight = asyncio.ensure_future(self._do_refresh())
+        await asyncio.shield(self._inflight)
+
+    async def _do_refresh(self) -> None:
+        blockhash, last_valid_block_height = await self._fetch()
+        self._blockhash = blockhash
+        self._last_valid_block_height = last_valid_block_height
+        self._fetched_at = self._height_observed_at = time.monotonic()
+        self._known_height = last_valid_block_height - BLOCKHASH_VALIDITY_BLOCKS
+        self.refreshes += 1
+
+    def invalidate(self) -> None:
+        self._blockhash = None
+
+    def observe_block_height(self, block_height: int) -> None:
+        """
+        Re-anchors the height estimate on a height the caller fetched anyway;
+        the blockhash's age is unaffected.
+        """
+        if self._blockhash is not None:
+            self._known_height = block_height
+            self._height_observed_at = time.monotonic()
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except Exception as exc:  # pylint: disable=broad-except
+                self.refresh_failures += 1
+                logger.warning("Blockhash refresh failed: %s", exc)
+            await asyncio.sleep(self.refresh_interval_s)
+
+    def start_refresh(self) -> None:
+        if self._refresh_task is None:
+            self._refresh_task = asyncio.create_task(self._refresh_loop())
+
+    async def stop_refresh(self) -> None:
+        if self._refresh_task:
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+            self._refresh_task = None
+
+    def stats(self) -> Dict[str, Any]:
+        cached = self._blockhash is not None
+        return {
+            "blockhash": str(self._blockhash) if cached else None,
+            "age_s": round(time.monotonic() - self._fetched_at, 3) if cached else None,
+            "last_valid_block_height": self._last_valid_block_height if cached else None,
+            "blocks_left_estimate": int(self._last_valid_block_height - self._estimated_height()) if cached else None,
+            "hits": self.hits,
+            "refreshes": self.refreshes,
+            "forced_refreshes": self.forced_refreshes,
+            "refresh_failures": self.refresh_failures,
+        }
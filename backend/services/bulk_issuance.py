@@ -0,0 +1,195 @@
+"""
+Bulk credential issuance for fleet / charger onboarding.
+
+Input is NDJSON, one subject per line:
+    {"key": "W1KAH5EB2PF093797", "credential_type": "ChargingSessionEnvelope", "credentialSubject": {...}}
+`key` defaults to the line number. Results are appended to the output NDJSON as
+they complete; that file doubles as the checkpoint, so re-running the same
+command skips every key already issued and retries only failures / leftovers.
+
+    python -m services.bulk_issuance --input fleet.ndjson --output issued.ndjson \\
+        --concurrency 16 --rate 50
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from typing import Any, AsyncIterator, Dict, Iterable, Optional, Set, Union
+
+from adapters.denso_did import DensoDIDClient, DensoDIDError, is_transient_error
+from config import settings
+from services.admission import TokenBucket
+from services.metrics import LatencyHistogram
+from services.resilience import retry_async
+
+_DONE = object()
+
+
+def iter_subjects_file(path: str) -> Iterable[Dict[str, Any]]:
+    with open(path, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            item = json.loads(line)
+            item.setdefault("key", str(line_no))
+            yield item
+
+
+def load_checkpoint(output_path: str) -> Set[str]:
+    """
+    Keys already issued successfully according to a previous run's output.
+    """
+    done: Set[str] = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # torn last line from a crash
+            if entry.get("status") == "issued":
+                done.add(str(entry["key"]))
+    return done
+
+
+class BulkIssuer:
+    """
+    Issues credentials through a fixed pool of workers: bounded concurrency,
+    a shared token bucket for the gateway rate limit and jittered retries for
+    transient gateway errors.
+    """
+
+    def __init__(
+        self,
+        client: DensoDIDClient,
+        concurrency: int = 16,
+        rate_per_s: float = 50.0,
+        attempts: int = 4,
+        retry_base_delay_s: float = 0.25,
+    ) -> None:
+        self.client = client
+        self.concurrency = concurrency
+        self.bucket = TokenBucket(rate_per_s, max(rate_per_s, 1.0))
+        self.attempts = attempts
+        self.retry_base_delay_s = retry_base_delay_s
+        self.latency = LatencyHistogram()
+        self.counts = {"issued": 0, "failed": 0, "skipped": 0}
+
+    async def _issue(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        async def attempt() -> Dict[str, Any]:
+            await self.bucket.acquire()
+            return await self.client.issue_credential(item["credentialSubject"], item["credential_type"])
+
+        started = time.perf_counter()
+        try:
+            credential = await retry_async(
+                attempt,
+                attempts=self.attempts,
+                base_delay_s=self.retry_base_delay_s,
+                retry_on=is_transient_error,
+            )
+            entry = {"key": item["key"], "status": "issued", "credential": credential}
+        except DensoDIDError as exc:
+            entry = {"key": item["key"], "status": "failed", "error": {"status_code": exc.status_code, "detail": exc.detail}}
+        except Exception as exc:  # pylint: disable=broad-except
+            entry = {"key": item["key"], "status": "failed", "error": {"status_code": None, "detail": str(exc)}}
+        self.latency.observe((time.perf_counter() - started) * 1000.0)
+        self.counts[entry["status"]] += 1
+        return entry
+
+    async def run(
+        self,
+        items: Union[Iterable[Dict[str, Any]], AsyncIterator[Dict[str, Any]]],
+        output_path: str,
+    ) -> Dict[str, Any]:
+        done = load_checkpoint(output_path)
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency * 2)
+        started = time.perf_counter()
+
+        with open(output_path, "a", encoding="utf-8") as out:
+
+            async def worker() -> None:
+                while True:
+                    item = await queue.get()
+                    if item is _DONE:
+                        return
+                    entry = await self._issue(item)
+                    out.write(json.dumps(entry, separators=(",", ":")) + "\n")
+                    out.flush()
+
+            workers = [asyncio.create_task(worker()) for _ in range(self.concurrency)]
+            try:
+                # The bounded queue keeps the producer at most a few items ahead,
+                # so a 5,000-line input is never materialised as 5,000 tasks.
+                index = 0
+                if hasattr(items, "__aiter__"):
+                    async for item in items:  # type: ignore[union-attr]
+                        index += 1
+                        await self._enqueue(queue, item, index, done)
+                else:
+                    for item in items:  # type: ignore[union-attr]
+                        index += 1
+                        await self._enqueue(queue, item, index, done)
+                for _ in workers:
+                    await queue.put(_DONE)
+                await asyncio.gather(*workers)
+            finally:
+                for task in workers:
+                    task.cancel()
+
+        elapsed = time.perf_counter() - started
+        return {
+            **self.counts,
+            "elapsed_s": round(elapsed, 3),
+            "issued_per_s": round(self.counts["issued"] / elapsed, 2) if elapsed else 0.0,
+            "latency": self.latency.snapshot(),
+        }
+
+    async def _enqueue(self, queue: asyncio.Queue, item: Dict[str, Any], index: int, done: Set[str]) -> None:
+        # Position in the stream is the fallback key, so resuming needs the same input order
+        item.setdefault("key", str(index))
+        if str(item["key"]) in done:
+            self.counts["skipped"] += 1
+            return
+        await queue.put(item)
+
+
+async def _main(args: argparse.Namespace) -> Dict[str, Any]:
+    client = DensoDIDClient(base_url=args.base_url)
+    try:
+        issuer = BulkIssuer(
+            client,
+            concurrency=args.concurrency,
+            rate_per_s=args.rate,
+            attempts=args.attempts,
+        )
+        return await issuer.run(iter_subjects_file(args.input), args.output)
+    finally:
+        await client.close()
+
+
+def main(argv: Optional[Iterable[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m services.bulk_issuance", description="Bulk DID credential issuance")
+    parser.add_argument("--input", required=True, help="NDJSON subjects file")
+    parser.add_argument("--output", required=True, help="NDJSON results file (also the resume checkpoint)")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--rate", type=float, default=50.0, help="Max issue calls per second")
+    parser.add_argument("--attempts", type=int, default=4, help="Tries per subject on transient errors")
+    parser.add_argument("--base-url", default=settings.denso_base_url)
+    args = parser.parse_args(list(argv) if argv is not None else None)
+
+    report = asyncio.run(_main(args))
+    json.dump(report, sys.stdout, indent=2)
+    sys.stdout.write("\n")
+    return 0 if report["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,404 @@
+"""
+Charging curves learned from stored SoC series.
+
+Every pair of consecutive SoC samples of a vehicle that are close in time
+(`MIN_GAP_S`..`MAX_GAP_S`) and rising is a charging interval: it gained ΔSoC
+percent in Δt hours. Intervals are accumulated per vehicle into `SOC_BINS`
+bins of `SOC_BIN_PCT` by their midpoint SoC, as SoC gained and charging
+hours, in one vectorized pass over all new samples of all vehicles
+(np.bincount). Curves are kept in %SoC per hour, so they carry no capacity
+assumption: lookups convert the power limit with the capacity the caller
+plans on (e.g. the SoH forecast's), and observed sessions are reproduced
+whatever that capacity is. The accumulators are additive, so the job runs
+incrementally: each refresh only reads samples after the per-vehicle
+watermark. `python -m services.charging_curves` runs the same job offline and
+saves accumulators + watermarks, which the app loads at startup
+(`CHARGING_CURVE_PATH`) and keeps refreshing from live telemetry.
+
+Published tables are compact (float32 rate per SoC bin per vehicle, plus a
+fleet row as fallback). Curves are observed at whatever charger the vehicle
+used, so duration estimates integrate SoC per bin over `min(limit, rate)`:
+the observed acceptance caps the connector's limit and is never scaled up.
+Bins below the first observed one are unknown and charge at the flat limit;
+only the taper seen at high SoC is carried upward past the last observed bin.
+A curve only counts for limits up to `COMPARABLE_RATE` × its observed peak;
+one seen only at much slower chargers (AC) says nothing about the taper at a
+DC connector, so the caller falls back to a flat estimate there.
+Lookups are table reads; learning never runs on the request path.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import sys
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from config import settings
+from data.vehicle_specs import get_vehicle_capacity_kwh
+from services.soc_series import SocStore, soc_store
+
+logger = logging.getLogger(__name__)
+
+SOC_BIN_PCT = 5.0
+SOC_BINS = int(100 / SOC_BIN_PCT)
+MIN_GAP_S = 10.0
+# Longer gaps are not one charging interval (parked, unplugged, telemetry outage)
+MAX_GAP_S = 15 * 60.0
+# Above this the samples are glitches, not charging (~6 minutes for 0->100%)
+MAX_RATE_PCT_PER_H = 1000.0
+# A bin needs this much observed charging to count, a vehicle this much to get its own curve
+MIN_BIN_HOURS = 0.02
+MIN_CURVE_HOURS = 0.25
+# Keeps a bin with almost no acceptance from predicting an unbounded duration
+MIN_TAPER = 0.05
+# A curve is used for power limits up to this multiple of the peak rate it was observed at
+COMPARABLE_RATE = 1.5
+FLEET_KEY = "fleet"
+
+
+class ChargingCurveTable:
+    """
+    Immutable published curves: row per vehicle (and the fleet), column per SoC bin.
+    """
+
+    def __init__(
+        self,
+        keys: List[str],
+        rate_pct_per_h: np.ndarray,
+        hours: np.ndarray,
+        soc_version: int,
+    ) -> None:
+        self.keys = keys
+        self.rate_pct_per_h = rate_pct_per_h.astype(np.float32)
+        self.hours = hours.astype(np.float32)
+        # Unknown (NaN) bins are ignored by fmax
+        peak = np.fmax.reduce(self.rate_pct_per_h, axis=1, initial=0.0) if len(keys) else np.empty(0, dtype=np.float32)
+        self.peak_pct_per_h = peak
+        with np.errstate(invalid="ignore", divide="ignore"):
+            self.taper = np.clip(self.rate_pct_per_h / peak[:, None], MIN_TAPER, 1.0).astype(np.float32)
+        self.soc_version = soc_version
+        self.built_at = time.time()
+        self._rows = {key: row for row, key in enumerate(keys)}
+        self._lower = np.arange(SOC_BINS) * SOC_BIN_PCT
+
+    def lookup(self, vin: str, limit_pct_per_h: Optional[float] = None) -> Tuple[Optional[int], Optional[str]]:
+        """
+        The vehicle's row, else the fleet row; with `limit_pct_per_h`, only a
+        curve observed at a comparable rate qualifies.
+        """
+        for key, source in ((vin, "vehicle"), (FLEET_KEY, "fleet")):
+            row = self._rows.get(key)
+            if row is None:
+                continue
+            if limit_pct_per_h is None or limit_pct_per_h <= self.peak_pct_per_h[row] * COMPARABLE_RATE:
+                return row, source
+        return None, None
+
+    def duration_h(
+        self, vin: str, soc_from: float, soc_to: float, capacity_kwh: float, power_limit_kw: float
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Charging time from `soc_from` to `soc_to` (fractions) at a connector
+        limited to `power_limit_kw`, following the learned taper. None when
+        no curve was observed at a comparable rate.
+        """
+        if power_limit_kw <= 0 or capacity_kwh <= 0 or soc_to <= soc_from:
+            return None
+        limit = power_limit_kw / capacity_kwh * 100.0
+        row, source = self.lookup(vin, limit)
+        if row is None:
+            return None
+        start, end = soc_from * 100.0, soc_to * 100.0
+        percent = np.clip(np.minimum(end, self._lower + SOC_BIN_PCT) - np.maximum(start, self._lower), 0.0, None)
+        observed = self.rate_pct_per_h[row]
+        # Never faster than observed: a flat stretch may only mean the charger was the limit
+        rate = np.minimum(limit, np.maximum(observed, self.peak_pct_per_h[row] * MIN_TAPER))
+        rate = np.where(np.isnan(observed), limit, rate)
+        duration = float((percent / rate).sum())
+        total_energy = float(percent.sum()) / 100.0 * capacity_kwh
+        return {
+            "duration_h": round(duration, 3),
+            "average_power_kw": round(total_energy / duration, 2) if duration else None,
+            "curve_source": source,
+        }
+
+    def curve(self, vin: str, capacity_kwh: float) -> Optional[Dict[str, Any]]:
+        """
+        The learned curve, with power shown for a pack of `capacity_kwh`.
+        """
+        row, source = self.lookup(vin)
+        if row is None:
+            return None
+        kw_per_pct_h = capacity_kwh / 100.0
+        return {
+            "source": source,
+            "soc_bin_pct": SOC_BIN_PCT,
+            "capacity_kwh": capacity_kwh,
+            "peak_pct_per_h": round(float(self.peak_pct_per_h[row]), 2),
+            "peak_power_kw": round(float(self.peak_pct_per_h[row]) * kw_per_pct_h, 2),
+            "bins": [
+                {
+                    "soc_from": round(float(lower), 1),
+                    "pct_per_h": None if unknown else round(float(self.rate_pct_per_h[row, i]), 2),
+                    "power_kw": None if unknown else round(float(self.rate_pct_per_h[row, i]) * kw_per_pct_h, 2),
+                    "taper": None if unknown else round(float(self.taper[row, i]), 3),
+                    "observed_hours": round(float(self.hours[row, i]), 3),
+                }
+                for i, (lower, unknown) in enumerate(zip(self._lower, np.isnan(self.rate_pct_per_h[row])))
+            ],
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "curves": len(self.keys),
+            "bytes": self.rate_pct_per_h.nbytes + self.hours.nbytes + self.taper.nbytes + self.peak_pct_per_h.nbytes,
+            "soc_version": self.soc_version,
+            "built_at": self.built_at,
+        }
+
+
+def _fill_unobserved(rate: np.ndarray, observed: np.ndarray) -> np.ndarray:
+    """
+    Interpolates bins without enough data between observed neighbours and
+    holds the last observed rate above them. Bins below the first observed
+    bin stay unknown (NaN): a high-SoC taper says nothing about low SoC.
+    """
+    filled = rate.copy()
+    bins = np.arange(rate.shape[1])
+    for row in np.flatnonzero(~observed.all(axis=1)):
+        seen = observed[row]
+        if not seen.any():
+            filled[row] = np.nan
+            continue
+        filled[row] = np.interp(bins, bins[seen], rate[row, seen])
+        filled[row, : bins[seen][0]] = np.nan
+    return filled
+
+
+class ChargingCurveLearner:
+    def __init__(self, store: SocStore) -> None:
+        self.store = store
+        self._rows: Dict[str, int] = {}
+        self._soc_pct = np.zeros((0, SOC_BINS))
+        self._hours = np.zeros((0, SOC_BINS))
+        self._watermarks: Dict[str, int] = {}  # epoch ms of the last sample consumed per vehicle
+        self._seen_counts: Dict[str, int] = {}
+        self._refresh_task: Optional[asyncio.Task] = None
+        self.table = ChargingCurveTable([], np.zeros((0, SOC_BINS)), np.zeros((0, SOC_BINS)), soc_version=-1)
+        self.checked_version = -1
+        self.samples = 0
+        self.intervals = 0
+        self.last_refresh_s = 0.0
+
+    def _row(self, vin: str) -> int:
+        row = self._rows.get(vin)
+        if row is None:
+            row = self._rows[vin] = len(self._rows)
+            if row >= len(self._soc_pct):
+                extra = np.zeros((max(len(self._soc_pct), 16), SOC_BINS))
+                self._soc_pct = np.vstack((self._soc_pct, extra))
+                self._hours = np.vstack((self._hours, extra))
+        return row
+
+    def refresh(self) -> int:
+        """
+        Consumes samples appended since the last refresh; returns how many.
+        Republishes the table when anything was learned.
+        """
+        started = time.perf_counter()
+        soc_version = self.checked_version = self.store.version
+        rows: List[int] = []
+        timestamps: List[np.ndarray] = []
+        values: List[np.ndarray] = []
+        for vin in self.store.vins():
+            series = self.store.series(vin)
+            if series is None or series.count == self._seen_counts.get(vin):
+                continue
+            self._seen_counts[vin] = series.count
+            # Inclusive of the watermark sample, so the first new interval starts there
+            ts, soc = series.range(self._watermarks.get(vin))
+            if len(ts) == 0:
+                continue
+            self._watermarks[vin] = int(ts[-1])
+            rows.append(self._row(vin))
+            timestamps.append(ts)
+            values.append(soc)
+        if not rows:
+            return 0
+
+        counts = np.array([len(ts) for ts in timestamps])
+        group = np.repeat(np.arange(len(rows)), counts)
+        t = np.concatenate(timestamps)
+        soc = np.concatenate(values).astype(np.float64)
+        dt_h = np.diff(t) / 3_600_000.0
+        d_soc = np.diff(soc)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rate = d_soc / dt_h
+        charging = (
+            (group[1:] == group[:-1])
+            & (dt_h * 3600.0 >= MIN_GAP_S)
+            & (dt_h * 3600.0 <= MAX_GAP_S)
+            & (d_soc > 0)
+            & (rate <= MAX_RATE_PCT_PER_H)
+        )
+        pair_group = group[1:][charging]
+        midpoint = (soc[:-1] + soc[1:])[charging] / 2.0
+        soc_bin = np.clip((midpoint // SOC_BIN_PCT).astype(np.int64), 0, SOC_BINS - 1)
+        flat = np.asarray(rows)[pair_group] * SOC_BINS + soc_bin
+        size = len(self._soc_pct) * SOC_BINS
+        self._soc_pct += np.bincount(flat, weights=d_soc[charging], minlength=size).reshape(self._soc_pct.shape)
+        self._hours += np.bincount(flat, weights=dt_h[charging], minlength=size).reshape(self._hours.shape)
+
+        self.samples += len(t)
+        self.intervals += int(charging.sum())
+        self.publish(soc_version)
+        self.last_refresh_s = time.perf_counter() - started
+        return len(t)
+
+    def rebuild(self) -> int:
+        self._rows.clear()
+        self._watermarks.clear()
+        self._seen_counts.clear()
+        self._soc_pct = np.zeros((0, SOC_BINS))
+        self._hours = np.zeros((0, SOC_BINS))
+        self.samples = self.intervals = 0
+        return self.refresh()
+
+    def publish(self, soc_version: Optional[int] = None) -> ChargingCurveTable:
+        vins = list(self._rows)
+        soc_pct = np.vstack((self._soc_pct[: len(vins)], self._soc_pct[: len(vins)].sum(axis=0, keepdims=True)))
+        hours = np.vstack((self._hours[: len(vins)], self._hours[: len(vins)].sum(axis=0, keepdims=True)))
+        keys = vins + [FLEET_KEY]
+        observed = hours >= MIN_BIN_HOURS
+        keep = (hours * observed).sum(axis=1) >= MIN_CURVE_HOURS
+        with np.errstate(invalid="ignore", divide="ignore"):
+            rate = np.where(observed, soc_pct / hours, 0.0)
+        rate = _fill_unobserved(rate, observed)
+        self.table = ChargingCurveTable(
+            [key for key, kept in zip(keys, keep) if kept],
+            rate[keep],
+            hours[keep],
+            soc_version=self.store.version if soc_version is None else soc_version,
+        )
+        return self.table
+
+    def save(self, path: str) -> None:
+        vins = list(self._rows)
+        np.savez_compressed(
+            path,
+            vins=np.array(vins, dtype=str),
+            soc_pct=self._soc_pct[: len(vins)],
+            hours=self._hours[: len(vins)],
+            watermarks=np.array([self._watermarks.get(vin, -1) for vin in vins], dtype=np.int64),
+        )
+
+    def load(self, path: str) -> None:
+        """
+        Restores accumulators and watermarks saved by the offline job; live
+        refreshes continue after each vehicle's watermark.
+        """
+        with np.load(path, allow_pickle=False) as saved:
+            vins = [str(vin) for vin in saved["vins"]]
+            for vin, soc_pct, hours, watermark in zip(vins, saved["soc_pct"], saved["hours"], saved["watermarks"]):
+                row = self._row(vin)
+                self._soc_pct[row] += soc_pct
+                self._hours[row] += hours
+                if watermark >= 0:
+                    self._watermarks[vin] = max(int(watermark), self._watermarks.get(vin, int(watermark)))
+        self.publish()
+
+    async def _refresh_loop(self, interval_s: float) -> None:
+        while True:
+            await asyncio.sleep(interval_s)
+            if self.store.version == self.checked_version:
+                continue
+            try:
+                await asyncio.to_thread(self.refresh)
+            except Exception as exc:  # pylint: disable=broad-except
+                logger.warning("Charging curve refresh failed: %s", exc)
+
+    def start_refresh(self, interval_s: float) -> None:
+        if interval_s > 0 and self._refresh_task is None:
+            self._refresh_task = asyncio.create_task(self._refresh_loop(interval_s))
+
+    async def stop_refresh(self) -> None:
+        if self._refresh_task:
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+            self._refresh_task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.table.stats(),
+            "vehicles_tracked": len(self._rows),
+            "samples_consumed": self.samples,
+            "charging_intervals": self.intervals,
+            "last_refresh_s": round(self.last_refresh_s, 4),
+        }
+
+
+charging_curves = ChargingCurveLearner(soc_store)
+if settings.charging_curve_path:
+    try:
+        charging_curves.load(settings.charging_curve_path)
+    except FileNotFoundError:
+        logger.warning("Charging curve file %s not found; learning from live data only", settings.charging_curve_path)
+charging_curves.refresh()
+
+
+def _load_ndjson(store: SocStore, paths: Iterable[str]) -> int:
+    """
+    Feeds telemetry NDJSON files (services.telemetry_ingest line shapes) into `store`.
+    """
+    from services.telemetry_ingest import VehicleTelemetry
+
+    telemetry = VehicleTelemetry(
+        ring_size=1, max_paths_per_vehicle=settings.telemetry_max_paths_per_vehicle, soc_series=store
+    )
+    accepted = 0
+    for path in paths:
+        with open(path, "rb") as handle:
+            accepted += telemetry.ingest_ndjson(handle.read()).accepted
+    return accepted
+
+
+def main(argv: Optional[Iterable[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m services.charging_curves", description="Learn charging curves offline"
+    )
+    parser.add_argument("--telemetry", nargs="*", default=[], help="Telemetry NDJSON files to learn from")
+    parser.add_argument("--no-seed", action="store_true", help="Ignore the stored SoC history")
+    parser.add_argument("--output", required=True, help="Where to save accumulators (.npz) for CHARGING_CURVE_PATH")
+    parser.add_argument("--show", nargs="*", default=[], help="VINs whose curves to print")
+    args = parser.parse_args(list(argv) if argv is not None else None)
+
+    store = SocStore() if args.no_seed else soc_store
+    loaded = _load_ndjson(store, args.telemetry)
+    learner = ChargingCurveLearner(store)
+    started = time.perf_counter()
+    learner.rebuild()
+    elapsed = time.perf_counter() - started
+    learner.save(args.output)
+
+    report = {
+        "telemetry_samples_loaded": loaded,
+        "elapsed_s": round(elapsed, 3),
+        **learner.stats(),
+        "curves_shown": {vin: learner.table.curve(vin, get_vehicle_capacity_kwh(vin)) for vin in args.show},
+    }
+    json.dump(report, sys.stdout, indent=2)
+    sys.stdout.write("\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,8 +1,173 @@
-from typing import Any, Dict
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
 
-from adapters.denso_did import DensoDIDClient, DensoDIDError
+import httpx
+
+from adapters.denso_did import DensoDIDClient, DensoDIDError, is_transient_error
+from config import settings
 from data.sample_credentials import CHARGING_SESSION_VC
 from data.sample_presentations import SAMPLE_TRI_PARTY_PRESENTATION
+from services.did_local_verifier import LocalVerificationUnavailable, local_did_verifier
+from services.presentation_builder import presentation_builder
+from services.revocation_mirror import revocation_mirror
+from services.resilience import CircuitBreaker, CircuitOpenError, retry_async
+
+# Shared across requests: the service itself is built per request by the router
+gateway_breaker = CircuitBreaker(
+    "denso_did_gateway",
+    failure_threshold=settings.denso_breaker_failure_threshold,
+    reset_timeout_s=settings.denso_breaker_reset_s,
+)
+
+
+def credential_digest(kind: str, document: Dict[str, Any]) -> str:
+    """
+    Canonical digest of a credential / presentation. The proof (incl. proofValue)
+    is part of the document, so any re-signed or altered payload gets a new key.
+    """
+    canonical = json.dumps(document, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(f"{kind}:{canonical}".encode("utf-8")).hexdigest()
+
+
+def tri_party_presentation() -> Dict[str, Any]:
+    """
+    The vehicle + battery presentation, assembled locally when a holder key is
+    configured (cached, so repeated sessions reuse the same signed envelope).
+    """
+    if presentation_builder is None:
+        return SAMPLE_TRI_PARTY_PRESENTATION
+    return presentation_builder.build(
+        SAMPLE_TRI_PARTY_PRESENTATION["verifiableCredential"],
+        challenge=SAMPLE_TRI_PARTY_PRESENTATION["proof"].get("challenge"),
+    )
+
+
+def _earliest_expiration(document: Dict[str, Any]) -> Optional[datetime]:
+    """
+    expirationDate of a credential, or the earliest one inside a presentation.
+    """
+    candidates = [document, *document.get("verifiableCredential", [])]
+    expirations: List[datetime] = []
+    for item in candidates:
+        raw = item.get("expirationDate") if isinstance(item, dict) else None
+        if not raw:
+            continue
+        try:
+            parsed = datetime.fromisoformat(raw)
+        except ValueError:
+            continue
+        expirations.append(parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc))
+    return min(expirations) if expirations else None
+
+
+def _is_verified(result: Optional[Dict[str, Any]]) -> bool:
+    if not result:
+        return False
+    if "presentationResult" in result:
+        return bool(result["presentationResult"].get("verified"))
+    return bool(result.get("verified"))
+
+
+class VerificationCache:
+    """
+    LRU cache of gateway verification outcomes keyed on `credential_digest`.
+
+    - positive entries live at most `revocation_check_interval_s` and never past expirationDate
+    - definitive failures (4xx / verified=false) are cached for `negative_ttl_s`
+    - transient gateway errors are never cached
+    """
+
+    def __init__(self, max_entries: int, revocation_check_interval_s: float, negative_ttl_s: float):
+        self.max_entries = max_entries
+        self.revocation_check_interval_s = revocation_check_interval_s
+        self.negative_ttl_s = negative_ttl_s
+        # digest -> (expires_at monotonic, result or None, DensoDIDError or None)
+        self._entries: "OrderedDict[str, Tuple[float, Optional[Dict[str, Any]], Optional[DensoDIDError]]]" = (
+            OrderedDict()
+        )
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _positive_ttl(self, document: Dict[str, Any]) -> float:
+        ttl = self.revocation_check_interval_s
+        expires = _earliest_expiration(document)
+        if expires is not None:
+            ttl = min(ttl, (expires - datetime.now(timezone.utc)).total_seconds())
+        return ttl
+
+    def get(self, digest: str) -> Optional[Dict[str, Any]]:
+        """
+        Returns the cached result, re-raises a cached failure, or returns None on a miss.
+        """
+        entry = self._entries.get(digest)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, result, error = entry
+        if expires_at <= time.monotonic():
+            del self._entries[digest]
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(digest)
+        if error is not None:
+            self.negative_hits += 1
+            raise DensoDIDError(error.status_code, error.detail)
+        if not _is_verified(result):
+            self.negative_hits += 1
+        else:
+            self.hits += 1
+        return result
+
+    def _store(self, digest: str, ttl: float, result: Optional[Dict[str, Any]], error: Optional[DensoDIDError]):
+        if ttl <= 0:
+            return
+        self._entries[digest] = (time.monotonic() + ttl, result, error)
+        self._entries.move_to_end(digest)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def put_result(self, digest: str, document: Dict[str, Any], result: Dict[str, Any]) -> None:
+        ttl = self._positive_ttl(document) if _is_verified(result) else self.negative_ttl_s
+        self._store(digest, ttl, result, None)
+
+    def put_error(self, digest: str, error: DensoDIDError) -> None:
+        self._store(digest, self.negative_ttl_s, None, error)
+
+    def invalidate(self, digest: Optional[str] = None) -> None:
+        if digest is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(digest, None)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.negative_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "negative_hits": self.negative_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_ratio": round((self.hits + self.negative_hits) / lookups, 4) if lookups else 0.0,
+        }
+
+
+verification_cache = VerificationCache(
+    max_entries=settings.did_verification_cache_size,
+    revocation_check_interval_s=settings.did_revocation_check_interval_s,
+    negative_ttl_s=settings.did_negative_cache_ttl_s,
+)
 
 
 class DensoDIDVerificationService:
@@ -11,28 +176,152 @@ class DensoDIDVerificationService:
     depend on a single verifier instead of juggling raw HTTP calls.
     """
 
-    def __init__(self, client: DensoDIDClient):
+    def __init__(
+        self,
+        client: DensoDIDClient,
+        breaker: Optional[CircuitBreaker] = None,
+        cache: Optional[VerificationCache] = None,
+    ):
         self.client = client
+        self.breaker = breaker or gateway_breaker
+        self.cache = cache or verification_cache
+        self.deadline_s = settings.denso_verify_deadline_s
+        self.call_timeout_s = settings.denso_verify_call_timeout_s
+        self.attempts = settings.denso_verify_attempts
+        self.retry_base_delay_s = settings.denso_retry_base_delay_s
+
+    async def _call_gateway(self, fn: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        """
+        One idempotent gateway call: per-attempt timeout, circuit breaker, jittered retries.
+        """
+
+        async def attempt() -> Dict[str, Any]:
+            return await self.breaker.call(
+                lambda: asyncio.wait_for(fn(), timeout=self.call_timeout_s),
+                is_failure=is_transient_error,
+            )
+
+        return await retry_async(
+            attempt,
+            attempts=self.attempts,
+            base_delay_s=self.retry_base_delay_s,
+            retry_on=is_transient_error,
+        )
+
+    async def _verify_cached(
+        self,
+        kind: str,
+        document: Dict[str, Any],
+        fn: Callable[[], Awaitable[Dict[str, Any]]],
+    ) -> Dict[str, Any]:
+        revoked = self._revoked_result(kind, document)
+        if revoked is not None:
+            return revoked
+
+        digest = credential_digest(kind, document)
+        cached = self.cache.get(digest)
+        if cached is not None:
+            return cached
+
+        local_result = self._verify_locally(kind, document)
+        if local_result is not None:
+            self.cache.put_result(digest, document, local_result)
+            return local_result
+
+        try:
+            result = await self._call_gateway(fn)
+        except DensoDIDError as exc:
+            if not is_transient_error(exc):
+                self.cache.put_error(digest, exc)
+            raise
+        self.cache.put_result(digest, document, result)
+        return result
+
+    @staticmethod
+    def _revoked_result(kind: str, document: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Checked before the cache, so a revocation seen by the mirror wins over
+        any positive result still inside its TTL.
+        """
+        credentials = document.get("verifiableCredential", []) if kind == "presentation" else [document]
+        revoked_ids = [vc.get("id") for vc in credentials if revocation_mirror.status(vc) is True]
+        if not revoked_ids:
+            return None
+        result: Dict[str, Any] = {"verified": False, "revoked": revoked_ids, "source": "revocation_mirror"}
+        if kind == "presentation":
+            result["presentationResult"] = {"verified": False}
+        return result
+
+    @staticmethod
+    def _verify_locally(kind: str, document: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Offline signature check. None means "ask the gateway": the key is not
+        cached yet, or (in prefer mode) the local check did not succeed.
+        """
+        mode = settings.did_local_verification
+        if mode == "off":
+            return None
+        try:
+            result = local_did_verifier.verify(kind, document, strict=(mode == "only"))
+        except LocalVerificationUnavailable:
+            return None
+        if mode == "prefer" and not _is_verified(result):
+            return None
+        return result
 
     async def verify_charging_session_vc(self) -> Dict[str, Any]:
         """
         Ensures the provided charging-session credential is valid.
         """
-        return await self.client.verify_credential(CHARGING_SESSION_VC)
+        return await self._verify_cached(
+            "credential",
+            CHARGING_SESSION_VC,
+            lambda: self.client.verify_credential(CHARGING_SESSION_VC),
+        )
 
     async def verify_tri_party_presentation(self) -> Dict[str, Any]:
         """
         Validates a bundled presentation containing vehicle + battery proofs.
         """
-        return await self.client.verify_presentation(SAMPLE_TRI_PARTY_PRESENTATION)
+        presentation = tri_party_presentation()
+        return await self._verify_cached(
+            "presentation",
+            presentation,
+            lambda: self.client.verify_presentation(presentation),
+        )
+
+    async def _gather_within_deadline(self, *coros: Awaitable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Runs the checks concurrently; the first failure or the deadline cancels the rest.
+        """
+        tasks = [asyncio.ensure_future(coro) for coro in coros]
+        try:
+            done, pending = await asyncio.wait(
+                tasks, timeout=self.deadline_s, return_when=asyncio.FIRST_EXCEPTION
+            )
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+        # Touch every finished task's exception so none is reported as "never retrieved"
+        errors = [task.exception() for task in tasks if task in done and not task.cancelled()]
+        first_error = next((err for err in errors if err is not None), None)
+        if first_error is not None:
+            raise first_error
+        if pending:
+            raise asyncio.TimeoutError()
+        return [task.result() for task in tasks]
 
     async def verify_all(self) -> Dict[str, Any]:
         """
         Runs both VC and VP checks so the caller gets granular statuses.
         """
         try:
-            credential_result = await self.verify_charging_session_vc()
-            presentation_result = await self.verify_tri_party_presentation()
+            credential_result, presentation_result = await self._gather_within_deadline(
+                self.verify_charging_session_vc(),
+                self.verify_tri_party_presentation(),
+            )
         except DensoDIDError as exc:
             return {
                 "verified": False,
@@ -41,6 +330,24 @@ class DensoDIDVerificationService:
                     "detail": exc.detail,
                 },
             }
+        except CircuitOpenError as exc:
+            return {
+                "verified": False,
+                "error": {"status_code": 503, "detail": str(exc)},
+            }
+        except asyncio.TimeoutError:
+            return {
+                "verified": False,
+                "error": {
+                    "status_code": 504,
+                    "detail": f"DID verification exceeded its {self.deadline_s}s deadline",
+                },
+            }
+        except httpx.TransportError as exc:
+            return {
+                "verified": False,
+                "error": {"status_code": 502, "detail": f"DID gateway unreachable: {exc}"},
+            }
 
         aggregate_verified = (
             credential_result.get("verified") and presentation_result.get("presentationResult", {}).get("verified")
@@ -51,4 +358,3 @@ class DensoDIDVerificationService:
             "credentialResult": credential_result,
             "presentationResult": presentation_result,
         }
-
@@ -0,0 +1,371 @@
+"""
+Local Ed25519Signature2020 verification for credentials and presentations.
+
+Signing input follows the Data Integrity hashing pattern:
+    sha256(canonical(proof options without proofValue)) || sha256(canonical(document without proof))
+
+Canonicalization is JCS-style canonical JSON (sorted keys, no whitespace, UTF-8).
+Proofs produced by the DID gateway may use RDF dataset canonicalization instead,
+which is why "prefer" mode only trusts a *successful* local check and defers
+everything else (unknown key, signature mismatch) to the gateway.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+from solders.keypair import Keypair
+from solders.pubkey import Pubkey
+from solders.signature import Signature
+
+from config import settings
+from services.revocation_mirror import revocation_mirror
+
+logger = logging.getLogger(__name__)
+
+_B58_ALPHABET = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+_B58_INDEX = {ch: idx for idx, ch in enumerate(_B58_ALPHABET)}
+_ED25519_PUB_MULTICODEC = b"\xed\x01"
+
+
+# ---------------------------------------------------------
+# Multibase (base58btc) helpers
+# ---------------------------------------------------------
+
+def b58decode(value: str) -> bytes:
+    number = 0
+    for ch in value:
+        number = number * 58 + _B58_INDEX[ch]
+    body = number.to_bytes((number.bit_length() + 7) // 8, "big") if number else b""
+    leading = len(value) - len(value.lstrip("1"))
+    return b"\x00" * leading + body
+
+
+def b58encode(data: bytes) -> str:
+    number = int.from_bytes(data, "big")
+    chars: List[str] = []
+    while number:
+        number, rem = divmod(number, 58)
+        chars.append(_B58_ALPHABET[rem])
+    leading = len(data) - len(data.lstrip(b"\x00"))
+    return "1" * leading + "".join(reversed(chars))
+
+
+def multibase_decode(value: str) -> bytes:
+    if not value.startswith("z"):
+        raise ValueError("Only base58btc ('z') multibase values are supported")
+    return b58decode(value[1:])
+
+
+def multibase_encode(data: bytes) -> str:
+    return "z" + b58encode(data)
+
+
+def multikey_to_pubkey(public_key_multibase: str) -> Pubkey:
+    raw = multibase_decode(public_key_multibase)
+    if raw[:2] == _ED25519_PUB_MULTICODEC:
+        raw = raw[2:]
+    if len(raw) != 32:
+        raise ValueError("Not an Ed25519 public key")
+    return Pubkey.from_bytes(raw)
+
+
+def pubkey_to_multikey(pubkey: Pubkey) -> str:
+    return multibase_encode(_ED25519_PUB_MULTICODEC + bytes(pubkey))
+
+
+# ---------------------------------------------------------
+# Canonicalization + signing input
+# ---------------------------------------------------------
+
+def canonicalize(document: Dict[str, Any]) -> bytes:
+    return json.dumps(document, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def signing_input(document: Dict[str, Any], proof: Dict[str, Any]) -> bytes:
+    unsigned = {k: v for k, v in document.items() if k != "proof"}
+    proof_options = {k: v for k, v in proof.items() if k != "proofValue"}
+    return hashlib.sha256(canonicalize(proof_options)).digest() + hashlib.sha256(canonicalize(unsigned)).digest()
+
+
+def sign_document(
+    document: Dict[str, Any],
+    keypair: Keypair,
+    verification_method: str,
+    proof_purpose: str = "assertionMethod",
+    challenge: Optional[str] = None,
+    created: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Returns a copy of `document` carrying an Ed25519Signature2020 proof
+    that `LocalDIDVerifier` can check.
+    """
+    proof: Dict[str, Any] = {
+        "type": "Ed25519Signature2020",
+        "created": created or datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "verificationMethod": verification_method,
+        "proofPurpose": proof_purpose,
+    }
+    if challenge is not None:
+        proof["challenge"] = challenge
+    signature = keypair.sign_message(signing_input(document, proof))
+    proof["proofValue"] = multibase_encode(bytes(signature))
+    return {**{k: v for k, v in document.items() if k != "proof"}, "proof": proof}
+
+
+# ---------------------------------------------------------
+# DID document cache
+# ---------------------------------------------------------
+
+class DIDDocumentCache:
+    """
+    LRU cache of DID documents with their decoded Ed25519 keys.
+
+    Lookups never touch the network: a miss is recorded and resolved by the
+    background refresh loop, which also re-resolves entries before they expire.
+    Documents from a seed file never expire.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl_s: float,
+        resolver_url: Optional[str] = None,
+    ) -> None:
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self.resolver_url = resolver_url.rstrip("/") if resolver_url else None
+        # did -> (expires_at monotonic or inf, {verification method id -> Pubkey})
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Pubkey]]]" = OrderedDict()
+        self._misses: set = set()
+        self._refresh_task: Optional[asyncio.Task] = None
+        self.hits = 0
+        self.misses = 0
+        self.resolved = 0
+        self.resolve_failures = 0
+
+    @staticmethod
+    def _extract_keys(did: str, document: Dict[str, Any]) -> Dict[str, Pubkey]:
+        keys: Dict[str, Pubkey] = {}
+        for method in document.get("verificationMethod", []):
+            multikey = method.get("publicKeyMultibase")
+            method_id = method.get("id", "")
+            if not multikey:
+                continue
+            if method_id.startswith("#"):
+                method_id = did + method_id
+            try:
+                keys[method_id] = multikey_to_pubkey(multikey)
+            except (KeyError, ValueError):
+                continue
+        return keys
+
+    def put(self, document: Dict[str, Any], ttl_s: Optional[float] = None, replace: bool = False) -> None:
+        """
+        Adds the document's keys to those already known for its DID, so
+        documents from different sources (seed file, our own holder key) do not
+        drop each other's keys. `replace` drops the known keys first, for
+        authoritative resolver results.
+        """
+        did = document["id"]
+        expires_at = time.monotonic() + ttl_s if ttl_s is not None else float("inf")
+        keys = self._extract_keys(did, document)
+        existing = self._entries.get(did)
+        if existing is not None and not replace:
+            keys = {**existing[1], **keys}
+            expires_at = max(expires_at, existing[0])
+        self._entries[did] = (expires_at, keys)
+        self._entries.move_to_end(did)
+        self._misses.discard(did)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def seed_from_file(self, path: str) -> int:
+        """
+        Loads a JSON list of DID documents (or a {did: document} mapping).
+        """
+        with open(path, "r", encoding="utf-8") as f:
+            payload = json.load(f)
+        documents = payload.values() if isinstance(payload, dict) else payload
+        count = 0
+        for document in documents:
+            self.put(document)
+            count += 1
+        return count
+
+    def get_key(self, verification_method: str) -> Optional[Pubkey]:
+        did = verification_method.split("#", 1)[0]
+        entry = self._entries.get(did)
+        if entry is None or entry[0] <= time.monotonic():
+            self.misses += 1
+            if self.resolver_url:
+                self._misses.add(did)
+            return None
+        self.hits += 1
+        self._entries.move_to_end(did)
+        return entry[1].get(verification_method)
+
+    async def resolve(self, client: httpx.AsyncClient, did: str) -> None:
+        resp = await client.get(f"{self.resolver_url}/{did}")
+        resp.raise_for_status()
+        payload = resp.json()
+        self.put(payload.get("didDocument", payload), ttl_s=self.ttl_s, replace=True)
+        self.resolved += 1
+
+    async def _refresh_loop(self, interval_s: float) -> None:
+        async with httpx.AsyncClient(timeout=5.0) as client:
+            while True:
+                horizon = time.monotonic() + interval_s
+                due = set(self._misses)
+                due.update(did for did, (expires_at, _) in self._entries.items() if expires_at <= horizon)
+                for did in due:
+                    try:
+                        await self.resolve(client, did)
+                    except Exception as exc:  # pylint: disable=broad-except
+                        self.resolve_failures += 1
+                        logger.warning("DID document refresh failed for %s: %s", did, exc)
+                await asyncio.sleep(interval_s)
+
+    def start_refresh(self, interval_s: float) -> None:
+        if self.resolver_url and self._refresh_task is None:
+            self._refresh_task = asyncio.create_task(self._refresh_loop(interval_s))
+
+    async def stop_refresh(self) -> None:
+        if self._refresh_task:
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+            self._refresh_task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "documents": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "pending_resolution": len(self._misses),
+            "resolved": self.resolved,
+            "resolve_failures": self.resolve_failures,
+        }
+
+
+# ---------------------------------------------------------
+# Verifier
+# ---------------------------------------------------------
+
+class LocalVerificationUnavailable(LookupError):
+    """The local engine lacks the data to decide; ask the gateway."""
+
+
+class KeyNotCached(LocalVerificationUnavailable):
+    """The signer's DID document is not in the local cache yet."""
+
+
+class StatusNotMirrored(LocalVerificationUnavailable):
+    """The credential's status list is not mirrored locally (or is stale)."""
+
+
+class LocalDIDVerifier:
+    def __init__(self, documents: DIDDocumentCache) -> None:
+        self.documents = documents
+
+    def _check_proof(self, document: Dict[str, Any], expected_purpose: str, strict: bool) -> Dict[str, Any]:
+        proof = document.get("proof") or {}
+        if proof.get("type") != "Ed25519Signature2020":
+            return {"check": "proof", "valid": False, "reason": "unsupported_proof_type"}
+        if proof.get("proofPurpose") != expected_purpose:
+            return {"check": "proof", "valid": False, "reason": "unexpected_proof_purpose"}
+
+        pubkey = self.documents.get_key(proof.get("verificationMethod", ""))
+        if pubkey is None:
+            if strict:
+                return {"check": "proof", "valid": False, "reason": "unknown_verification_method"}
+            raise KeyNotCached(proof.get("verificationMethod"))
+
+        try:
+            signature = Signature.from_bytes(multibase_decode(proof.get("proofValue", "")))
+        except (KeyError, ValueError):
+            return {"check": "proof", "valid": False, "reason": "malformed_proof_value"}
+        valid = signature.verify(pubkey, signing_input(document, proof))
+        return {"check": "proof", "valid": valid, "reason": None if valid else "bad_signature"}
+
+    @staticmethod
+    def _check_expiry(document: Dict[str, Any]) -> Dict[str, Any]:
+        raw = document.get("expirationDate")
+        if not raw:
+            return {"check": "expiration", "valid": True, "reason": None}
+        try:
+            expires = datetime.fromisoformat(raw)
+        except (TypeError, ValueError):
+            return {"check": "expiration", "valid": False, "reason": "invalid_expiration"}
+        if expires.tzinfo is None:
+            expires = expires.replace(tzinfo=timezone.utc)
+        valid = expires > datetime.now(timezone.utc)
+        return {"check": "expiration", "valid": valid, "reason": None if valid else "expired"}
+
+    @staticmethod
+    def _check_revocation(credential: Dict[str, Any], strict: bool) -> Dict[str, Any]:
+        revoked = revocation_mirror.status(credential)
+        if revoked is None:
+            if strict:
+                return {"check": "revocation", "valid": False, "reason": "status_unknown"}
+            raise StatusNotMirrored((credential.get("credentialStatus") or {}).get("statusListCredential"))
+        return {"check": "revocation", "valid": not revoked, "reason": "revoked" if revoked else None}
+
+    def verify_credential(self, credential: Dict[str, Any], strict: bool = False) -> Dict[str, Any]:
+        """
+        Raises LocalVerificationUnavailable when the issuer key or the status list
+        is not available locally, unless `strict` (then the credential simply fails).
+        """
+        checks = [
+            self._check_proof(credential, "assertionMethod", strict),
+            self._check_expiry(credential),
+            self._check_revocation(credential, strict),
+        ]
+        return {
+            "verified": all(c["valid"] for c in checks),
+            "checks": checks,
+            "source": "local",
+        }
+
+    def verify_presentation(self, presentation: Dict[str, Any], strict: bool = False) -> Dict[str, Any]:
+        """
+        Same result shape as the gateway: presentationResult.verified only holds
+        when the holder proof and every embedded credential verify.
+        """
+        credential_results = [
+            self.verify_credential(vc, strict) for vc in presentation.get("verifiableCredential", [])
+        ]
+        proof_check = self._check_proof(presentation, "authentication", strict)
+        verified = proof_check["valid"] and all(r["verified"] for r in credential_results)
+        return {
+            "verified": verified,
+            "presentationResult": {"verified": verified, "checks": [proof_check]},
+            "credentialResults": credential_results,
+            "source": "local",
+        }
+
+    def verify(self, kind: str, document: Dict[str, Any], strict: bool = False) -> Dict[str, Any]:
+        if kind == "presentation":
+            return self.verify_presentation(document, strict)
+        return self.verify_credential(document, strict)
+
+
+did_document_cache = DIDDocumentCache(
+    max_entries=settings.did_document_cache_size,
+    ttl_s=settings.did_document_ttl_s,
+    resolver_url=settings.did_resolver_url,
+)
+if settings.did_document_seed_path:
+    did_document_cache.seed_from_file(settings.did_document_seed_path)
+
+local_did_verifier = LocalDIDVerifier(did_document_cache)
@@ -0,0 +1,161 @@
+"""
+Pool of fee-payer keypairs for anchoring transactions.
+
+A fee payer is a writable account of every transaction it signs, so one payer
+serialises otherwise independent anchors and its balance is a single point of
+failure. The pool hands out payers round-robin or least-recently-used, skips
+payers whose cached balance is below the alarm threshold while healthy ones
+remain, and refreshes balances in the background (one getMultipleAccounts per
+100 payers).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import logging
+import time
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional
+
+from solders.keypair import Keypair
+from solders.pubkey import Pubkey
+
+logger = logging.getLogger(__name__)
+
+LAMPORTS_PER_SOL = 1_000_000_000
+# Base fee of a single-signature transaction; used to debit the cached balance between refreshes
+SIGNATURE_FEE_LAMPORTS = 5_000
+
+
+class FeePayer:
+    __slots__ = ("keypair", "pubkey", "balance", "balance_checked_at", "last_used", "in_flight", "sent", "errors", "low")
+
+    def __init__(self, keypair: Keypair) -> None:
+        self.keypair = keypair
+        self.pubkey = keypair.pubkey()
+        self.balance: Optional[int] = None  # lamports; None until the first refresh
+        self.balance_checked_at = 0.0
+        self.last_used = 0.0
+        self.in_flight = 0
+        self.sent = 0
+        self.errors = 0
+        self.low = False
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "pubkey": str(self.pubkey),
+            "balance_sol": round(self.balance / LAMPORTS_PER_SOL, 6) if self.balance is not None else None,
+            "balance_age_s": round(time.monotonic() - self.balance_checked_at, 1) if self.balance is not None else None,
+            "low_balance": self.low,
+            "in_flight": self.in_flight,
+            "sent": self.sent,
+            "errors": self.errors,
+        }
+
+
+class FeePayerPool:
+    def __init__(
+        self,
+        keypairs: List[Keypair],
+        strategy: str,
+        low_balance_lamports: int,
+        refresh_interval_s: float,
+    ) -> None:
+        if not keypairs:
+            raise ValueError("Fee payer pool needs at least one keypair")
+        self.payers = [FeePayer(keypair) for keypair in keypairs]
+        self.strategy = strategy
+        self.low_balance_lamports = low_balance_lamports
+        self.refresh_interval_s = refresh_interval_s
+        self._round_robin = itertools.cycle(range(len(self.payers)))
+        self._refresh_task: Optional[asyncio.Task] = None
+        self.low_balance_alarms = 0
+        self.refresh_failures = 0
+
+    def __len__(self) -> int:
+        return len(self.payers)
+
+    def _pick(self) -> FeePayer:
+        healthy = [payer for payer in self.payers if not payer.low]
+        candidates = healthy or self.payers  # all low: keep anchoring, the alarm is already raised
+        if self.strategy == "lru":
+            return min(candidates, key=lambda payer: (payer.in_flight, payer.last_used))
+        for _ in range(len(self.payers)):
+            payer = self.payers[next(self._round_robin)]
+            if payer in candidates:
+                return payer
+        return candidates[0]
+
+    @contextmanager
+    def lease(self) -> Iterator[FeePayer]:
+        """
+        Picks a payer for one send; fees and errors are booked against it.
+        """
+        payer = self._pick()
+        payer.in_flight += 1
+        payer.last_used = time.monotonic()
+        try:
+            yield payer
+        except Exception:
+            payer.errors += 1
+            raise
+        else:
+            payer.sent += 1
+            if payer.balance is not None:
+                self._set_balance(payer, payer.balance - SIGNATURE_FEE_LAMPORTS, refreshed=False)
+        finally:
+            payer.in_flight -= 1
+
+    def _set_balance(self, payer: FeePayer, lamports: int, refreshed: bool = True) -> None:
+        payer.balance = lamports
+        if refreshed:
+            payer.balance_checked_at = time.monotonic()
+        low = lamports < self.low_balance_lamports
+        if low and not payer.low:
+            self.low_balance_alarms += 1
+            logger.warning(
+                "Fee payer %s balance low: %.6f SOL (threshold %.6f SOL)",
+                payer.pubkey,
+                lamports / LAMPORTS_PER_SOL,
+                self.low_balance_lamports / LAMPORTS_PER_SOL,
+            )
+        elif payer.low and not low:
+            logger.info("Fee payer %s balance recovered: %.6f SOL", payer.pubkey, lamports / LAMPORTS_PER_SOL)
+        payer.low = low
+
+    async def refresh_balances(self, fetch: Callable[[List[Pubkey]], Awaitable[List[int]]]) -> None:
+        balances = await fetch([payer.pubkey for payer in self.payers])
+        for payer, lamports in zip(self.payers, balances):
+            self._set_balance(payer, lamports)
+
+    async def _refresh_loop(self, fetch: Callable[[List[Pubkey]], Awaitable[List[int]]]) -> None:
+        while True:
+            try:
+                await self.refresh_balances(fetch)
+            except Exception as exc:  # pylint: disable=broad-except
+                self.refresh_failures += 1
+                logger.warning("Fee payer balance refresh failed: %s", exc)
+            await asyncio.sleep(self.refresh_interval_s)
+
+    def start_refresh(self, fetch: Callable[[List[Pubkey]], Awaitable[List[int]]]) -> None:
+        if self._refresh_task is None:
+            self._refresh_task = asyncio.create_task(self._refresh_loop(fetch))
+
+    async def stop_refresh(self) -> None:
+        if self._refresh_task:
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+            self._refresh_task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "strategy": self.strategy,
+            "payers": [payer.snapshot() for payer in self.payers],
+            "healthy": sum(1 for payer in self.payers if not payer.low),
+            "low_balance_alarms": self.low_balance_alarms,
+            "refresh_failures": self.refresh_failures,
+        }
@@ -0,0 +1,75 @@
+"""
+Binary Merkle tree over plan hashes (hex SHA-256 digests).
+
+Leaves and inner nodes are domain-separated (RFC 6962 style) so an inner node
+can never be passed off as a leaf, and an odd node is promoted to the next
+level unchanged instead of being paired with itself.
+
+    leaf = sha256(0x00 || plan_hash bytes)
+    node = sha256(0x01 || left || right)
+"""
+
+from __future__ import annotations
+
+import hashlib
+from typing import Dict, List, Sequence
+
+_LEAF_PREFIX = b"\x00"
+_NODE_PREFIX = b"\x01"
+
+
+def leaf_hash(plan_hash: str) -> bytes:
+    return hashlib.sha256(_LEAF_PREFIX + bytes.fromhex(plan_hash)).digest()
+
+
+def node_hash(left: bytes, right: bytes) -> bytes:
+    return hashlib.sha256(_NODE_PREFIX + left + right).digest()
+
+
+def build_levels(plan_hashes: Sequence[str]) -> List[List[bytes]]:
+    """
+    All tree levels, leaves first; the last level holds only the root.
+    """
+    if not plan_hashes:
+        raise ValueError("Cannot build a Merkle tree without leaves")
+    levels = [[leaf_hash(h) for h in plan_hashes]]
+    while len(levels[-1]) > 1:
+        current = levels[-1]
+        parents = [node_hash(current[i], current[i + 1]) for i in range(0, len(current) - 1, 2)]
+        if len(current) % 2:
+            parents.append(current[-1])
+        levels.append(parents)
+    return levels
+
+
+def merkle_root(plan_hashes: Sequence[str]) -> str:
+    return build_levels(plan_hashes)[-1][0].hex()
+
+
+def inclusion_proof(levels: List[List[bytes]], index: int) -> List[Dict[str, str]]:
+    """
+    Sibling hashes from leaf to root; `side` says where the sibling sits.
+    Levels where the node was promoted without a sibling contribute no step.
+    """
+    proof: List[Dict[str, str]] = []
+    for level in levels[:-1]:
+        sibling = index ^ 1
+        if sibling < len(level):
+            proof.append({"side": "left" if sibling < index else "right", "hash": level[sibling].hex()})
+        index //= 2
+    return proof
+
+
+def root_from_proof(plan_hash: str, proof: Sequence[Dict[str, str]]) -> str:
+    current = leaf_hash(plan_hash)
+    for step in proof:
+        sibling = bytes.fromhex(step["hash"])
+        current = node_hash(sibling, current) if step["side"] == "left" else node_hash(current, sibling)
+    return current.hex()
+
+
+def verify_inclusion(plan_hash: str, proof: Sequence[Dict[str, str]], root: str) -> bool:
+    try:
+        return root_from_proof(plan_hash, proof) == root
+    except (KeyError, ValueError):
+        return False
@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import bisect
+from typing import Any, Dict, Sequence
+
+# Milliseconds; roughly log-spaced from sub-millisecond to multi-second
+DEFAULT_LATENCY_BUCKETS_MS = (
+    0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000,
+)
+
+
+class LatencyHistogram:
+    """
+    Fixed-bucket latency histogram (Prometheus-style upper bounds, plus +Inf).
+    Percentiles are estimated as the upper bound of the bucket they fall into.
+    """
+
+    __slots__ = ("bounds", "counts", "count", "total_ms", "max_ms")
+
+    def __init__(self, bounds: Sequence[float] = DEFAULT_LATENCY_BUCKETS_MS) -> None:
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, value_ms: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, value_ms)] += 1
+        self.count += 1
+        self.total_ms += value_ms
+        if value_ms > self.max_ms:
+            self.max_ms = value_ms
+
+    def percentile(self, q: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = q / 100.0 * self.count
+        seen = 0
+        for idx, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                return self.bounds[idx] if idx < len(self.bounds) else self.max_ms
+        return self.max_ms
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+            "p99_ms": self.percentile(99),
+            "max_ms": round(self.max_ms, 3),
+            "buckets": {
+                **{f"le_{bound}": c for bound, c in zip(self.bounds, self.counts)},
+                "le_inf": self.counts[-1],
+            },
+        }
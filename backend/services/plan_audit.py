@@ -0,0 +1,138 @@
+"""
+Bulk re-verification of stored plans against their anchors.
+
+Input is NDJSON, one stored plan per line:
+    {"session_id": "...", "plan_record": {...}}
+optionally with the expected "plan_hash" (used when the session has no stored
+anchor, e.g. auditing an export from another deployment).
+
+Lines are parsed and re-hashed in a process pool, in chunks; the parent only
+looks up the stored AnchorRecord.plan_hash per chunk (indexed reads) and
+compares. Mismatches can be written to an NDJSON report.
+
+    python -m services.plan_audit --plans plans-2025-11.ndjson --workers 8 \\
+        --mismatches mismatches.ndjson
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from typing import IO, Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from services.plan_hashing import plan_hash
+
+# (line number, session_id, recomputed hash, hash claimed by the line, error)
+HashedLine = Tuple[int, Optional[str], Optional[str], Optional[str], Optional[str]]
+
+
+def hash_chunk(chunk: List[Tuple[int, str]]) -> List[HashedLine]:
+    """
+    Worker: parses and re-hashes one chunk of NDJSON lines.
+    """
+    results: List[HashedLine] = []
+    for line_no, line in chunk:
+        try:
+            entry = json.loads(line)
+            results.append(
+                (line_no, entry["session_id"], plan_hash(entry["plan_record"]), entry.get("plan_hash"), None)
+            )
+        except (ValueError, KeyError, TypeError) as exc:
+            results.append((line_no, None, None, None, f"{type(exc).__name__}: {exc}"))
+    return results
+
+
+def _chunks(lines: Iterable[str], size: int) -> Iterator[List[Tuple[int, str]]]:
+    chunk: List[Tuple[int, str]] = []
+    for line_no, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        chunk.append((line_no, line))
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class PlanAudit:
+    def __init__(self, store: Any, mismatch_out: Optional[IO[str]] = None) -> None:
+        self.store = store
+        self.mismatch_out = mismatch_out
+        self.counts = {"checked": 0, "matched": 0, "mismatched": 0, "missing_anchor": 0, "unparseable": 0}
+
+    def _report(self, kind: str, **fields: Any) -> None:
+        if self.mismatch_out is not None:
+            self.mismatch_out.write(json.dumps({"kind": kind, **fields}, separators=(",", ":")) + "\n")
+
+    def compare(self, results: List[HashedLine]) -> None:
+        stored = self.store.plan_hashes([session_id for _, session_id, _, _, _ in results if session_id])
+        for line_no, session_id, computed, claimed, error in results:
+            if error is not None:
+                self.counts["unparseable"] += 1
+                self._report("unparseable", line=line_no, error=error)
+                continue
+            self.counts["checked"] += 1
+            expected = stored.get(session_id, claimed)
+            if expected is None:
+                self.counts["missing_anchor"] += 1
+                self._report("missing_anchor", line=line_no, session_id=session_id, computed=computed)
+            elif expected == computed:
+                self.counts["matched"] += 1
+            else:
+                self.counts["mismatched"] += 1
+                self._report(
+                    "mismatch", line=line_no, session_id=session_id, expected=expected, computed=computed
+                )
+
+    def run(self, lines: Iterable[str], workers: int, chunk_size: int) -> Dict[str, Any]:
+        started = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending: Set[Future] = set()
+            for chunk in _chunks(lines, chunk_size):
+                # Bounded window: the input is streamed, never loaded whole
+                if len(pending) >= workers * 2:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        self.compare(future.result())
+                pending.add(pool.submit(hash_chunk, chunk))
+            for future in pending:
+                self.compare(future.result())
+        elapsed = time.perf_counter() - started
+        return {
+            **self.counts,
+            "elapsed_s": round(elapsed, 3),
+            "plans_per_s": round(self.counts["checked"] / elapsed, 1) if elapsed else 0.0,
+        }
+
+
+def main(argv: Optional[Iterable[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m services.plan_audit", description="Re-verify plan hashes in bulk")
+    parser.add_argument("--plans", required=True, help="NDJSON of {session_id, plan_record[, plan_hash]}")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-size", type=int, default=2000, help="Lines per worker task")
+    parser.add_argument("--mismatches", help="Write mismatches / missing anchors to this NDJSON file")
+    args = parser.parse_args(list(argv) if argv is not None else None)
+
+    # Imported here so pool workers (which import this module) never open the store
+    from services.anchor_store import anchor_store
+
+    mismatch_out = open(args.mismatches, "w", encoding="utf-8") if args.mismatches else None
+    try:
+        with open(args.plans, "r", encoding="utf-8") as plans:
+            report = PlanAudit(anchor_store, mismatch_out).run(plans, args.workers, args.chunk_size)
+    finally:
+        if mismatch_out is not None:
+            mismatch_out.close()
+
+    json.dump(report, sys.stdout, indent=2)
+    sys.stdout.write("\n")
+    return 0 if report["mismatched"] == 0 and report["unparseable"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+"""
+Canonical plan hashing.
+
+The canonical form is fixed by the anchors already on-chain: compact JSON with
+sorted keys and ASCII escaping, exactly what
+`json.dumps(plan, sort_keys=True, separators=(",", ":"))` produces. Faster
+serializers (orjson & co.) differ on float formatting and non-ASCII text, so
+they would silently change hashes; instead the encoder is built once and
+reused, and digests of plans already seen are cached.
+
+The cache key is a BLAKE2 digest of `marshal.dumps(plan)`, which is several
+times cheaper than the canonical serialization. marshal output is type-exact
+(1, 1.0 and True differ), so equal keys imply an identical canonical form;
+the same plan with a different key order merely misses the cache.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import marshal
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Dict, Optional
+
+_ENCODER = json.JSONEncoder(sort_keys=True, separators=(",", ":"))
+
+
+def canonical_json(plan: Dict[str, Any]) -> bytes:
+    # ensure_ascii (the default) guarantees pure-ASCII output
+    return _ENCODER.encode(plan).encode("ascii")
+
+
+def plan_hash(plan: Dict[str, Any]) -> str:
+    """
+    SHA-256 hex digest of the canonical plan, without caching.
+    """
+    return hashlib.sha256(canonical_json(plan)).hexdigest()
+
+
+class PlanDigestCache:
+    def __init__(self, max_entries: int = 4096) -> None:
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[bytes, str]" = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(plan: Dict[str, Any]) -> Optional[bytes]:
+        try:
+            return hashlib.blake2b(marshal.dumps(plan), digest_size=16).digest()
+        except ValueError:
+            return None  # contains values marshal cannot encode; hash without caching
+
+    def plan_hash(self, plan: Dict[str, Any]) -> str:
+        key = self._key(plan)
+        if key is not None:
+            with self._lock:
+                cached = self._entries.get(key)
+                if cached is not None:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return cached
+        digest = plan_hash(plan)
+        self.misses += 1
+        if key is not None:
+            with self._lock:
+                self._entries[key] = digest
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return digest
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+plan_digest_cache = PlanDigestCache()
@@ -0,0 +1,145 @@
+"""
+Local assembly of VerifiablePresentation envelopes.
+
+`DensoDIDClient.request_presentation` round-trips to the gateway only to wrap
+credentials in an envelope and sign it. With a holder key configured
+(`DID_HOLDER_KEY_PATH`) the envelope is built and signed here instead, and
+assembled presentations are cached per (set of credential ids, challenge).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, FrozenSet, List, Optional, Sequence, Tuple
+
+from solders.keypair import Keypair
+
+from adapters.denso_did import DensoDIDClient
+from config import settings
+from services.did_local_verifier import canonicalize, did_document_cache, pubkey_to_multikey, sign_document
+
+PRESENTATION_CONTEXT = [
+    "https://www.w3.org/2018/credentials/v1",
+    "https://w3id.org/security/suites/ed25519-2020/v1",
+]
+
+
+def load_holder_keypair(path: str) -> Keypair:
+    """
+    Loads a solana-keygen style JSON file (an array of 64 secret-key bytes).
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        return Keypair.from_bytes(bytes(json.load(f)))
+
+
+class PresentationBuilder:
+    """
+    Builds holder-signed presentations (Ed25519Signature2020, proofPurpose
+    "authentication") that `LocalDIDVerifier` can check.
+
+    Cached presentations are shared between callers and must not be mutated.
+    """
+
+    def __init__(self, holder_did: Optional[str], keypair: Keypair, max_entries: int = 256) -> None:
+        self.keypair = keypair
+        self.public_key_multibase = pubkey_to_multikey(keypair.pubkey())
+        # The holder is its own subject: without a configured DID it is the key's did:key
+        self.holder_did = holder_did or f"did:key:{self.public_key_multibase}"
+        self.verification_method = f"{self.holder_did}#{self.public_key_multibase}"
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[FrozenSet[str], Optional[str]], Dict[str, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def did_document(self) -> Dict[str, Any]:
+        return {
+            "id": self.holder_did,
+            "verificationMethod": [
+                {
+                    "id": self.verification_method,
+                    "type": "Ed25519VerificationKey2020",
+                    "controller": self.holder_did,
+                    "publicKeyMultibase": self.public_key_multibase,
+                }
+            ],
+            "authentication": [self.verification_method],
+        }
+
+    @staticmethod
+    def cache_key(
+        credentials: Sequence[Dict[str, Any]], challenge: Optional[str]
+    ) -> Tuple[FrozenSet[str], Optional[str]]:
+        # Credentials without an id are keyed on their content
+        ids = frozenset(
+            vc.get("id") or "sha256:" + hashlib.sha256(canonicalize(vc)).hexdigest() for vc in credentials
+        )
+        return ids, challenge
+
+    def build(self, credentials: Sequence[Dict[str, Any]], challenge: Optional[str] = None) -> Dict[str, Any]:
+        key = self.cache_key(credentials, challenge)
+        cached = self._entries.get(key)
+        if cached is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return cached
+
+        self.misses += 1
+        envelope = {
+            "@context": list(PRESENTATION_CONTEXT),
+            "type": ["VerifiablePresentation"],
+            "verifiableCredential": list(credentials),
+            "id": f"urn:uuid:{uuid.uuid4()}",
+            "holder": self.holder_did,
+        }
+        presentation = sign_document(
+            envelope,
+            self.keypair,
+            self.verification_method,
+            proof_purpose="authentication",
+            challenge=challenge,
+        )
+        self._entries[key] = presentation
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+        return presentation
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "holder": self.holder_did,
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+async def assemble_presentation(
+    client: DensoDIDClient,
+    credentials: List[Dict[str, Any]],
+    challenge: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Builds the presentation locally when a holder key is configured,
+    otherwise asks the gateway.
+    """
+    if presentation_builder is not None:
+        return presentation_builder.build(credentials, challenge)
+    return await client.request_presentation(credentials)
+
+
+presentation_builder: Optional[PresentationBuilder] = None
+if settings.did_holder_key_path:
+    presentation_builder = PresentationBuilder(
+        holder_did=settings.did_holder_did,
+        keypair=load_holder_keypair(settings.did_holder_key_path),
+        max_entries=settings.did_presentation_cache_size,
+    )
+    # Our own holder key is always known to the local verifier
+    did_document_cache.put(presentation_builder.did_document())
@@ -1,11 +1,14 @@
 from __future__ import annotations
 
 import math
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, Tuple
 
-from data.battery_soh import get_latest_battery_soh, get_soh_capacity_kwh
-from data.vehicle_sessions import VEHICLE_SOC_HISTORY
 from data.vehicle_specs import get_vehicle_capacity_kwh
+from config import settings
+from services.charging_curves import charging_curves
+from services.soh_forecast import soh_forecaster
+from services.soc_series import soc_store
+from services.soh_store import soh_store
 
 DEFAULT_SESSION_ENERGY_KWH = 28.0
 SESSION_ACTIVATION_FEE_EUR = 0.75
@@ -18,13 +21,6 @@ POWER_PRICING_TIERS = (
 )
 
 
-def _to_float(value: Any, default: float = 0.0) -> float:
-    try:
-        return float(value)
-    except (TypeError, ValueError):
-        return default
-
-
 class PricingEngine:
     """
     Estimates charging costs by combining connector power, battery data and SOC history.
@@ -37,27 +33,46 @@ class PricingEngine:
     @staticmethod
     def _resolve_capacity_context(vehicle_vin: str, battery_id: Optional[str]) -> Dict[str, Any]:
         if battery_id:
-            soh_subject = get_latest_battery_soh(battery_id)
-            soh_capacity = get_soh_capacity_kwh(battery_id)
-            if soh_subject and soh_capacity is not None:
-                return {
+            soh_record = soh_store.latest(battery_id)
+            if soh_record and soh_record.max_capacity_kwh is not None:
+                context = {
                     "source": "battery_soh",
-                    "capacity_kwh": soh_capacity,
+                    "capacity_kwh": soh_record.max_capacity_kwh,
+                    "nominal_capacity_kwh": soh_record.max_capacity_kwh,
                     "battery_soh": {
                         "battery_id": battery_id,
-                        "soh_percent": _to_float(soh_subject.get("newSOHVal"), 0.0),
-                        "timestamp": soh_subject.get("newSOHTimeStamp"),
-                        "auto_corrected": soh_subject.get("_autoCorrected"),
+                        "soh_percent": soh_record.soh,
+                        "timestamp": soh_record.timestamp_iso,
+                        "auto_corrected": soh_record.auto_corrected,
                     },
                 }
+                forecast = soh_forecaster.forecast().battery(
+                    battery_id,
+                    threshold=settings.soh_derate_threshold,
+                    horizon_days=settings.soh_forecast_horizon_days,
+                )
+                if forecast and forecast["effective_capacity_today_kwh"] is not None:
+                    # SoC deltas are fractions of what the pack holds today, not of its nameplate
+                    context["source"] = "soh_forecast"
+                    context["capacity_kwh"] = forecast["effective_capacity_today_kwh"]
+                    context["soh_forecast"] = forecast
+                return context
 
         return {
             "source": "vehicle_specs",
             "capacity_kwh": get_vehicle_capacity_kwh(vehicle_vin),
         }
 
+    def estimate_energy(self, vehicle_vin: str, battery_id: Optional[str]) -> Dict[str, Any]:
+        """
+        Session energy estimate with its capacity context. Callers pricing many
+        connectors for one vehicle resolve it once and pass it to
+        `calculate_session_cost` as `energy_estimation`.
+        """
+        return self._estimate_energy_kwh(vehicle_vin, battery_id)
+
     def _estimate_energy_kwh(self, vehicle_vin: str, battery_id: Optional[str]) -> Dict[str, Any]:
-        session = VEHICLE_SOC_HISTORY.get(vehicle_vin)
+        series = soc_store.series(vehicle_vin)
         capacity_ctx = self._resolve_capacity_context(vehicle_vin, battery_id)
         estimation: Dict[str, Any] = {
             "energy_method": "default_fallback",
@@ -65,15 +80,12 @@ class PricingEngine:
             "estimated_energy_kwh": self.default_energy_kwh,
         }
 
-        if not session:
+        # The series covers the vehicle's whole history: estimate from its latest charging session
+        session = series.charging_window() if series is not None else None
+        if session is None:
             return estimation
 
-        values = session.get("values") or []
-        if len(values) < 2:
-            return estimation
-
-        start_soc = values[0]["value"]
-        end_soc = values[-1]["value"]
+        (_, start_soc), (_, end_soc) = session
         delta_soc_percent = max(end_soc - start_soc, 0)
         delta_soc_fraction = delta_soc_percent / 100.0
 
@@ -87,10 +99,34 @@ class PricingEngine:
                 "energy_method": "soc_history",
                 "estimated_energy_kwh": round(estimated_energy, 2),
                 "soc_delta_percent": round(delta_soc_percent, 2),
+                "soc_window": (start_soc / 100.0, end_soc / 100.0),
             }
         )
         return estimation
 
+    @staticmethod
+    def _estimate_charging(
+        vehicle_vin: str,
+        soc_window: Tuple[float, float],
+        capacity_kwh: float,
+        power_limit_kw: float,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Session duration over the SoC window, following the vehicle's learned
+        charging curve when there is one, otherwise at a flat power limit.
+        """
+        soc_from, soc_to = soc_window
+        if power_limit_kw <= 0 or soc_to <= soc_from:
+            return None
+        estimate = charging_curves.table.duration_h(vehicle_vin, soc_from, soc_to, capacity_kwh, power_limit_kw)
+        if estimate is None:
+            estimate = {
+                "duration_h": round((soc_to - soc_from) * capacity_kwh / power_limit_kw, 3),
+                "average_power_kw": power_limit_kw,
+                "curve_source": None,
+            }
+        return {**estimate, "power_limit_kw": power_limit_kw}
+
     @staticmethod
     def _determine_rate(power_kw: float) -> Dict[str, Any]:
         for tier in POWER_PRICING_TIERS:
@@ -118,7 +154,17 @@ class PricingEngine:
         battery_id: Optional[str] = None,
         reserved_connector: Optional[Dict[str, Any]] = None,
         energy_kwh_override: Optional[float] = None,
+        soc_window: Optional[Tuple[float, float]] = None,
+        power_limit_kw: Optional[float] = None,
+        energy_estimation: Optional[Dict[str, Any]] = None,
     ) -> Dict[str, Any]:
+        """
+        `soc_window` (fractions) and `power_limit_kw` (e.g. the battery's safe
+        limit) refine the charging duration estimate; without a window the SoC
+        history's latest charging session is used when available.
+        `energy_estimation` is a result of `estimate_energy` for this vehicle
+        and battery, reused instead of resolved again.
+        """
         connector = self._select_connector(station_snapshot, reserved_connector)
         if not connector:
             return {
@@ -131,7 +177,11 @@ class PricingEngine:
         tier = self._determine_rate(power_kw)
         rate = tier["rate_eur_per_kwh"]
 
-        energy_estimation = self._estimate_energy_kwh(vehicle_vin, battery_id)
+        if energy_estimation is None:
+            energy_estimation = self._estimate_energy_kwh(vehicle_vin, battery_id)
+        else:
+            # Shared between connectors (and cached): never modified in place
+            energy_estimation = dict(energy_estimation)
         energy_kwh = energy_estimation["estimated_energy_kwh"]
 
         if energy_kwh_override is not None:
@@ -143,6 +193,16 @@ class PricingEngine:
         energy_component = round(energy_kwh * rate, 2)
         total = round(energy_component + self.session_fee_eur, 2)
 
+        window = soc_window or energy_estimation.get("soc_window")
+        limit = min(power_kw, power_limit_kw) if power_limit_kw is not None else power_kw
+        charging = (
+            self._estimate_charging(
+                vehicle_vin, window, energy_estimation["capacity_context"]["capacity_kwh"], limit
+            )
+            if window
+            else None
+        )
+
         return {
             "currency": "EUR",
             "connector_id": connector.get("connector_id"),
@@ -154,6 +214,7 @@ class PricingEngine:
             "session_fee_eur": self.session_fee_eur,
             "total_eur": total,
             "estimation_context": energy_estimation,
+            "charging_estimate": charging,
         }
 
 
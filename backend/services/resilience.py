@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import asyncio
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling a dependency the breaker considers down."""
+
+    def __init__(self, name: str, retry_in_s: float):
+        super().__init__(f"Circuit '{name}' is open; retry in {retry_in_s:.1f}s")
+        self.name = name
+        self.retry_in_s = retry_in_s
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    closed    -> calls pass; `failure_threshold` failures in a row open the circuit
+    open      -> calls fail fast with CircuitOpenError for `reset_timeout_s`
+    half_open -> a single probe call is let through; success closes, failure re-opens
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout_s: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout_s = reset_timeout_s
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self.rejected = 0
+        self._probe_in_flight = False
+
+    def before_call(self) -> None:
+        if self.state == "closed":
+            return
+        now = time.monotonic()
+        if self.state == "open":
+            remaining = self.opened_at + self.reset_timeout_s - now
+            if remaining > 0:
+                self.rejected += 1
+                raise CircuitOpenError(self.name, remaining)
+            self.state = "half_open"
+        if self._probe_in_flight:
+            self.rejected += 1
+            raise CircuitOpenError(self.name, self.reset_timeout_s)
+        self._probe_in_flight = True
+
+    def record_success(self) -> None:
+        self._probe_in_flight = False
+        self.consecutive_failures = 0
+        self.state = "closed"
+
+    def record_failure(self) -> None:
+        self._probe_in_flight = False
+        self.consecutive_failures += 1
+        if self.state == "half_open" or self.consecutive_failures >= self.failure_threshold:
+            if self.state != "open":
+                self.times_opened += 1
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+    async def call(
+        self,
+        fn: Callable[[], Awaitable[T]],
+        is_failure: Callable[[BaseException], bool],
+    ) -> T:
+        """
+        Runs `fn` through the breaker. Exceptions for which `is_failure` is false
+        (e.g. a 4xx answer) still prove the dependency is up and count as success.
+        """
+        self.before_call()
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            self._probe_in_flight = False
+            raise
+        except Exception as exc:
+            if is_failure(exc):
+                self.record_failure()
+            else:
+                self.record_success()
+            raise
+        self.record_success()
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "times_opened": self.times_opened,
+            "rejected": self.rejected,
+        }
+
+
+async def retry_async(
+    fn: Callable[[], Awaitable[T]],
+    attempts: int,
+    base_delay_s: float,
+    max_delay_s: float = 2.0,
+    retry_on: Optional[Callable[[BaseException], bool]] = None,
+) -> T:
+    """
+    Calls `fn` up to `attempts` times, sleeping with full-jitter exponential
+    backoff between tries. Only use for idempotent operations.
+    """
+    attempt = 0
+    while True:
+        try:
+            return await fn()
+        except Exception as exc:
+            attempt += 1
+            if attempt >= attempts or (retry_on is not None and not retry_on(exc)):
+                raise
+            await asyncio.sleep(random.uniform(0, min(max_delay_s, base_delay_s * 2 ** (attempt - 1))))
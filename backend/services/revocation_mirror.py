@@ -0,0 +1,274 @@
+"""
+Local mirror of SmtRevocationList2023 status lists.
+
+Snapshot payload (file or endpoint):
+    {"statusListCredential": "<registry url>", "sequence": 12, "revoked": ["<64-hex index>", ...]}
+Incremental update:
+    {"statusListCredential": "<registry url>", "from_sequence": 12, "sequence": 13,
+     "revoked": [...], "reinstated": [...]}
+
+Revoked indices are kept as one sorted, fixed-width byte buffer (32 bytes per
+entry, binary-searched) plus a small set overlay for incremental updates that is
+folded back into the buffer once it grows.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import glob
+import json
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+import httpx
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+INDEX_BYTES = 32
+_COMPACT_OVERLAY_AT = 4096
+
+
+class StatusList:
+    __slots__ = (
+        "url",
+        "sequence",
+        "source",
+        "loaded_at",
+        "updated_at",
+        "_sorted",
+        "_count",
+        "_added",
+        "_removed",
+    )
+
+    def __init__(self, url: str) -> None:
+        self.url = url
+        self.sequence = -1
+        self.source: Optional[str] = None
+        self.loaded_at: Optional[datetime] = None
+        self.updated_at = 0.0  # monotonic, for staleness checks
+        self._sorted = b""
+        self._count = 0
+        self._added: Set[bytes] = set()
+        self._removed: Set[bytes] = set()
+
+    @staticmethod
+    def _key(index: str) -> bytes:
+        key = bytes.fromhex(index)
+        if len(key) != INDEX_BYTES:
+            raise ValueError(f"statusListIndex must be {INDEX_BYTES} bytes of hex")
+        return key
+
+    def _in_sorted(self, key: bytes) -> bool:
+        lo, hi = 0, self._count
+        buf = self._sorted
+        while lo < hi:
+            mid = (lo + hi) // 2
+            probe = buf[mid * INDEX_BYTES:(mid + 1) * INDEX_BYTES]
+            if probe < key:
+                lo = mid + 1
+            elif probe > key:
+                hi = mid
+            else:
+                return True
+        return False
+
+    def is_revoked(self, index: str) -> bool:
+        key = self._key(index)
+        if key in self._added:
+            return True
+        if key in self._removed:
+            return False
+        return self._in_sorted(key)
+
+    def _members(self) -> Set[bytes]:
+        buf = self._sorted
+        members = {buf[i:i + INDEX_BYTES] for i in range(0, len(buf), INDEX_BYTES)}
+        return (members | self._added) - self._removed
+
+    def _rebuild(self, members: Iterable[bytes]) -> None:
+        ordered = sorted(members)
+        self._sorted = b"".join(ordered)
+        self._count = len(ordered)
+        self._added.clear()
+        self._removed.clear()
+
+    def load_snapshot(self, sequence: int, revoked: Iterable[str], source: str) -> None:
+        self._rebuild(self._key(index) for index in revoked)
+        self._mark(sequence, source)
+
+    def apply_delta(self, from_sequence: int, sequence: int, revoked: Iterable[str], reinstated: Iterable[str], source: str) -> bool:
+        """
+        Applies an incremental update; returns False when it does not follow
+        the current sequence (a full snapshot is needed).
+        """
+        if from_sequence != self.sequence:
+            return False
+        for index in revoked:
+            key = self._key(index)
+            self._removed.discard(key)
+            self._added.add(key)
+        for index in reinstated:
+            key = self._key(index)
+            self._added.discard(key)
+            self._removed.add(key)
+        if len(self._added) + len(self._removed) > _COMPACT_OVERLAY_AT:
+            self._rebuild(self._members())
+        self._mark(sequence, source)
+        return True
+
+    def _mark(self, sequence: int, source: str) -> None:
+        self.sequence = sequence
+        self.source = source
+        self.loaded_at = datetime.now(timezone.utc)
+        self.updated_at = time.monotonic()
+
+    def freshness(self) -> Dict[str, Any]:
+        return {
+            "status_list": self.url,
+            "sequence": self.sequence,
+            "source": self.source,
+            "loaded_at": self.loaded_at.isoformat() if self.loaded_at else None,
+            "age_s": round(time.monotonic() - self.updated_at, 3) if self.loaded_at else None,
+            "revoked_count": self._count
+            + sum(1 for key in self._added if not self._in_sorted(key))
+            - sum(1 for key in self._removed if self._in_sorted(key)),
+            "pending_overlay": len(self._added) + len(self._removed),
+        }
+
+
+class RevocationMirror:
+    """
+    Answers "is this credential revoked?" from local status-list copies.
+    `status()` returns True / False, or None when the list is unknown or stale.
+    """
+
+    def __init__(self, max_staleness_s: float, endpoint: Optional[str] = None) -> None:
+        self.max_staleness_s = max_staleness_s
+        self.endpoint = endpoint
+        self._lists: Dict[str, StatusList] = {}
+        self._refresh_task: Optional[asyncio.Task] = None
+        self.lookups = 0
+        self.unknown = 0
+        self.resync_needed = 0
+
+    def _list(self, url: str) -> StatusList:
+        status_list = self._lists.get(url)
+        if status_list is None:
+            status_list = self._lists[url] = StatusList(url)
+        return status_list
+
+    def apply(self, payload: Dict[str, Any], source: str) -> bool:
+        """
+        Applies a snapshot or an incremental update payload.
+        """
+        status_list = self._list(payload["statusListCredential"])
+        sequence = int(payload["sequence"])
+        if "from_sequence" not in payload:
+            status_list.load_snapshot(sequence, payload.get("revoked", []), source)
+            return True
+        applied = status_list.apply_delta(
+            int(payload["from_sequence"]),
+            sequence,
+            payload.get("revoked", []),
+            payload.get("reinstated", []),
+            source,
+        )
+        if not applied:
+            self.resync_needed += 1
+        return applied
+
+    def load_directory(self, path: str) -> int:
+        """
+        Loads every *.json file in `path`: snapshots first, then updates by sequence.
+        """
+        payloads: List[tuple] = []
+        for file_path in glob.glob(os.path.join(path, "*.json")):
+            with open(file_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            for payload in data if isinstance(data, list) else [data]:
+                payloads.append((payload, file_path))
+        payloads.sort(key=lambda item: ("from_sequence" in item[0], int(item[0]["sequence"])))
+        return sum(1 for payload, file_path in payloads if self.apply(payload, f"file:{file_path}"))
+
+    def status(self, credential: Dict[str, Any]) -> Optional[bool]:
+        entry = credential.get("credentialStatus") or {}
+        url = entry.get("statusListCredential")
+        index = entry.get("statusListIndex")
+        if not url or not index:
+            return False  # credential does not participate in revocation
+        self.lookups += 1
+        status_list = self._lists.get(url)
+        if status_list is None and self.endpoint:
+            self._list(url)  # tracked from now on, filled by the refresh loop
+        # Staleness only applies when an endpoint can keep lists fresh; file snapshots are static
+        stale = bool(self.endpoint) and status_list is not None and (
+            time.monotonic() - status_list.updated_at > self.max_staleness_s
+        )
+        if status_list is None or status_list.loaded_at is None or stale:
+            self.unknown += 1
+            return None
+        try:
+            return status_list.is_revoked(index)
+        except ValueError:
+            self.unknown += 1
+            return None
+
+    async def refresh(self, client: httpx.AsyncClient) -> None:
+        for url, status_list in list(self._lists.items()):
+            params: Dict[str, Any] = {"list": url}
+            if status_list.sequence >= 0:
+                params["since"] = status_list.sequence
+            resp = await client.get(self.endpoint, params=params)
+            resp.raise_for_status()
+            data = resp.json()
+            for payload in data if isinstance(data, list) else [data]:
+                if int(payload.get("sequence", -1)) == status_list.sequence and "revoked" not in payload:
+                    status_list.updated_at = time.monotonic()  # unchanged, but confirmed fresh
+                    continue
+                if not self.apply(payload, f"endpoint:{self.endpoint}"):
+                    # Gap in the update chain: fetch the full snapshot next round
+                    status_list.sequence = -1
+
+    async def _refresh_loop(self, interval_s: float) -> None:
+        async with httpx.AsyncClient(timeout=5.0) as client:
+            while True:
+                try:
+                    await self.refresh(client)
+                except Exception as exc:  # pylint: disable=broad-except
+                    logger.warning("Revocation mirror refresh failed: %s", exc)
+                await asyncio.sleep(interval_s)
+
+    def start_refresh(self, interval_s: float) -> None:
+        if self.endpoint and self._refresh_task is None:
+            self._refresh_task = asyncio.create_task(self._refresh_loop(interval_s))
+
+    async def stop_refresh(self) -> None:
+        if self._refresh_task:
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+            self._refresh_task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "lookups": self.lookups,
+            "unknown": self.unknown,
+            "resync_needed": self.resync_needed,
+            "lists": [status_list.freshness() for status_list in self._lists.values()],
+        }
+
+
+revocation_mirror = RevocationMirror(
+    max_staleness_s=settings.did_revocation_max_staleness_s,
+    endpoint=settings.did_revocation_endpoint,
+)
+if settings.did_revocation_snapshot_dir:
+    revocation_mirror.load_directory(settings.did_revocation_snapshot_dir)
@@ -0,0 +1,418 @@
+"""
+Compact State-of-Charge time series.
+
+`VEHICLE_SOC_HISTORY` keeps every sample as a dict with an ISO timestamp
+string (~290 bytes per sample); vehicles report every few seconds. Here each
+VIN holds its samples as arrays instead:
+
+- a growable head of int64 epoch-millisecond timestamps and float32 values
+  (12 bytes/sample) that takes appends,
+- sealed, append-only chunks of `CHUNK_SIZE` samples where timestamps are
+  delta-encoded against the chunk start in the narrowest unsigned dtype that
+  fits (2 bytes/sample at a few seconds' cadence) next to the float32 values.
+
+The latest and first samples are kept aside, at the precision they were
+reported with, for O(1) reads; range queries
+only decode the chunks overlapping the window. Long ranges can be reduced for
+charts with LTTB (shape-preserving) or min-max (envelope-preserving)
+downsampling.
+
+Samples are append-only: one older than the series' latest is dropped and
+counted in `out_of_order`.
+
+A series spans a vehicle's whole life, not one session. `charging_window`
+finds the most recent charging session: the last run of samples with no
+reporting gap over `SESSION_GAP_MS` and no drop over `SESSION_DROP_PCT`
+that gained at least `SESSION_MIN_RISE_PCT`.
+"""
+
+from __future__ import annotations
+
+import math
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timezone
+from threading import Lock
+from typing import Any, Dict, List, Literal, Optional, Sequence, Tuple
+
+import numpy as np
+
+from data.vehicle_sessions import VEHICLE_SOC_HISTORY
+
+CHUNK_SIZE = 4096
+_INITIAL_HEAD = 16
+# Below this many samples, appending one by one beats building arrays
+_SCALAR_APPEND_MAX = 16
+_DELTA_DTYPES = (np.uint16, np.uint32, np.uint64)
+
+SOC_PATH = "Vehicle.Powertrain.BatteryManagement.Battery.SOC"
+
+# Charging session boundaries: a longer silence or a larger drop (the car drove) ends a session
+SESSION_GAP_MS = 12 * 3600 * 1000
+SESSION_DROP_PCT = 0.5
+SESSION_MIN_RISE_PCT = 1.0
+_SESSION_LOOKBACK_MS = 24 * 3600 * 1000
+
+Sample = Tuple[int, float]  # (epoch ms, value)
+DownsampleMethod = Literal["lttb", "minmax"]
+
+
+def to_epoch_ms(value: Any) -> int:
+    """
+    Epoch milliseconds from a number (already epoch ms), an ISO string or a datetime.
+    """
+    if isinstance(value, bool):
+        raise TypeError("timestamp must be epoch milliseconds or an ISO string")
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    if isinstance(value, (float, np.floating)):
+        if not math.isfinite(value):
+            raise ValueError(f"timestamp {value} is not finite")
+        return int(round(value))
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(round(value.timestamp() * 1000.0))
+
+
+def iso_from_ms(epoch_ms: int) -> str:
+    moment = datetime.fromtimestamp(epoch_ms / 1000.0, tz=timezone.utc)
+    timespec = "milliseconds" if epoch_ms % 1000 else "seconds"
+    return moment.isoformat(timespec=timespec).replace("+00:00", "Z")
+
+
+class _Chunk:
+    __slots__ = ("start_ms", "end_ms", "deltas", "values")
+
+    def __init__(self, timestamps: np.ndarray, values: np.ndarray) -> None:
+        self.start_ms = int(timestamps[0])
+        self.end_ms = int(timestamps[-1])
+        deltas = np.diff(timestamps, prepend=timestamps[0])
+        dtype = next(d for d in _DELTA_DTYPES if int(deltas.max()) <= np.iinfo(d).max)
+        self.deltas = deltas.astype(dtype)
+        self.values = values.astype(np.float32, copy=True)
+
+    def timestamps(self) -> np.ndarray:
+        return self.start_ms + np.cumsum(self.deltas, dtype=np.int64)
+
+    @property
+    def nbytes(self) -> int:
+        return self.deltas.nbytes + self.values.nbytes
+
+
+class SocSeries:
+    def __init__(self, path: str = SOC_PATH, unit: str = "percent") -> None:
+        self.path = path
+        self.unit = unit
+        self._chunks: List[_Chunk] = []
+        self._chunk_starts: List[int] = []
+        self._head_ts = np.empty(_INITIAL_HEAD, dtype=np.int64)
+        self._head_values = np.empty(_INITIAL_HEAD, dtype=np.float32)
+        self._head_len = 0
+        self._first: Optional[Sample] = None
+        self._latest: Optional[Sample] = None
+        self._lock = Lock()
+        self.count = 0
+        self.out_of_order = 0
+
+    def append(self, epoch_ms: int, value: float) -> bool:
+        with self._lock:
+            if self._latest is not None and epoch_ms < self._latest[0]:
+                self.out_of_order += 1
+                return False
+            if self._head_len == len(self._head_ts):
+                self._grow_head()
+            self._head_ts[self._head_len] = epoch_ms
+            self._head_values[self._head_len] = value
+            self._head_len += 1
+            self._accepted(epoch_ms, value, 1)
+            return True
+
+    def extend(self, timestamps: np.ndarray, values: np.ndarray) -> int:
+        """
+        Appends a batch of samples (epoch ms, sorted); returns how many were kept.
+        """
+        timestamps = np.asarray(timestamps, dtype=np.int64)
+        values = np.asarray(values, dtype=np.float64)
+        with self._lock:
+            floor = self._latest[0] if self._latest is not None else np.iinfo(np.int64).min
+            # Keep the monotonic run: a sample must not precede anything already stored
+            keep = timestamps >= np.maximum.accumulate(np.maximum(timestamps, floor))
+            dropped = len(timestamps) - int(keep.sum())
+            self.out_of_order += dropped
+            timestamps, values = timestamps[keep], values[keep]
+            position = 0
+            while position < len(timestamps):
+                if self._head_len == len(self._head_ts):
+                    self._grow_head()
+                take = min(len(self._head_ts) - self._head_len, len(timestamps) - position)
+                head = slice(self._head_len, self._head_len + take)
+                self._head_ts[head] = timestamps[position : position + take]
+                self._head_values[head] = values[position : position + take]
+                self._head_len += take
+                position += take
+            if len(timestamps):
+                first = (int(timestamps[0]), float(values[0]))
+                self._accepted(int(timestamps[-1]), float(values[-1]), len(timestamps), first=first)
+            return len(timestamps)
+
+    def _accepted(self, epoch_ms: int, value: float, count: int, first: Optional[Sample] = None) -> None:
+        if self._first is None:
+            self._first = first or (epoch_ms, float(value))
+        self._latest = (epoch_ms, float(value))
+        self.count += count
+
+    def _grow_head(self) -> None:
+        if self._head_len >= CHUNK_SIZE:
+            self._seal()
+            return
+        size = min(len(self._head_ts) * 2, CHUNK_SIZE)
+        self._head_ts = np.resize(self._head_ts, size)
+        self._head_values = np.resize(self._head_values, size)
+
+    def _seal(self) -> None:
+        chunk = _Chunk(self._head_ts[: self._head_len], self._head_values[: self._head_len])
+        self._chunks.append(chunk)
+        self._chunk_starts.append(chunk.start_ms)
+        self._head_len = 0
+
+    def latest(self) -> Optional[Sample]:
+        return self._latest
+
+    def first(self) -> Optional[Sample]:
+        return self._first
+
+    def charging_window(self) -> Optional[Tuple[Sample, Sample]]:
+        """
+        (start, peak) samples of the most recent charging session, or None
+        when the series has none. Only the tail of the series is decoded; the
+        look-back widens until the session's start is in view.
+        """
+        first, latest = self._first, self._latest
+        if latest is None:
+            return None
+        lookback = _SESSION_LOOKBACK_MS
+        while True:
+            start_ms = latest[0] - lookback
+            complete = start_ms <= first[0]
+            timestamps, values = self.range(None if complete else start_ms)
+            session = _last_session(timestamps, values)
+            # A run starting at the window's edge may reach further back
+            if session is not None and (session[0] > 0 or complete):
+                _, low, peak = session
+                # Decoded values are float32: report the kept full-precision ends where they match
+                start = first if complete and low == 0 else (int(timestamps[low]), float(values[low]))
+                end = latest if peak == len(values) - 1 else (int(timestamps[peak]), float(values[peak]))
+                return start, end
+            if complete:
+                return None
+            lookback *= 4
+
+    def range(self, start_ms: Optional[int] = None, end_ms: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Samples with start_ms <= t < end_ms, as (int64 epoch ms, float32 values).
+        """
+        lo = np.iinfo(np.int64).min if start_ms is None else start_ms
+        hi = np.iinfo(np.int64).max if end_ms is None else end_ms
+        with self._lock:
+            first_chunk = max(bisect_right(self._chunk_starts, lo) - 1, 0)
+            last_chunk = bisect_left(self._chunk_starts, hi)
+            parts = [
+                (chunk.timestamps(), chunk.values)
+                for chunk in self._chunks[first_chunk:last_chunk]
+                if chunk.end_ms >= lo
+            ]
+            parts.append((self._head_ts[: self._head_len].copy(), self._head_values[: self._head_len].copy()))
+        timestamps = np.concatenate([part[0] for part in parts])
+        values = np.concatenate([part[1] for part in parts])
+        window = slice(np.searchsorted(timestamps, lo, "left"), np.searchsorted(timestamps, hi, "left"))
+        return timestamps[window], values[window]
+
+    def samples(self) -> List[Dict[str, Any]]:
+        """
+        The series in the `VEHICLE_SOC_HISTORY` "values" shape.
+        """
+        timestamps, values = self.range()
+        return [
+            {"timestamp": iso_from_ms(int(ts)), "value": float(value)}
+            for ts, value in zip(timestamps, values)
+        ]
+
+    @property
+    def nbytes(self) -> int:
+        return sum(chunk.nbytes for chunk in self._chunks) + self._head_ts.nbytes + self._head_values.nbytes
+
+
+def lttb(timestamps: np.ndarray, values: np.ndarray, points: int) -> np.ndarray:
+    """
+    Indices of the `points` samples Largest-Triangle-Three-Buckets keeps.
+    """
+    n = len(timestamps)
+    if points >= n or points < 3:
+        return np.arange(n)
+    x = (timestamps - timestamps[0]).astype(np.float64)
+    y = values.astype(np.float64)
+    every = (n - 2) / (points - 2)
+    bounds = (np.arange(points - 1) * every).astype(np.int64) + 1
+    bounds[-1] = n - 1
+    selected = np.empty(points, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    anchor = 0
+    for bucket in range(points - 2):
+        start, end = bounds[bucket], bounds[bucket + 1]
+        next_end = bounds[bucket + 2] if bucket + 2 < len(bounds) else n
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+        area = np.abs(
+            (x[anchor] - avg_x) * (y[start:end] - y[anchor]) - (x[anchor] - x[start:end]) * (avg_y - y[anchor])
+        )
+        anchor = start + int(area.argmax())
+        selected[bucket + 1] = anchor
+    return selected
+
+
+def minmax(values: np.ndarray, points: int) -> np.ndarray:
+    """
+    Indices of both ends plus each interior bucket's minimum and maximum, at
+    most `points` in total.
+    """
+    n = len(values)
+    if points >= n:
+        return np.arange(n)
+    ends = np.array([0, n - 1])
+    # The two ends are part of the budget; the interior gets two per bucket
+    buckets = min((points - 2) // 2, n - 2)
+    if buckets < 1:
+        return ends[: max(points, 0)]
+    interior = values[1 : n - 1]
+    edges = np.linspace(0, n - 2, buckets + 1).astype(np.int64)[:-1]
+    bucket_of = np.repeat(np.arange(buckets), np.diff(np.append(edges, n - 2)))
+    picked = [ends]
+    for reduce in (np.minimum, np.maximum):
+        extreme = reduce.reduceat(interior, edges)
+        hits = np.flatnonzero(interior == extreme[bucket_of])
+        _, first_hit = np.unique(bucket_of[hits], return_index=True)
+        picked.append(hits[first_hit] + 1)
+    return np.unique(np.concatenate(picked))
+
+
+def _last_session(timestamps: np.ndarray, values: np.ndarray) -> Optional[Tuple[int, int, int]]:
+    """
+    (run start, lowest, peak) indices of the last run that rose by `SESSION_MIN_RISE_PCT`,
+    where runs are split at reporting gaps and drops.
+    """
+    if len(values) < 2:
+        return None
+    breaks = np.flatnonzero((np.diff(timestamps) > SESSION_GAP_MS) | (np.diff(values) < -SESSION_DROP_PCT)) + 1
+    starts = np.concatenate(([0], breaks))
+    ends = np.concatenate((breaks, [len(values)]))
+    for start, end in zip(starts[::-1], ends[::-1]):
+        # Idle or slow drain around the charge stays in the run: take its largest rise
+        run = values[start:end]
+        peak = start + int(np.argmax(run - np.minimum.accumulate(run)))
+        low = start + int(np.argmin(values[start : peak + 1]))
+        if values[peak] - values[low] >= SESSION_MIN_RISE_PCT:
+            return int(start), int(low), int(peak)
+    return None
+
+
+def downsample(
+    timestamps: np.ndarray, values: np.ndarray, points: int, method: DownsampleMethod = "lttb"
+) -> Tuple[np.ndarray, np.ndarray]:
+    selected = lttb(timestamps, values, points) if method == "lttb" else minmax(values, points)
+    return timestamps[selected], values[selected]
+
+
+class SocStore:
+    def __init__(self) -> None:
+        self._series: Dict[str, SocSeries] = {}
+        self._lock = Lock()
+        self.version = 0
+
+    @classmethod
+    def from_history(cls, history: Dict[str, Dict[str, Any]]) -> "SocStore":
+        store = cls()
+        for vin, session in history.items():
+            values = session.get("values") or []
+            series = store.series(
+                vin, create=True, path=session.get("path", SOC_PATH), unit=session.get("unit", "percent")
+            )
+            series.extend(
+                np.fromiter((to_epoch_ms(v["timestamp"]) for v in values), dtype=np.int64, count=len(values)),
+                np.fromiter((v["value"] for v in values), dtype=np.float64, count=len(values)),
+            )
+        store.version += 1
+        return store
+
+    def series(self, vin: str, create: bool = False, **kwargs: Any) -> Optional[SocSeries]:
+        series = self._series.get(vin)
+        if series is None and create:
+            with self._lock:
+                series = self._series.setdefault(vin, SocSeries(**kwargs))
+        return series
+
+    def append(self, vin: str, timestamp: Any, value: float) -> bool:
+        accepted = self.series(vin, create=True).append(to_epoch_ms(timestamp), value)
+        if accepted:
+            self.version += 1
+        return accepted
+
+    def extend(self, vin: str, timestamps: Sequence[int], values: Sequence[float]) -> int:
+        """
+        Appends samples (epoch ms, sorted) to `vin`'s series; returns how many were kept.
+        """
+        series = self.series(vin, create=True)
+        if len(timestamps) < _SCALAR_APPEND_MAX:
+            kept = sum(series.append(int(ts), float(value)) for ts, value in zip(timestamps, values))
+        else:
+            kept = series.extend(np.asarray(timestamps), np.asarray(values))
+        if kept:
+            self.version += 1
+        return kept
+
+    def vins(self) -> List[str]:
+        return list(self._series)
+
+    def latest(self, vin: str) -> Optional[Sample]:
+        series = self._series.get(vin)
+        return series.latest() if series else None
+
+    def first(self, vin: str) -> Optional[Sample]:
+        series = self._series.get(vin)
+        return series.first() if series else None
+
+    def range(self, vin: str, start: Any = None, end: Any = None) -> Tuple[np.ndarray, np.ndarray]:
+        series = self._series.get(vin)
+        if series is None:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        return series.range(
+            None if start is None else to_epoch_ms(start),
+            None if end is None else to_epoch_ms(end),
+        )
+
+    def downsample(
+        self,
+        vin: str,
+        start: Any = None,
+        end: Any = None,
+        points: int = 500,
+        method: DownsampleMethod = "lttb",
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        timestamps, values = self.range(vin, start, end)
+        return downsample(timestamps, values, points, method)
+
+    def stats(self) -> Dict[str, Any]:
+        series = list(self._series.values())
+        samples = sum(s.count for s in series)
+        nbytes = sum(s.nbytes for s in series)
+        return {
+            "vehicles": len(series),
+            "samples": samples,
+            "bytes": nbytes,
+            "bytes_per_sample": round(nbytes / samples, 2) if samples else None,
+            "out_of_order": sum(s.out_of_order for s in series),
+            "version": self.version,
+        }
+
+
+soc_store = SocStore.from_history(VEHICLE_SOC_HISTORY)
@@ -0,0 +1,271 @@
+"""
+Fleet-wide State-of-Health degradation forecasting.
+
+One vectorized NumPy pass over every SoH record in the store:
+
+1. Fleet prior: least squares of the latest SoH on battery age, charge cycles
+   and impedance, giving a degradation rate per month of age and per cycle.
+   Each battery's prior slope (SoH %/day) follows from its own cycles per day.
+2. Own trend: per-battery least-squares slope over its observed
+   (previousSOH, newSOH) points, computed for all batteries at once with
+   grouped sums (np.bincount).
+3. The two are blended by how much history the battery has (observation
+   span). Own slopes are clamped at zero before blending: SoH does not
+   recover, upward steps are BMS re-calibrations (`_autoCorrected`).
+
+The forecast is cached against the SoH store version, so it is refit only
+when new SoH records arrive.
+"""
+
+from __future__ import annotations
+
+import time
+from threading import Lock
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from services.soh_store import SohStore, soh_store
+
+SECONDS_PER_DAY = 86_400.0
+DAYS_PER_MONTH = 30.44
+# Used when the fleet is too small (or too noisy) to fit a negative degradation rate
+DEFAULT_DEGRADATION_PER_YEAR = 2.0
+# Days of own history at which a battery's trend and the fleet prior weigh equally
+HISTORY_HALF_WEIGHT_DAYS = 180.0
+RIDGE_PENALTY = 0.01
+
+
+class SohForecast:
+    """
+    Per-battery forecast arrays, aligned with `battery_ids`.
+    """
+
+    def __init__(
+        self,
+        battery_ids: List[str],
+        soh_now: np.ndarray,
+        measured_at: np.ndarray,
+        slope_per_day: np.ndarray,
+        max_capacity_kwh: np.ndarray,
+        fleet_coefficients: Dict[str, float],
+        version: int,
+        fit_s: float,
+    ) -> None:
+        self.battery_ids = battery_ids
+        self.soh_now = soh_now
+        self.measured_at = measured_at  # epoch seconds of the latest record
+        self.slope_per_day = slope_per_day  # SoH percent per day, <= 0
+        self.max_capacity_kwh = max_capacity_kwh
+        self.fleet_coefficients = fleet_coefficients
+        self.version = version
+        self.fit_s = fit_s
+        self._index = {battery_id: i for i, battery_id in enumerate(battery_ids)}
+
+    def soh_at(self, when: float, rows: Any = slice(None)) -> np.ndarray:
+        days = np.maximum(when - self.measured_at[rows], 0.0) / SECONDS_PER_DAY
+        return self.soh_now[rows] + self.slope_per_day[rows] * days
+
+    def days_until(self, threshold: float, now: Optional[float] = None, rows: Any = slice(None)) -> np.ndarray:
+        """
+        Days from `now` until each battery is predicted to fall below
+        `threshold` (0 when already below, inf when not degrading).
+        """
+        now = time.time() if now is None else now
+        soh = self.soh_at(now, rows)
+        slope = self.slope_per_day[rows]
+        with np.errstate(divide="ignore"):
+            days = np.where(slope < 0, (soh - threshold) / -slope, np.inf)
+        return np.where(soh <= threshold, 0.0, days)
+
+    def _evaluate(
+        self, threshold: float, horizon_days: float, rows: Any = slice(None)
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        now = time.time()
+        return (
+            self.soh_at(now, rows),
+            self.soh_at(now + horizon_days * SECONDS_PER_DAY, rows),
+            self.days_until(threshold, now, rows),
+        )
+
+    def _row(
+        self,
+        i: int,
+        evaluated: Tuple[np.ndarray, np.ndarray, np.ndarray],
+        threshold: float,
+        horizon_days: float,
+        at: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        Battery `i`'s forecast; `at` is its position in `evaluated` when that
+        covers only some batteries.
+        """
+        position = i if at is None else at
+        soh_today, soh_horizon, days = (float(values[position]) for values in evaluated)
+        capacity = float(self.max_capacity_kwh[i])
+        return {
+            "battery_id": self.battery_ids[i],
+            "soh_today": round(soh_today, 2),
+            "soh_in_horizon": round(soh_horizon, 2),
+            "horizon_days": horizon_days,
+            "degradation_per_year": round(abs(float(self.slope_per_day[i])) * 365.0, 3),
+            "below_threshold": soh_today <= threshold,
+            "days_until_threshold": None if np.isinf(days) else round(days, 1),
+            "effective_capacity_today_kwh": None if np.isnan(capacity) else round(capacity * soh_today / 100.0, 2),
+            "effective_capacity_in_horizon_kwh": (
+                None if np.isnan(capacity) else round(capacity * soh_horizon / 100.0, 2)
+            ),
+        }
+
+    def battery(self, battery_id: str, threshold: float, horizon_days: float) -> Optional[Dict[str, Any]]:
+        i = self._index.get(battery_id)
+        if i is None:
+            return None
+        # Evaluate this battery only: per-request lookups must not scale with the fleet
+        evaluated = self._evaluate(threshold, horizon_days, slice(i, i + 1))
+        return self._row(i, evaluated, threshold, horizon_days, at=0)
+
+    def crossing(self, threshold: float, within_days: float) -> List[Dict[str, Any]]:
+        """
+        Batteries predicted to be below `threshold` within `within_days`, soonest first.
+        """
+        evaluated = self._evaluate(threshold, within_days)
+        days = evaluated[2]
+        candidates = np.flatnonzero(days <= within_days)
+        order = candidates[np.argsort(days[candidates], kind="stable")]
+        return [self._row(int(i), evaluated, threshold, within_days) for i in order]
+
+
+def _fleet_prior(
+    soh: np.ndarray, age_months: np.ndarray, cycles: np.ndarray, impedance: np.ndarray
+) -> Tuple[np.ndarray, Dict[str, float]]:
+    """
+    Prior slope (SoH %/day) per battery from the fleet-wide regression.
+    """
+    known = ~(np.isnan(age_months) | np.isnan(cycles) | np.isnan(impedance))
+    coef = np.zeros(4)
+    if known.sum() >= 8:
+        # Small ridge on standardized covariates: age, cycles and impedance move together
+        features = np.column_stack((age_months[known], cycles[known], impedance[known]))
+        mean = features.mean(axis=0)
+        std = features.std(axis=0)
+        scale = np.where(std > 0, std, 1.0)
+        z = (features - mean) / scale
+        target = soh[known] - soh[known].mean()
+        beta = np.linalg.solve(z.T @ z + RIDGE_PENALTY * len(z) * np.eye(3), z.T @ target)
+        coef[1:] = beta / scale
+        coef[0] = soh[known].mean() - float(mean @ coef[1:])
+
+    per_month = min(coef[1], 0.0)
+    per_cycle = min(coef[2], 0.0)
+    age_days = np.where(np.isnan(age_months) | (age_months <= 0), np.nan, age_months * DAYS_PER_MONTH)
+    cycles_per_day = np.nan_to_num(cycles / age_days, nan=0.0)
+    prior = per_month / DAYS_PER_MONTH + per_cycle * cycles_per_day
+    fallback = -DEFAULT_DEGRADATION_PER_YEAR / 365.0
+    prior = np.where(prior < 0, prior, fallback)
+    coefficients = {
+        "intercept": float(coef[0]),
+        "per_month_of_age": float(coef[1]),
+        "per_cycle": float(coef[2]),
+        "per_impedance_mohm": float(coef[3]),
+    }
+    return prior, coefficients
+
+
+def fit_fleet(store: SohStore) -> SohForecast:
+    started = time.perf_counter()
+    version = store.version
+    latest = list(store.iter_latest())
+    battery_ids = [record.battery_id for record in latest]
+    count = len(latest)
+    index = {battery_id: i for i, battery_id in enumerate(battery_ids)}
+
+    def column(attr: str) -> np.ndarray:
+        return np.fromiter(
+            (np.nan if getattr(r, attr) is None else getattr(r, attr) for r in latest),
+            dtype=np.float64,
+            count=count,
+        )
+
+    soh_now = column("soh")
+    measured_at = column("timestamp")
+    max_capacity = column("max_capacity_kwh")
+    prior, coefficients = _fleet_prior(soh_now, column("age_months"), column("charge_cycles"), column("impedance"))
+
+    # Every observed (time, SoH) point: previous and new value of each record
+    groups: List[int] = []
+    times: List[float] = []
+    values: List[float] = []
+    for battery_id in battery_ids:
+        group = index[battery_id]
+        for record in store.history(battery_id):
+            if record.previous_soh is not None and record.previous_timestamp is not None:
+                groups.append(group)
+                times.append(record.previous_timestamp)
+                values.append(record.previous_soh)
+            groups.append(group)
+            times.append(record.timestamp)
+            values.append(record.soh)
+    g = np.asarray(groups, dtype=np.int64)
+    t = np.asarray(times, dtype=np.float64) / SECONDS_PER_DAY
+    y = np.asarray(values, dtype=np.float64)
+
+    # Grouped least squares, centred per battery for numerical stability
+    n = np.bincount(g, minlength=count).astype(np.float64)
+    t_mean = np.bincount(g, weights=t, minlength=count) / np.maximum(n, 1.0)
+    y_mean = np.bincount(g, weights=y, minlength=count) / np.maximum(n, 1.0)
+    dt = t - t_mean[g]
+    sxx = np.bincount(g, weights=dt * dt, minlength=count)
+    sxy = np.bincount(g, weights=dt * (y - y_mean[g]), minlength=count)
+    # Upward steps are re-calibrations, not recovery: no degradation signal
+    own = np.minimum(np.divide(sxy, sxx, out=np.zeros(count), where=sxx > 0), 0.0)
+
+    t_min = np.full(count, np.inf)
+    t_max = np.full(count, -np.inf)
+    np.minimum.at(t_min, g, t)
+    np.maximum.at(t_max, g, t)
+    span = np.where(sxx > 0, t_max - t_min, 0.0)
+    weight = span / (span + HISTORY_HALF_WEIGHT_DAYS)
+
+    slope = np.minimum(weight * own + (1.0 - weight) * prior, 0.0)
+    return SohForecast(
+        battery_ids=battery_ids,
+        soh_now=soh_now,
+        measured_at=measured_at,
+        slope_per_day=slope,
+        max_capacity_kwh=max_capacity,
+        fleet_coefficients=coefficients,
+        version=version,
+        fit_s=time.perf_counter() - started,
+    )
+
+
+class SohForecaster:
+    def __init__(self, store: SohStore) -> None:
+        self.store = store
+        self._forecast: Optional[SohForecast] = None
+        self._lock = Lock()
+        self.fits = 0
+
+    def forecast(self) -> SohForecast:
+        forecast = self._forecast
+        if forecast is not None and forecast.version == self.store.version:
+            return forecast
+        with self._lock:
+            if self._forecast is None or self._forecast.version != self.store.version:
+                self._forecast = fit_fleet(self.store)
+                self.fits += 1
+            return self._forecast
+
+    def stats(self) -> Dict[str, Any]:
+        forecast = self._forecast
+        return {
+            "fits": self.fits,
+            "version": forecast.version if forecast else None,
+            "batteries": len(forecast.battery_ids) if forecast else 0,
+            "last_fit_s": round(forecast.fit_s, 4) if forecast else None,
+            "fleet_coefficients": forecast.fleet_coefficients if forecast else None,
+        }
+
+
+soh_forecaster = SohForecaster(soh_store)
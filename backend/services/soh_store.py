@@ -0,0 +1,249 @@
+"""
+Typed battery State-of-Health store.
+
+BatterySOH credentials carry every number as a string. They are parsed once,
+on load, into `SohRecord`s and kept per battery as a history sorted by
+`newSOHTimeStamp`, so the hot paths (pricing, battery summaries) read floats
+directly: latest record O(1), as-of and range lookups O(log n) by bisection.
+
+`version` increases on every accepted record; caches derived from SoH data
+key on it.
+"""
+
+from __future__ import annotations
+
+import re
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timezone
+from threading import Lock
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from data.battery_soh import BATTERY_SOH_RECORDS
+
+_DURATION = re.compile(r"^P(?:(\d+)Y)?(?:(\d+)M)?")
+
+
+def _to_float(value: Any) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_int(value: Any) -> Optional[int]:
+    number = _to_float(value)
+    return int(number) if number is not None else None
+
+
+def _to_epoch(value: Any) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def _to_months(value: Any) -> Optional[int]:
+    """'P2Y6M' -> 30; only years and months are used by batteryAge."""
+    match = _DURATION.match(str(value or ""))
+    if not match or not any(match.groups()):
+        return None
+    years, months = match.groups()
+    return int(years or 0) * 12 + int(months or 0)
+
+
+class SohRecord:
+    __slots__ = (
+        "battery_id",
+        "pack_id",
+        "soh",
+        "timestamp",
+        "timestamp_iso",
+        "previous_soh",
+        "previous_timestamp",
+        "charge_cycles",
+        "impedance",
+        "max_capacity_kwh",
+        "age_months",
+        "auto_corrected",
+    )
+
+    def __init__(
+        self,
+        battery_id: str,
+        pack_id: Optional[str],
+        soh: float,
+        timestamp: float,
+        timestamp_iso: str,
+        previous_soh: Optional[float],
+        previous_timestamp: Optional[float],
+        charge_cycles: Optional[int],
+        impedance: Optional[float],
+        max_capacity_kwh: Optional[float],
+        age_months: Optional[int],
+        auto_corrected: Optional[bool],
+    ) -> None:
+        self.battery_id = battery_id
+        self.pack_id = pack_id
+        self.soh = soh  # percent
+        self.timestamp = timestamp  # epoch seconds of newSOHTimeStamp
+        self.timestamp_iso = timestamp_iso
+        self.previous_soh = previous_soh
+        self.previous_timestamp = previous_timestamp
+        self.charge_cycles = charge_cycles
+        self.impedance = impedance  # mΩ
+        self.max_capacity_kwh = max_capacity_kwh
+        self.age_months = age_months
+        self.auto_corrected = auto_corrected
+
+    @classmethod
+    def from_subject(cls, subject: Dict[str, Any]) -> Optional["SohRecord"]:
+        """
+        Parses one BatterySOH credentialSubject; None when it has no battery,
+        SoH value or timestamp to index it by.
+        """
+        battery_id = subject.get("batteryId")
+        soh = _to_float(subject.get("newSOHVal"))
+        timestamp = _to_epoch(subject.get("newSOHTimeStamp"))
+        if not battery_id or soh is None or timestamp is None:
+            return None
+        return cls(
+            battery_id=battery_id,
+            pack_id=subject.get("packUniqueId"),
+            soh=soh,
+            timestamp=timestamp,
+            timestamp_iso=subject["newSOHTimeStamp"],
+            previous_soh=_to_float(subject.get("previousSOHVal")),
+            previous_timestamp=_to_epoch(subject.get("previousSOHTimeStamp")),
+            charge_cycles=_to_int(subject.get("chargeCycles")),
+            impedance=_to_float(subject.get("impedance")),
+            max_capacity_kwh=_to_float(subject.get("maxCapacity")),
+            age_months=_to_months(subject.get("batteryAge")),
+            auto_corrected=subject.get("_autoCorrected"),
+        )
+
+    @property
+    def effective_capacity_kwh(self) -> Optional[float]:
+        if self.max_capacity_kwh is None:
+            return None
+        return self.max_capacity_kwh * self.soh / 100.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "battery_id": self.battery_id,
+            "pack_id": self.pack_id,
+            "soh_percent": self.soh,
+            "timestamp": self.timestamp_iso,
+            "previous_soh_percent": self.previous_soh,
+            "charge_cycles": self.charge_cycles,
+            "impedance": self.impedance,
+            "max_capacity_kwh": self.max_capacity_kwh,
+            "age_months": self.age_months,
+            "auto_corrected": self.auto_corrected,
+        }
+
+
+class _BatteryHistory:
+    __slots__ = ("times", "records")
+
+    def __init__(self) -> None:
+        self.times: List[float] = []
+        self.records: List[SohRecord] = []
+
+    def insert(self, record: SohRecord) -> None:
+        # Appends in the common (in-order) case, bisects otherwise; equal
+        # timestamps keep arrival order, so a re-issued record wins.
+        position = bisect_right(self.times, record.timestamp)
+        self.times.insert(position, record.timestamp)
+        self.records.insert(position, record)
+
+
+class SohStore:
+    def __init__(self) -> None:
+        self._histories: Dict[str, _BatteryHistory] = {}
+        self._lock = Lock()
+        self._last_added: Optional[SohRecord] = None
+        self.version = 0
+        self.rejected = 0
+
+    @classmethod
+    def from_credentials(cls, credentials: Iterable[Dict[str, Any]]) -> "SohStore":
+        store = cls()
+        store.add_many(credential.get("credentialSubject", {}) for credential in credentials)
+        return store
+
+    def add(self, subject: Dict[str, Any]) -> Optional[SohRecord]:
+        """
+        Parses and indexes one BatterySOH credentialSubject.
+        """
+        record = SohRecord.from_subject(subject)
+        with self._lock:
+            if record is None:
+                self.rejected += 1
+                return None
+            self._histories.setdefault(record.battery_id, _BatteryHistory()).insert(record)
+            self._last_added = record
+            self.version += 1
+        return record
+
+    def add_many(self, subjects: Iterable[Dict[str, Any]]) -> int:
+        return sum(1 for subject in subjects if self.add(subject) is not None)
+
+    def latest(self, battery_id: str) -> Optional[SohRecord]:
+        history = self._histories.get(battery_id)
+        return history.records[-1] if history and history.records else None
+
+    def as_of(self, battery_id: str, when: datetime) -> Optional[SohRecord]:
+        """
+        The newest record measured at or before `when`.
+        """
+        history = self._histories.get(battery_id)
+        if not history:
+            return None
+        position = bisect_right(history.times, when.timestamp())
+        return history.records[position - 1] if position else None
+
+    def history(
+        self,
+        battery_id: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+    ) -> List[SohRecord]:
+        """
+        Records measured in [start, end), oldest first.
+        """
+        history = self._histories.get(battery_id)
+        if not history:
+            return []
+        lo = bisect_left(history.times, start.timestamp()) if start else 0
+        hi = bisect_left(history.times, end.timestamp()) if end else len(history.times)
+        return history.records[lo:hi]
+
+    def last_added(self) -> Optional[SohRecord]:
+        return self._last_added
+
+    def battery_ids(self) -> List[str]:
+        return list(self._histories)
+
+    def iter_latest(self) -> Iterator[SohRecord]:
+        for history in list(self._histories.values()):
+            if history.records:
+                yield history.records[-1]
+
+    def __len__(self) -> int:
+        return sum(len(history.records) for history in self._histories.values())
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "batteries": len(self._histories),
+            "records": len(self),
+            "rejected": self.rejected,
+            "version": self.version,
+        }
+
+
+soh_store = SohStore.from_credentials(BATTERY_SOH_RECORDS)
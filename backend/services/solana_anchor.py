@@ -1,11 +1,17 @@
 from __future__ import annotations
 
 import os
+from datetime import datetime
 from threading import Lock
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 from data.solana_anchor_models import AnchorRecord
 from config import settings
+from services.anchor_store import anchor_store
+from services.blockhash_provider import BlockhashProvider
+from services.fee_payer_pool import LAMPORTS_PER_SOL, FeePayerPool
+from services.merkle import verify_inclusion
+from services.plan_hashing import plan_digest_cache
 
 
 class SolanaAnchorError(RuntimeError):
@@ -29,6 +35,8 @@ class SolanaAnchorService:
         self._impl = None
         self._init_error: Optional[Exception] = None
         self._lock = Lock()
+        self._blockhashes: Optional[BlockhashProvider] = None
+        self._fee_payers: Optional[FeePayerPool] = None
 
     def _ensure_impl(self):
         if self._impl:
@@ -46,7 +54,7 @@ class SolanaAnchorService:
                 message="Solana anchoring disabled via configuration",
             )
 
-        if not settings.solana_keypair_path:
+        if not settings.solana_keypair_path and not settings.solana_simulate:
             raise SolanaAnchorUnavailable(
                 code="missing_keypair_path",
                 message="Missing solana_keypair_path configuration",
@@ -66,9 +74,23 @@ class SolanaAnchorService:
             try:
                 # Ensure the adapter sees the correct environment
                 os.environ.setdefault("SOLANA_RPC_URL", settings.solana_rpc_url)
-                os.environ.setdefault("SOLANA_KEYPAIR_PATH", settings.solana_keypair_path)
+                if settings.solana_keypair_path:
+                    os.environ.setdefault("SOLANA_KEYPAIR_PATH", settings.solana_keypair_path)
+                if settings.solana_fee_payer_dir:
+                    os.environ.setdefault("SOLANA_FEE_PAYER_DIR", settings.solana_fee_payer_dir)
 
-                from adapters import solana as chain_services
+                if settings.solana_simulate:
+                    from adapters import solana_simulated as chain_services
+
+                    chain_services.init(
+                        confirm_after_s=settings.solana_simulate_confirm_s,
+                        finalize_after_s=settings.solana_simulate_finalize_s,
+                        drop_rate=settings.solana_simulate_drop_rate,
+                    )
+                else:
+                    from adapters import solana as chain_services
+
+                    chain_services.init()
 
                 self._impl = chain_services
             except Exception as exc:  # pylint: disable=broad-except
@@ -79,36 +101,177 @@ class SolanaAnchorService:
                     detail=str(exc),
                 ) from exc
 
-    def anchor_plan(self, session_id: str, plan_record: Dict[str, Any]) -> AnchorRecord:
+    def ensure_available(self) -> None:
+        """
+        Raises SolanaAnchorUnavailable unless anchoring is configured and initialised.
+        """
+        self._ensure_impl()
+
+    def plan_hash(self, plan_record: Dict[str, Any]) -> str:
+        return plan_digest_cache.plan_hash(plan_record)
+
+    def _execution_error(self, message: str, exc: Exception) -> SolanaAnchorExecutionError:
+        return SolanaAnchorExecutionError(code="solana_tx_failed", message=message, detail=str(exc))
+
+    @property
+    def blockhashes(self) -> BlockhashProvider:
+        self._ensure_impl()
+        assert self._impl
+        if self._blockhashes is None:
+            self._blockhashes = BlockhashProvider(
+                self._impl.fetch_latest_blockhash,
+                refresh_interval_s=settings.solana_blockhash_refresh_s,
+                max_age_s=settings.solana_blockhash_max_age_s,
+                safety_margin_blocks=settings.solana_blockhash_safety_blocks,
+            )
+        return self._blockhashes
+
+    @property
+    def fee_payers(self) -> FeePayerPool:
         self._ensure_impl()
-        assert self._impl  # for mypy
+        assert self._impl
+        if self._fee_payers is None:
+            self._fee_payers = FeePayerPool(
+                self._impl.FEE_PAYERS,
+                strategy=settings.solana_fee_payer_strategy,
+                low_balance_lamports=int(settings.solana_fee_payer_low_balance_sol * LAMPORTS_PER_SOL),
+                refresh_interval_s=settings.solana_balance_refresh_s,
+            )
+        return self._fee_payers
+
+    def fee_payer_count(self) -> int:
+        try:
+            return len(self.fee_payers)
+        except SolanaAnchorUnavailable:
+            return 0
+
+    async def send_memo_async(self, memo_data: bytes) -> Tuple[str, int]:
+        """
+        Broadcasts a memo on the cached recent blockhash without waiting for
+        confirmation: (signature, last valid block height of its blockhash).
+        """
+        blockhashes = self.blockhashes
         try:
-            return self._impl.anchor_plan_on_solana(session_id=session_id, plan_record=plan_record)
-        except SolanaAnchorError:
-            raise
+            blockhash, last_valid_block_height = await blockhashes.get()
+            with self.fee_payers.lease() as payer:
+                try:
+                    signature = await self._impl.send_memo_async(memo_data, blockhash, payer.keypair)
+                except self._impl.BlockhashExpired:
+                    # The cached value went stale faster than estimated: refetch once
+                    blockhashes.invalidate()
+                    blockhash, last_valid_block_height = await blockhashes.get(force_refresh=True)
+                    signature = await self._impl.send_memo_async(memo_data, blockhash, payer.keypair)
         except RuntimeError as exc:
-            raise SolanaAnchorExecutionError(
-                code="solana_tx_failed",
-                message="Failed to anchor plan on Solana",
-                detail=str(exc),
-            ) from exc
+            raise self._execution_error("Failed to send anchoring transaction", exc) from exc
+        return signature, last_valid_block_height
 
-    def get_anchor(self, session_id: str) -> Optional[AnchorRecord]:
+    def start_background_refresh(self) -> None:
+        """
+        Keeps the recent blockhash and fee-payer balances warm.
+        """
         try:
-            self._ensure_impl()
+            self.blockhashes.start_refresh()
+            self.fee_payers.start_refresh(self._impl.get_balances)
         except SolanaAnchorUnavailable:
-            return None
-        assert self._impl
-        return self._impl.get_anchor(session_id)
+            pass  # anchoring disabled / not configured: nothing to keep warm
+
+    def blockhash_stats(self) -> Optional[Dict[str, Any]]:
+        return self._blockhashes.stats() if self._blockhashes is not None else None
 
-    def list_anchors(self) -> List[AnchorRecord]:
+    def fee_payer_stats(self) -> Optional[Dict[str, Any]]:
+        return self._fee_payers.stats() if self._fee_payers is not None else None
+
+    def simulated_chain_stats(self) -> Optional[Dict[str, Any]]:
+        chain = getattr(self._impl, "CHAIN", None)
+        return chain.stats() if chain is not None else None
+
+    async def stop_background_refresh(self) -> None:
+        if self._blockhashes is not None:
+            await self._blockhashes.stop_refresh()
+        if self._fee_payers is not None:
+            await self._fee_payers.stop_refresh()
+
+    async def signature_statuses(self, signatures: List[str]) -> List[Optional[Dict[str, Any]]]:
+        self._ensure_impl()
+        assert self._impl
         try:
-            self._ensure_impl()
-        except SolanaAnchorUnavailable:
-            return []
+            return await self._impl.get_signature_statuses(signatures)
+        except RuntimeError as exc:
+            raise self._execution_error("Failed to fetch signature statuses", exc) from exc
+
+    async def block_height(self) -> int:
+        self._ensure_impl()
         assert self._impl
-        store = getattr(self._impl, "ANCHOR_STORE", {})
-        return list(store.values())
+        try:
+            block_height = await self._impl.get_block_height()
+        except RuntimeError as exc:
+            raise self._execution_error("Failed to fetch block height", exc) from exc
+        if self._blockhashes is not None:
+            self._blockhashes.observe_block_height(block_height)
+        return block_height
+
+    def store_anchor(self, record: AnchorRecord) -> None:
+        anchor_store.put(record)
+
+    def store_anchors(self, records: List[AnchorRecord]) -> None:
+        anchor_store.put_many(records)
+
+    def verify_anchor(
+        self, session_id: str, plan_record: Optional[Dict[str, Any]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Recomputes the anchor locally: the plan hash (when the plan is supplied)
+        and, for batched anchors, the Merkle root from the stored inclusion proof.
+        `verified` needs at least one check to pass, none to fail, and the
+        anchor to be confirmed on-chain.
+        """
+        record = self.get_anchor(session_id)
+        if record is None:
+            return None
+        plan_hash_matches = None
+        if plan_record is not None:
+            plan_hash_matches = self.plan_hash(plan_record) == record.plan_hash
+        proof_valid = None
+        if record.merkle_root is not None:
+            steps = [step.model_dump() for step in record.merkle_proof or []]
+            proof_valid = verify_inclusion(record.plan_hash, steps, record.merkle_root)
+        checks = [check for check in (plan_hash_matches, proof_valid) if check is not None]
+        return {
+            "session_id": session_id,
+            "plan_hash": record.plan_hash,
+            "merkle_root": record.merkle_root,
+            "solana_tx": record.solana_tx,
+            "status": record.status,
+            "plan_hash_matches": plan_hash_matches,
+            "proof_valid": proof_valid,
+            "verified": bool(checks) and all(checks) and record.status in ("confirmed", "finalized"),
+        }
+
+    def unfinished_anchors(self) -> List[AnchorRecord]:
+        return anchor_store.unfinished()
+
+    def get_anchor(self, session_id: str) -> Optional[AnchorRecord]:
+        # Reads never need the RPC stack: stored anchors stay visible while Solana is down
+        return anchor_store.get(session_id)
+
+    def find_anchors(
+        self, plan_hash: Optional[str] = None, solana_tx: Optional[str] = None
+    ) -> List[AnchorRecord]:
+        return anchor_store.find(plan_hash=plan_hash, solana_tx=solana_tx)
+
+    def list_anchors(
+        self,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        anchored_after: Optional[datetime] = None,
+        anchored_before: Optional[datetime] = None,
+    ) -> Tuple[List[AnchorRecord], Optional[str]]:
+        return anchor_store.list(
+            limit=limit,
+            cursor=cursor,
+            anchored_after=anchored_after,
+            anchored_before=anchored_before,
+        )
 
     def make_hardcoded_plan(self, session_id: Optional[str] = None) -> Dict[str, Any]:
         self._ensure_impl()
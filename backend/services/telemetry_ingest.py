@@ -0,0 +1,290 @@
+"""
+Streaming vehicle telemetry ingestion.
+
+Vehicles push VSS-path samples as NDJSON (HTTP body or WebSocket frame), one
+JSON object per line in any of three shapes:
+
+    {"vin": "...", "path": "Vehicle.Powertrain.BatteryManagement.Battery.SOC", "ts": 1759209084000, "value": 42.1}
+    {"vin": "...", "ts": "2025-09-30T05:11:24Z", "values": {"Vehicle.Speed": 0, "Vehicle....SOC": 42.1}}
+    {"vin": "...", "path": "...", "samples": [[1759209084000, 42.1], [1759209089000, 42.3]]}
+
+`ts` is epoch milliseconds (integer or float) or an ISO timestamp, and
+defaults to arrival time. A line with an unparseable timestamp, or one more
+than `MAX_CLOCK_SKEW_MS` ahead of arrival, is rejected as a whole: series only
+move forward, so one far-future sample would shadow everything after it.
+Lines are parsed with `json` straight into per-(VIN, path) batches, with no
+Pydantic model per sample. Each batch is then written in one go:
+
+- numeric samples go into a bounded ring buffer per (VIN, path)
+  (`TELEMETRY_RING_SIZE` newest samples, `TELEMETRY_MAX_PATHS_PER_VEHICLE`
+  paths per VIN),
+- the newest sample of every path, numeric or not, updates the latest-value
+  cache that `BatteryDataAgent` reads,
+- SoC samples are also appended to the long-term `soc_store` series.
+"""
+
+from __future__ import annotations
+
+import json
+import time
+from threading import Lock
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from config import settings
+from services.soc_series import SOC_PATH, SocStore, soc_store, to_epoch_ms
+
+# Small batches are written sample by sample: cheaper than building arrays
+_VECTOR_MIN = 16
+_INITIAL_RING = 16
+_MAX_ERRORS = 5
+MAX_CLOCK_SKEW_MS = 5 * 60 * 1000
+
+Latest = Tuple[int, Any]  # (epoch ms, value)
+
+
+def _sample_ms(ts: Any, received_ms: int) -> int:
+    epoch_ms = to_epoch_ms(ts)
+    if epoch_ms > received_ms + MAX_CLOCK_SKEW_MS:
+        raise ValueError(f"timestamp {ts!r} is in the future")
+    return epoch_ms
+
+
+class _Ring:
+    """
+    Newest `capacity` samples. Storage starts small and doubles until it
+    reaches capacity, so rarely reported paths stay cheap; only then does it wrap.
+    """
+
+    __slots__ = ("capacity", "timestamps", "values", "head", "size")
+
+    def __init__(self, capacity: int) -> None:
+        self.capacity = capacity
+        self.timestamps = np.zeros(min(_INITIAL_RING, capacity), dtype=np.int64)
+        self.values = np.zeros(len(self.timestamps), dtype=np.float64)
+        self.head = 0  # next slot to write
+        self.size = 0
+
+    def _reserve(self, count: int) -> None:
+        # Still growing means nothing has wrapped yet: storage is in order from slot 0
+        allocated = len(self.timestamps)
+        if allocated == self.capacity or self.size + count <= allocated:
+            return
+        target = allocated
+        while target < self.size + count and target < self.capacity:
+            target *= 2
+        target = min(target, self.capacity)
+        self.timestamps = np.resize(self.timestamps, target)
+        self.values = np.resize(self.values, target)
+
+    def append(self, epoch_ms: int, value: float) -> None:
+        self._reserve(1)
+        allocated = len(self.timestamps)
+        self.timestamps[self.head] = epoch_ms
+        self.values[self.head] = value
+        self.head = (self.head + 1) % allocated
+        self.size = min(self.size + 1, allocated)
+
+    def extend(self, timestamps: np.ndarray, values: np.ndarray) -> None:
+        if len(timestamps) >= self.capacity:
+            timestamps, values = timestamps[-self.capacity :], values[-self.capacity :]
+        self._reserve(len(timestamps))
+        allocated = len(self.timestamps)
+        count = len(timestamps)
+        first = min(count, allocated - self.head)
+        self.timestamps[self.head : self.head + first] = timestamps[:first]
+        self.values[self.head : self.head + first] = values[:first]
+        self.timestamps[: count - first] = timestamps[first:]
+        self.values[: count - first] = values[first:]
+        self.head = (self.head + count) % allocated
+        self.size = min(self.size + count, allocated)
+
+    def snapshot(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Buffered samples, oldest first.
+        """
+        allocated = len(self.timestamps)
+        start = (self.head - self.size) % allocated
+        order = (start + np.arange(self.size)) % allocated
+        return self.timestamps[order], self.values[order]
+
+    @property
+    def nbytes(self) -> int:
+        return self.timestamps.nbytes + self.values.nbytes
+
+
+class _Batch:
+    __slots__ = ("timestamps", "values", "numeric")
+
+    def __init__(self) -> None:
+        self.timestamps: List[int] = []
+        self.values: List[Any] = []
+        self.numeric = True
+
+
+class IngestResult:
+    __slots__ = ("accepted", "rejected", "errors")
+
+    def __init__(self) -> None:
+        self.accepted = 0
+        self.rejected = 0
+        self.errors: List[str] = []
+
+    def reject(self, reason: str, count: int = 1) -> None:
+        self.rejected += count
+        if len(self.errors) < _MAX_ERRORS:
+            self.errors.append(reason)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"accepted": self.accepted, "rejected": self.rejected, "errors": self.errors}
+
+
+class VehicleTelemetry:
+    def __init__(self, ring_size: int, max_paths_per_vehicle: int, soc_series: Optional[SocStore] = None) -> None:
+        self.ring_size = ring_size
+        self.max_paths_per_vehicle = max_paths_per_vehicle
+        self.soc_series = soc_series
+        self._rings: Dict[str, Dict[str, _Ring]] = {}
+        self._latest: Dict[str, Dict[str, Latest]] = {}
+        self._lock = Lock()
+        self.samples = 0
+        self.rejected = 0
+        self.frames = 0
+        self.ingest_s = 0.0
+
+    def seed_soc(self, store: SocStore) -> None:
+        """
+        Primes the latest-value cache with the newest SoC of every stored series.
+        """
+        for vin in store.vins():
+            latest = store.latest(vin)
+            if latest is not None:
+                self._latest.setdefault(vin, {})[SOC_PATH] = latest
+
+    def ingest_ndjson(self, payload: bytes | str) -> IngestResult:
+        started = time.perf_counter()
+        result = IngestResult()
+        batches: Dict[Tuple[str, str], _Batch] = {}
+        received_ms = int(time.time() * 1000)
+        lines = payload.splitlines() if payload else []
+        for line_no, line in enumerate(lines, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+                self._collect(record, batches, received_ms)
+            except (ValueError, TypeError, KeyError, AttributeError) as exc:
+                result.reject(f"line {line_no}: {type(exc).__name__}: {exc}")
+
+        with self._lock:
+            for (vin, path), batch in batches.items():
+                if not self._write(vin, path, batch):
+                    result.reject(f"{vin}: more than {self.max_paths_per_vehicle} paths", len(batch.values))
+                    continue
+                result.accepted += len(batch.values)
+            self.samples += result.accepted
+            self.rejected += result.rejected
+            self.frames += 1
+            self.ingest_s += time.perf_counter() - started
+        return result
+
+    @staticmethod
+    def _collect(record: Dict[str, Any], batches: Dict[Tuple[str, str], _Batch], received_ms: int) -> None:
+        vin = record["vin"]
+        if not isinstance(vin, str) or not vin:
+            raise ValueError("vin must be a non-empty string")
+        ts = record.get("ts", record.get("timestamp"))
+        epoch_ms = received_ms if ts is None else _sample_ms(ts, received_ms)
+
+        # Materialized first, so a malformed line contributes no samples at all
+        if "values" in record:
+            pairs: List[Tuple[str, int, Any]] = [(path, epoch_ms, value) for path, value in record["values"].items()]
+        elif "samples" in record:
+            path = record["path"]
+            pairs = [(path, _sample_ms(sample_ts, received_ms), value) for sample_ts, value in record["samples"]]
+        else:
+            pairs = [(record["path"], epoch_ms, record["value"])]
+
+        for path, sample_ms, value in pairs:
+            batch = batches.get((vin, path))
+            if batch is None:
+                batch = batches[(vin, path)] = _Batch()
+            batch.timestamps.append(sample_ms)
+            batch.values.append(value)
+            # bool is an int subclass, but a flag has no place in the float rings
+            if batch.numeric and (isinstance(value, bool) or not isinstance(value, (int, float))):
+                batch.numeric = False
+
+    def _write(self, vin: str, path: str, batch: _Batch) -> bool:
+        latest = self._latest.get(vin)
+        if latest is None:
+            latest = self._latest[vin] = {}
+        if path not in latest and len(latest) >= self.max_paths_per_vehicle:
+            return False
+
+        timestamps, values = batch.timestamps, batch.values
+        # Put the batch in time order (it usually already is)
+        if len(timestamps) > 1 and any(a > b for a, b in zip(timestamps, timestamps[1:])):
+            order = sorted(range(len(timestamps)), key=timestamps.__getitem__)
+            timestamps = [timestamps[i] for i in order]
+            values = [values[i] for i in order]
+
+        cached = latest.get(path)
+        if cached is None or timestamps[-1] >= cached[0]:
+            latest[path] = (timestamps[-1], values[-1])
+        if not batch.numeric:
+            return True
+
+        rings = self._rings.get(vin)
+        if rings is None:
+            rings = self._rings[vin] = {}
+        ring = rings.get(path)
+        if ring is None:
+            ring = rings[path] = _Ring(self.ring_size)
+        if len(values) < _VECTOR_MIN:
+            for epoch_ms, value in zip(timestamps, values):
+                ring.append(epoch_ms, value)
+        else:
+            ring.extend(np.asarray(timestamps, dtype=np.int64), np.asarray(values, dtype=np.float64))
+
+        if path == SOC_PATH and self.soc_series is not None:
+            self.soc_series.extend(vin, timestamps, values)
+        return True
+
+    def latest(self, vin: str, path: Optional[str] = None) -> Any:
+        """
+        (epoch ms, value) of `path` for `vin`, or every cached path when path is None.
+        """
+        latest = self._latest.get(vin)
+        if path is None:
+            return dict(latest) if latest else {}
+        return latest.get(path) if latest else None
+
+    def recent(self, vin: str, path: str) -> Tuple[np.ndarray, np.ndarray]:
+        ring = self._rings.get(vin, {}).get(path)
+        if ring is None:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+        with self._lock:
+            return ring.snapshot()
+
+    def stats(self) -> Dict[str, Any]:
+        rings = [ring for paths in list(self._rings.values()) for ring in list(paths.values())]
+        return {
+            "vehicles": len(self._latest),
+            "rings": len(rings),
+            "ring_size": self.ring_size,
+            "ring_bytes": sum(ring.nbytes for ring in rings),
+            "samples": self.samples,
+            "rejected": self.rejected,
+            "frames": self.frames,
+            "samples_per_s": round(self.samples / self.ingest_s) if self.ingest_s else None,
+        }
+
+
+vehicle_telemetry = VehicleTelemetry(
+    ring_size=settings.telemetry_ring_size,
+    max_paths_per_vehicle=settings.telemetry_max_paths_per_vehicle,
+    soc_series=soc_store,
+)
+vehicle_telemetry.seed_soc(soc_store)
@@ -0,0 +1,3 @@
+"""
+Local stand-ins for external services (DID gateway, Solana RPC) used in tests and benchmarks.
+"""
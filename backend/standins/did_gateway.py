@@ -0,0 +1,171 @@
+"""
+Local stand-in for the Denso DID Gateway, implementing the endpoints DensoDIDClient uses.
+Responses are deterministic (ids and proofs derive from the request body); latency
+and failures are injected according to environment variables:
+
+    STANDIN_LATENCY=lognormal:25,0.6   # see standins.faults.LatencyModel
+    STANDIN_ERROR_RATE=0.01            # fraction of requests answered with STANDIN_ERROR_STATUS
+    STANDIN_ERROR_STATUS=503
+    STANDIN_TIMEOUT_RATE=0.0           # fraction of requests that hang for STANDIN_TIMEOUT_S
+    STANDIN_TIMEOUT_S=30
+    STANDIN_SEED=42
+
+Run it and point the backend at it:
+
+    uvicorn standins.did_gateway:app --port 9000
+    DENSO_BASE_URL=http://127.0.0.1:9000 uvicorn app:app
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from fastapi import FastAPI, HTTPException, Query
+
+from services.did_local_verifier import b58encode
+from standins.faults import FaultInjector, LatencyModel
+
+ISSUER_DID = "did:itn:StandInIssuer0000000000"
+ISSUANCE_DATE = "2025-01-01T00:00:00Z"
+EXPIRATION_DATE = "2030-01-01T00:00:00Z"
+
+
+def _digest(payload: Any) -> bytes:
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, separators=(",", ":")).encode("utf-8")).digest()
+
+
+def _fake_proof(payload: Any, purpose: str) -> Dict[str, Any]:
+    digest = _digest(payload)
+    return {
+        "type": "Ed25519Signature2020",
+        "created": ISSUANCE_DATE,
+        "verificationMethod": f"{ISSUER_DID}#standin-key",
+        "proofPurpose": purpose,
+        "proofValue": "z" + b58encode(digest + hashlib.sha256(digest).digest()),
+    }
+
+
+def _credential_check(credential: Dict[str, Any]) -> Dict[str, Any]:
+    checks: List[Dict[str, Any]] = [{"check": "proof", "valid": bool(credential.get("proof"))}]
+    expiration = credential.get("expirationDate")
+    if expiration:
+        expires = datetime.fromisoformat(expiration)
+        if expires.tzinfo is None:
+            expires = expires.replace(tzinfo=timezone.utc)
+        checks.append({"check": "expiration", "valid": expires > datetime.now(timezone.utc)})
+    return {
+        "verified": all(c["valid"] for c in checks),
+        "credentialId": credential.get("id"),
+        "checks": checks,
+    }
+
+
+def _issue(subject: Dict[str, Any], credential_type: str, replaces: Optional[str] = None) -> Dict[str, Any]:
+    seed = {"type": credential_type, "subject": subject, "replaces": replaces}
+    credential = {
+        "@context": [
+            "https://www.w3.org/2018/credentials/v1",
+            "https://w3id.org/security/suites/ed25519-2020/v1",
+        ],
+        "id": f"urn:uuid:{uuid.UUID(bytes=_digest(seed)[:16], version=4)}",
+        "type": ["VerifiableCredential", credential_type],
+        "issuer": {"id": ISSUER_DID},
+        "issuanceDate": ISSUANCE_DATE,
+        "expirationDate": EXPIRATION_DATE,
+        "credentialSubject": subject,
+    }
+    credential["proof"] = _fake_proof(credential, "assertionMethod")
+    return credential
+
+
+def create_app(
+    latency: LatencyModel,
+    faults: FaultInjector,
+) -> FastAPI:
+    gateway = FastAPI(title="DID Gateway stand-in")
+    requests: Counter = Counter()
+
+    async def simulate(endpoint: str) -> None:
+        requests[endpoint] += 1
+        await latency.sleep()
+        await faults.maybe_hang()
+        if faults.should_fail():
+            raise HTTPException(status_code=faults.error_status, detail="Injected stand-in failure")
+
+    @gateway.post("/api/verify-credential")
+    async def verify_credential(credential: Dict[str, Any]) -> Dict[str, Any]:
+        await simulate("verify-credential")
+        return _credential_check(credential)
+
+    @gateway.post("/api/verify-presentation")
+    async def verify_presentation(presentation: Dict[str, Any]) -> Dict[str, Any]:
+        await simulate("verify-presentation")
+        credential_results = [_credential_check(vc) for vc in presentation.get("verifiableCredential", [])]
+        verified = bool(presentation.get("proof")) and all(r["verified"] for r in credential_results)
+        return {
+            "verified": verified,
+            "presentationResult": {"verified": verified, "presentationId": presentation.get("id")},
+            "credentialResults": credential_results,
+        }
+
+    @gateway.post("/api/issue-credential")
+    async def issue_credential(
+        body: Dict[str, Any], credential_type: str = Query(...)
+    ) -> Dict[str, Any]:
+        await simulate("issue-credential")
+        return _issue(body.get("credentialSubject", {}), credential_type)
+
+    @gateway.post("/api/update-credential")
+    async def update_credential(body: Dict[str, Any], vc_uuid: str = Query(...)) -> Dict[str, Any]:
+        await simulate("update-credential")
+        subject = body.get("credentialSubject", {})
+        return _issue(subject, subject.get("type", "VerifiableCredential"), replaces=vc_uuid)
+
+    @gateway.post("/api/request-presentation")
+    async def request_presentation(credentials: List[Dict[str, Any]]) -> Dict[str, Any]:
+        await simulate("request-presentation")
+        presentation = {
+            "@context": [
+                "https://www.w3.org/2018/credentials/v1",
+                "https://w3id.org/security/suites/ed25519-2020/v1",
+            ],
+            "type": ["VerifiablePresentation"],
+            "verifiableCredential": credentials,
+            "id": f"urn:uuid:{uuid.UUID(bytes=_digest(credentials)[:16], version=4)}",
+            "holder": ISSUER_DID,
+        }
+        presentation["proof"] = _fake_proof(presentation, "authentication")
+        return presentation
+
+    @gateway.get("/stats")
+    async def stats() -> Dict[str, Any]:
+        return {
+            "requests": dict(requests),
+            "injected_errors": faults.injected_errors,
+            "injected_timeouts": faults.injected_timeouts,
+        }
+
+    return gateway
+
+
+def _env_seed() -> Optional[int]:
+    raw = os.getenv("STANDIN_SEED")
+    return int(raw) if raw else None
+
+
+app = create_app(
+    latency=LatencyModel.parse(os.getenv("STANDIN_LATENCY", "fixed:0"), seed=_env_seed()),
+    faults=FaultInjector(
+        error_rate=float(os.getenv("STANDIN_ERROR_RATE", "0")),
+        error_status=int(os.getenv("STANDIN_ERROR_STATUS", "503")),
+        timeout_rate=float(os.getenv("STANDIN_TIMEOUT_RATE", "0")),
+        timeout_s=float(os.getenv("STANDIN_TIMEOUT_S", "30")),
+        seed=_env_seed(),
+    ),
+)
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import asyncio
+import random
+from typing import Optional
+
+
+class LatencyModel:
+    """
+    Artificial response latency, parsed from a compact spec (all values in ms):
+
+        fixed:20            always 20 ms
+        uniform:10,50       uniform between 10 and 50 ms
+        normal:30,5         normal(mean, std), clipped at 0
+        lognormal:25,0.6    lognormal with median 25 ms and sigma 0.6 (long tail)
+        exp:30              exponential with mean 30 ms
+    """
+
+    def __init__(self, kind: str, params: tuple, rng: random.Random) -> None:
+        self.kind = kind
+        self.params = params
+        self.rng = rng
+
+    @classmethod
+    def parse(cls, spec: str, seed: Optional[int] = None) -> "LatencyModel":
+        kind, _, raw = spec.partition(":")
+        params = tuple(float(p) for p in raw.split(",") if p) if raw else ()
+        expected = {"fixed": 1, "uniform": 2, "normal": 2, "lognormal": 2, "exp": 1}
+        if kind not in expected or len(params) != expected[kind]:
+            raise ValueError(f"Invalid latency spec '{spec}'")
+        return cls(kind, params, random.Random(seed))
+
+    def sample_ms(self) -> float:
+        rng, p = self.rng, self.params
+        if self.kind == "fixed":
+            return p[0]
+        if self.kind == "uniform":
+            return rng.uniform(p[0], p[1])
+        if self.kind == "normal":
+            return max(rng.gauss(p[0], p[1]), 0.0)
+        if self.kind == "lognormal":
+            return rng.lognormvariate(0.0, p[1]) * p[0]
+        return rng.expovariate(1.0 / p[0]) if p[0] > 0 else 0.0
+
+    async def sleep(self) -> None:
+        delay_ms = self.sample_ms()
+        if delay_ms > 0:
+            await asyncio.sleep(delay_ms / 1000.0)
+
+
+class FaultInjector:
+    """
+    Decides per request whether to inject an error or a hang.
+    """
+
+    def __init__(
+        self,
+        error_rate: float = 0.0,
+        error_status: int = 503,
+        timeout_rate: float = 0.0,
+        timeout_s: float = 30.0,
+        seed: Optional[int] = None,
+    ) -> None:
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.timeout_rate = timeout_rate
+        self.timeout_s = timeout_s
+        self.rng = random.Random(seed)
+        self.injected_errors = 0
+        self.injected_timeouts = 0
+
+    async def maybe_hang(self) -> None:
+        if self.timeout_rate and self.rng.random() < self.timeout_rate:
+            self.injected_timeouts += 1
+            await asyncio.sleep(self.timeout_s)
+
+    def should_fail(self) -> bool:
+        if self.error_rate and self.rng.random() < self.error_rate:
+            self.injected_errors += 1
+            return True
+        return False
@@ -0,0 +1,196 @@
+"""
+Local stand-in for a Solana JSON-RPC node, covering the methods the anchoring
+stack calls: getLatestBlockhash, sendTransaction, getSignatureStatuses,
+getBlockHeight and getMultipleAccounts. Sent transactions must be validly
+signed on a blockhash the stand-in handed out and still within its validity
+window ("Blockhash not found" otherwise, as on a real node); they then move
+through processed / confirmed / finalized over time (see
+adapters.solana_simulated.SimulatedChain). Latency and failures are injected
+like the DID gateway stand-in:
+
+    STANDIN_LATENCY=lognormal:25,0.6   # see standins.faults.LatencyModel
+    STANDIN_ERROR_RATE=0.01            # fraction of requests answered with STANDIN_ERROR_STATUS
+    STANDIN_ERROR_STATUS=503
+    STANDIN_TIMEOUT_RATE=0.0           # fraction of requests that hang for STANDIN_TIMEOUT_S
+    STANDIN_TIMEOUT_S=30
+    STANDIN_CONFIRM_S=1.0              # seconds until a landed transaction is confirmed
+    STANDIN_FINALIZE_S=13.0            # ... and finalized
+    STANDIN_DROP_RATE=0.0              # fraction of accepted transactions that never land
+    STANDIN_SEED=42
+
+Run it and point the backend at it (any solana-keygen keypair works, the
+stand-in funds every account):
+
+    uvicorn standins.solana_rpc:app --port 8899
+    SOLANA_RPC_URL=http://127.0.0.1:8899 SOLANA_KEYPAIR_PATH=dev.json uvicorn app:app
+"""
+
+from __future__ import annotations
+
+import base64
+import os
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+from fastapi import Body, FastAPI, HTTPException
+from solders.pubkey import Pubkey
+from solders.transaction import Transaction
+
+from adapters.solana import BlockhashExpired
+from adapters.solana_simulated import SimulatedChain
+from services.did_local_verifier import b58decode
+from standins.faults import FaultInjector, LatencyModel
+
+SYSTEM_PROGRAM_ID = "11111111111111111111111111111111"
+
+
+class RPCError(Exception):
+    def __init__(self, code: int, message: str, data: Optional[Dict[str, Any]] = None) -> None:
+        super().__init__(message)
+        self.code = code
+        self.message = message
+        self.data = data
+
+
+def _context(chain: SimulatedChain) -> Dict[str, Any]:
+    return {"slot": chain.block_height()}
+
+
+def create_app(
+    latency: LatencyModel,
+    faults: FaultInjector,
+    chain: SimulatedChain,
+) -> FastAPI:
+    node = FastAPI(title="Solana RPC stand-in")
+    requests: Counter = Counter()
+
+    def get_latest_blockhash(params: List[Any]) -> Dict[str, Any]:
+        blockhash, last_valid_block_height = chain.latest_blockhash()
+        return {
+            "context": _context(chain),
+            "value": {"blockhash": str(blockhash), "lastValidBlockHeight": last_valid_block_height},
+        }
+
+    def send_transaction(params: List[Any]) -> str:
+        config = params[1] if len(params) > 1 and isinstance(params[1], dict) else {}
+        raw = params[0]
+        try:
+            if config.get("encoding", "base58") == "base64":
+                tx = Transaction.from_bytes(base64.b64decode(raw))
+            else:
+                tx = Transaction.from_bytes(b58decode(raw))
+        except Exception as exc:  # pylint: disable=broad-except
+            raise RPCError(-32602, f"invalid transaction: {exc}") from exc
+        try:
+            return chain.submit(tx)
+        except BlockhashExpired as exc:
+            raise RPCError(
+                -32002,
+                "Transaction simulation failed: Blockhash not found",
+                {"err": "BlockhashNotFound", "logs": [], "accounts": None, "unitsConsumed": 0},
+            ) from exc
+        except RuntimeError as exc:
+            raise RPCError(-32003, "Transaction signature verification failure") from exc
+
+    def get_signature_statuses(params: List[Any]) -> Dict[str, Any]:
+        signatures = params[0] if params else []
+        if len(signatures) > 256:
+            raise RPCError(-32602, "Too many inputs provided; max 256")
+        value = []
+        for signature in signatures:
+            status = chain.status(signature)
+            value.append(
+                None
+                if status is None
+                else {
+                    "slot": status["slot"],
+                    "confirmations": status["confirmations"],
+                    "err": None,
+                    "status": {"Ok": None},
+                    "confirmationStatus": status["confirmation_status"],
+                }
+            )
+        return {"context": _context(chain), "value": value}
+
+    def get_block_height(params: List[Any]) -> int:
+        return chain.block_height()
+
+    def get_multiple_accounts(params: List[Any]) -> Dict[str, Any]:
+        pubkeys = params[0] if params else []
+        if len(pubkeys) > 100:
+            raise RPCError(-32602, "Too many inputs provided; max 100")
+        value = [
+            {
+                "lamports": chain.balance(Pubkey.from_string(pubkey)),
+                "owner": SYSTEM_PROGRAM_ID,
+                "data": ["", "base64"],
+                "executable": False,
+                "rentEpoch": 0,
+                "space": 0,
+            }
+            for pubkey in pubkeys
+        ]
+        return {"context": _context(chain), "value": value}
+
+    methods = {
+        "getLatestBlockhash": get_latest_blockhash,
+        "sendTransaction": send_transaction,
+        "getSignatureStatuses": get_signature_statuses,
+        "getBlockHeight": get_block_height,
+        "getMultipleAccounts": get_multiple_accounts,
+    }
+
+    @node.post("/")
+    async def rpc(body: Dict[str, Any] = Body(...)) -> Dict[str, Any]:
+        method = body.get("method")
+        requests[method] += 1
+        await latency.sleep()
+        await faults.maybe_hang()
+        if faults.should_fail():
+            raise HTTPException(status_code=faults.error_status, detail="Injected stand-in failure")
+
+        response: Dict[str, Any] = {"jsonrpc": "2.0", "id": body.get("id")}
+        handler = methods.get(method)
+        try:
+            if handler is None:
+                raise RPCError(-32601, "Method not found")
+            response["result"] = handler(body.get("params") or [])
+        except RPCError as exc:
+            response["error"] = {"code": exc.code, "message": exc.message}
+            if exc.data is not None:
+                response["error"]["data"] = exc.data
+        return response
+
+    @node.get("/stats")
+    async def stats() -> Dict[str, Any]:
+        return {
+            "requests": dict(requests),
+            "injected_errors": faults.injected_errors,
+            "injected_timeouts": faults.injected_timeouts,
+            "chain": chain.stats(),
+        }
+
+    return node
+
+
+def _env_seed() -> Optional[int]:
+    raw = os.getenv("STANDIN_SEED")
+    return int(raw) if raw else None
+
+
+app = create_app(
+    latency=LatencyModel.parse(os.getenv("STANDIN_LATENCY", "fixed:0"), seed=_env_seed()),
+    faults=FaultInjector(
+        error_rate=float(os.getenv("STANDIN_ERROR_RATE", "0")),
+        error_status=int(os.getenv("STANDIN_ERROR_STATUS", "503")),
+        timeout_rate=float(os.getenv("STANDIN_TIMEOUT_RATE", "0")),
+        timeout_s=float(os.getenv("STANDIN_TIMEOUT_S", "30")),
+        seed=_env_seed(),
+    ),
+    chain=SimulatedChain(
+        confirm_after_s=float(os.getenv("STANDIN_CONFIRM_S", "1.0")),
+        finalize_after_s=float(os.getenv("STANDIN_FINALIZE_S", "13.0")),
+        drop_rate=float(os.getenv("STANDIN_DROP_RATE", "0")),
+        seed=_env_seed(),
+    ),
+)
@@ -0,0 +1,13 @@
+"""
+Runs the tests against the backend modules: `python -m pytest tests` from backend/.
+"""
+
+import os
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+# models.negotiator builds its LLM client at import; the tests never call it
+os.environ.setdefault("OPENAI_API_KEY", "unused")
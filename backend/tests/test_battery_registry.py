@@ -0,0 +1,34 @@
+import time
+
+from services.battery_registry import BindingRegistry, BirthCertificateRegistry
+
+VIN = "TESTVIN0000000001"
+
+
+def _registry() -> BindingRegistry:
+    registry = BindingRegistry(BirthCertificateRegistry())
+    registry.bind(VIN, "pack-old", battery_id="did:test:old", valid_from="2024-01-01T00:00:00Z")
+    return registry
+
+
+def test_current_ignores_a_swap_scheduled_for_later():
+    registry = _registry()
+    swap_at = time.time() + 86_400
+    registry.bind(VIN, "pack-new", battery_id="did:test:new", valid_from=swap_at)
+
+    assert registry.current(VIN).battery_id == "did:test:old"
+    assert registry.at(VIN, swap_at + 1).battery_id == "did:test:new"
+
+
+def test_current_follows_a_swap_once_it_is_in_effect():
+    registry = _registry()
+    registry.bind(VIN, "pack-new", battery_id="did:test:new", valid_from=time.time() - 60)
+
+    assert registry.current(VIN).battery_id == "did:test:new"
+
+
+def test_current_is_none_before_the_first_binding():
+    registry = BindingRegistry(BirthCertificateRegistry())
+    registry.bind(VIN, "pack-new", battery_id="did:test:new", valid_from=time.time() + 86_400)
+
+    assert registry.current(VIN) is None
@@ -0,0 +1,26 @@
+import asyncio
+
+from solders.hash import Hash
+
+from services import blockhash_provider
+from services.blockhash_provider import BlockhashProvider
+
+
+def test_observed_height_does_not_reset_the_blockhash_age(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(blockhash_provider.time, "monotonic", lambda: now[0])
+
+    async def fetch():
+        return Hash.default(), 1_150
+
+    provider = BlockhashProvider(fetch, refresh_interval_s=10.0, max_age_s=30.0, safety_margin_blocks=10)
+    asyncio.run(provider.refresh())
+    now[0] += 20.0
+    provider.observe_block_height(1_010)
+    assert provider.peek() is not None
+    assert provider.stats()["age_s"] == 20.0
+
+    now[0] += 15.0
+    provider.observe_block_height(1_012)
+    assert provider.peek() is None
+    assert provider.stats()["age_s"] == 35.0
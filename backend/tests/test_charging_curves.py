@@ -0,0 +1,57 @@
+import json
+
+import pytest
+
+from services.charging_curves import ChargingCurveLearner, main
+from services.soc_series import SocStore, soc_store
+
+VIN = "TESTVIN0000000001"
+START_MS = 1_700_000_000_000
+
+
+def _charge(store: SocStore, soc_from: float, soc_to: float, pct_per_h: float, start_ms: int) -> int:
+    """Appends one-minute samples charging at `pct_per_h`; returns the last timestamp."""
+    step = pct_per_h / 60.0
+    ts, soc = start_ms, soc_from
+    while soc < soc_to:
+        store.append(VIN, ts, soc)
+        ts += 60_000
+        soc = min(soc + step, soc_to)
+    store.append(VIN, ts, soc)
+    return ts
+
+
+@pytest.fixture
+def tapered_learner() -> ChargingCurveLearner:
+    # Only observed above 84%: full acceptance up to 95%, then tapering
+    store = SocStore()
+    last = _charge(store, 84.0, 95.0, 25.0, START_MS)
+    _charge(store, 95.0, 100.0, 10.0, last)
+    learner = ChargingCurveLearner(store)
+    learner.rebuild()
+    return learner
+
+
+def test_unobserved_low_soc_charges_at_the_flat_limit(tapered_learner):
+    estimate = tapered_learner.table.duration_h(VIN, 0.68, 0.80, capacity_kwh=75.0, power_limit_kw=22.0)
+    assert estimate["curve_source"] == "vehicle"
+    assert estimate["duration_h"] == pytest.approx(0.12 * 75.0 / 22.0, abs=1e-3)
+
+
+def test_high_soc_taper_still_applies(tapered_learner):
+    estimate = tapered_learner.table.duration_h(VIN, 0.95, 1.0, capacity_kwh=75.0, power_limit_kw=22.0)
+    assert estimate["duration_h"] == pytest.approx(0.5, abs=0.02)
+
+
+def test_unobserved_bins_are_unknown_in_the_curve(tapered_learner):
+    bins = tapered_learner.table.curve(VIN, 75.0)["bins"]
+    assert all(b["pct_per_h"] is None for b in bins if b["soc_from"] < 80.0)
+    assert all(b["pct_per_h"] is not None for b in bins if b["soc_from"] >= 80.0)
+
+
+def test_cli_shows_curves(tmp_path, capsys):
+    vin = soc_store.vins()[0]
+    assert main(["--output", str(tmp_path / "curves.npz"), "--show", vin]) == 0
+    report = json.loads(capsys.readouterr().out)
+    assert report["curves_shown"][vin]["capacity_kwh"] > 0
+    assert (tmp_path / "curves.npz").exists()
@@ -0,0 +1,15 @@
+from datetime import datetime, timedelta, timezone
+
+from config import settings
+from routers.negotiator import NegotiationRequest, _negotiate
+
+
+def test_unloadable_learned_model_reports_the_deterministic_path(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "negotiator_ranker_model_path", str(tmp_path / "missing.npz"))
+    departure = datetime.now(timezone.utc) + timedelta(hours=3)
+
+    result = _negotiate(NegotiationRequest(user_lat=60.1609, user_lng=24.6388), departure, "learned")
+
+    assert result["candidates"]
+    assert result["decision_path"] == "deterministic"
+    assert result["plan"]["meta"]["decision_path"] == "deterministic"
@@ -0,0 +1,27 @@
+import json
+
+from services.soc_series import SOC_PATH, SocStore
+from services.telemetry_ingest import VehicleTelemetry
+
+VIN = "TESTVIN0000000001"
+CHARGING_PATH = "Vehicle.Powertrain.TractionBattery.Charging.IsCharging"
+
+
+def _ingest(telemetry: VehicleTelemetry, *records) -> None:
+    result = telemetry.ingest_ndjson("\n".join(json.dumps(record) for record in records))
+    assert result.accepted == len(records)
+
+
+def test_boolean_signals_stay_out_of_the_numeric_rings():
+    telemetry = VehicleTelemetry(ring_size=16, max_paths_per_vehicle=8, soc_series=SocStore())
+    _ingest(
+        telemetry,
+        {"vin": VIN, "path": CHARGING_PATH, "value": True},
+        {"vin": VIN, "path": SOC_PATH, "value": 42.5},
+    )
+
+    assert telemetry.latest(VIN, CHARGING_PATH)[1] is True
+    timestamps, _ = telemetry.recent(VIN, CHARGING_PATH)
+    assert len(timestamps) == 0
+    _, values = telemetry.recent(VIN, SOC_PATH)
+    assert values.tolist() == [42.5]